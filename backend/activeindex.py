@@ -0,0 +1,86 @@
+# Copyright (C) 2023, Bank of America.  The file below is licensed to LSC for use with HSoF.  All other rights are reserved.
+"""This file defines the interval index of a player's backend objects.
+A backend object only has an effect between its start period and its last period (start_period + n_periods - 1).
+Late in the game a player carries many objects of earlier stages that no longer have any effect (eg paid off loans).
+The index keeps the objects sorted by their start and by their last period, so a simulation only visits the objects that are active:
+    sweep:          walks through a range of periods and gives the objects that are active in each period.
+                    An object joins when the walk reaches its start period and leaves after its last period (a sweep line).
+    overlapping:    gives the objects that are active in any period of a range
+The objects are always given in the order of the player's list (Player.selected_bked_objs),
+so that the effects are added in the same order as when every object is visited, and the results are exactly the same.
+
+Learning tip:
+What is a sweep line algorithm?
+See: https://en.wikipedia.org/wiki/Sweep_line_algorithm
+"""
+
+import bisect
+
+class ActiveObjectIndex:
+    """Represents the interval index of a list of backend objects"""
+
+    def __init__(self):
+        # the list of backend objects the index covers, and how many of its objects are in the index
+        self._objs = None
+        self._n = 0
+        # (start period, position in the list) and (last period, position in the list) of each object, sorted
+        self._by_start = []
+        self._by_end = []
+
+    def copy(self, bked_objs):
+        """Returns a copy of the index that covers bked_objs, a copy of the list this index covers (see Player.fork)"""
+        rtn = ActiveObjectIndex()
+        rtn._objs, rtn._n = bked_objs, self._n
+        rtn._by_start, rtn._by_end = list(self._by_start), list(self._by_end)
+        return rtn
+
+    def sync(self, bked_objs):
+        """Adds the objects appended to bked_objs since the last call. The index is rebuilt if bked_objs is another list or lost objects."""
+        if bked_objs is not self._objs or len(bked_objs) < self._n:
+            self._objs, self._n, self._by_start, self._by_end = bked_objs, 0, [], []
+        for iPos in range(self._n, len(bked_objs)):
+            crntObj = bked_objs[iPos]
+            bisect.insort(self._by_start, (crntObj.start_period, iPos))
+            bisect.insort(self._by_end, (crntObj.start_period + crntObj.n_periods - 1, iPos))
+        self._n = len(bked_objs)
+
+    def overlapping(self, bked_objs, period_start, period_end):
+        """Returns the objects of bked_objs that are active in any period between period_start and period_end (included), in the order of bked_objs"""
+        self.sync(bked_objs)
+        # the objects that start by period_end, of which the ones that end before period_start are left out
+        last = self.__last_period
+        iStop = bisect.bisect_right(self._by_start, (period_end, len(bked_objs)))
+        return [bked_objs[c] for c in sorted(iPos for _, iPos in self._by_start[:iStop] if last(iPos) >= period_start)]
+
+    def sweep(self, bked_objs, period_start, period_end):
+        """Yields a tuple of (period, list of the objects of bked_objs active in the period, in the order of bked_objs)
+        for each period between period_start and period_end (included). The list must not be changed."""
+        self.sync(bked_objs)
+        last = self.__last_period
+        # the objects active in period_start
+        iStart = bisect.bisect_right(self._by_start, (period_start, len(bked_objs)))
+        active = {iPos for _, iPos in self._by_start[:iStart] if last(iPos) >= period_start}
+        # the next object to join and the next object to leave
+        iEnd = bisect.bisect_left(self._by_end, (period_start, -1))
+        crntObjs = [bked_objs[c] for c in sorted(active)]
+        for iPeriod in range(period_start, period_end+1):
+            changed = False
+            # the objects that end before this period leave
+            while iEnd < len(self._by_end) and self._by_end[iEnd][0] < iPeriod:
+                changed |= self._by_end[iEnd][1] in active
+                active.discard(self._by_end[iEnd][1])
+                iEnd += 1
+            # the objects that start in this period join
+            while iStart < len(self._by_start) and self._by_start[iStart][0] <= iPeriod:
+                if last(self._by_start[iStart][1]) >= iPeriod:
+                    active.add(self._by_start[iStart][1])
+                    changed = True
+                iStart += 1
+            if changed:
+                crntObjs = [bked_objs[c] for c in sorted(active)]
+            yield iPeriod, crntObjs
+
+    def __last_period(self, iPos):
+        """returns the last period of the object at a position of the list"""
+        crntObj = self._objs[iPos]
+        return crntObj.start_period + crntObj.n_periods - 1
@@ -0,0 +1,150 @@
+# Copyright (C) 2023, Bank of America.  The file below is licensed to LSC for use with HSoF.  All other rights are reserved.
+"""This file defines the process pool that evaluates the AI player's choice combinations in parallel.
+Every choice combination of a turn is evaluated independently, so the combinations can be split among several processes (workers).
+
+Each worker loads the game definitions (backend.gameitems) once when it starts and keeps its own Prosperville instance.
+For every turn, the game sends a small description of the AI player (its choices, keys of its backend objects and the last few rows of its score table)
+together with the choice combinations to evaluate. The worker rebuilds the AI player from the preloaded game definitions
+and returns only the bankruptcy indicator and the end-of-stage score of each combination.
+Sending a turn to the workers and the results back has a cost, so only the turns with many combinations are sent (see AIPool.MinCombinations).
+
+Learning tip:
+How does a process pool work in Python?
+See: https://docs.python.org/3.11/library/concurrent.futures.html#processpoolexecutor
+"""
+
+from backend.design import NPeriodsPerMonth # number of simulation periods in a month
+
+class AIPool:
+    """Represents a pool of worker processes that evaluate AI choice combinations"""
+
+    # the fewest feasible choice combinations of a turn that are sent to the workers. A turn with fewer combinations is evaluated in the game's process.
+    # each round of evaluations costs a few milliseconds to send the AI player to the workers and the results back, 
+    # while a combination takes well below a millisecond to evaluate. The pool was slower than the game's process for every turn of the game definitions (up to 96 combinations)
+    MinCombinations = 256
+
+    def __init__(self, n_workers):
+        """Represents a pool of worker processes that evaluate AI choice combinations
+
+        Input Argument
+        --------------
+        n_workers:  required int. Number of worker processes.
+        """
+        from concurrent.futures import ProcessPoolExecutor
+
+        if n_workers < 1:
+            raise ValueError(f'n_workers should be a positive integer. "{n_workers}" is given.')
+        self.n_workers = n_workers
+        self.executor = ProcessPoolExecutor(max_workers=n_workers, initializer=_init_worker)
+
+    def evaluate(self, context, choices, stats=None):
+        """Evaluates a list of choice combinations in the worker processes.
+
+        Input Arguments
+        ---------------
+        context:    required dictionary returned by make_context
+        choices:    required list of tuples of option indices
+        stats:      optional backend.optimizer.SearchStats object. If given, its n_outcomes is set to the number of outcomes the workers scored each combination with
+
+        Output Argument
+        ---------------
+        a list with one element per element of choices, in the same order.
+        Each element is None if the combination is not feasible, otherwise a tuple of (bankruptcy indicator, score at the end of the stage).
+        """
+        if len(choices) == 0:
+            return []
+        # split the combinations into one chunk per worker so that the context is sent once per worker
+        chunk_size = -(-len(choices) // self.n_workers) # ceiling division
+        chunks = [choices[i:(i+chunk_size)] for i in range(0, len(choices), chunk_size)]
+        rtn = []
+        # map returns the results in the order of the chunks, which keeps the results in the order of choices
+        for crntResults, n_outcomes in self.executor.map(_evaluate_chunk, [context]*len(chunks), chunks):
+            rtn += crntResults
+            if stats is not None:
+                stats.n_outcomes = n_outcomes
+        return rtn
+
+    def close(self):
+        """Stops the worker processes"""
+        self.executor.shutdown(wait=True, cancel_futures=True)
+
+def make_context(game, event_names, aiPlayer):
+    """Describes the state a player (usually the AI player) of a game is in before its choices of the current turn are simulated.
+    The description only contains plain values that can be rebuilt with the game definitions in backend.gameitems.
+
+    Input Arguments
+    ---------------
+    game:           the Prosperville object
+    event_names:    the event names of the current turn that have options
+    aiPlayer:       the Player object whose choices are evaluated
+    """
+    import numpy as np
+    from backend.scoretable import ScoreTable
+    import backend.gameitems as gamedef
+
+    # the AI re-simulates from the start of the stage. It reads the NPeriodsPerMonth periods before that from its score table
+    period_start = gamedef.first_period_of_turn[game.first_turn_of_stage[game.iStage]]
+    tail_start = max(0, min(period_start, len(aiPlayer._score_table)-1) - NPeriodsPerMonth)
+    return {
+        'sim_engine': game.sim_engine
+        , 'ai_search': game.ai_search
+        # the random event probabilities of the game. The expectimax search weights the undrawn random events with them
+        , 'rnd_evt_prob': {k: list(v) for k, v in game.rnd_evt_prob.items()}
+        , 'schedule_engine': game.schedule_engine
+        , 'init_cash': aiPlayer.init_cash
+        , 'bankrupt': (aiPlayer.bankrupt, aiPlayer.bankrupt_period)
+        , 'choices': dict(aiPlayer.choices._data)
+        # each backend object is sent as its key and the two fields the game may change on a copy of the object
+        , 'bked_objs': [(c.key, c.start_period, c.amount) for c in aiPlayer.selected_bked_objs]
+        , 'tail_start': tail_start
+        , 'tail': {c: np.array(aiPlayer._score_table[c][tail_start:]) for c in ScoreTable.Columns}
+        # the cells the game has written to its step table (the random events drawn so far)
+        , 'step_overlay': {c: dict(v) for c, v in game.step_table.overlay.items()}
+        , 'steps': (game.iStep, game.iTurn, game.iStage)
+        , 'event_names': list(event_names)
+    }
+
+# the Prosperville instances of a worker process by (sim_engine, schedule_engine)
+_worker_games = dict()
+
+def _init_worker():
+    """runs once when a worker process starts. It loads the game definitions."""
+    import backend.gameitems
+
+def _get_bked_obj(key, start_period, amount, schedule_engine):
+    """rebuilds a backend object from the game definitions the same way as the game does (see backend.effects.placed_object)"""
+    import backend.gameitems as gamedef
+    from backend import effects
+
+    return effects.placed_object(gamedef.pvBkEndObj_by_name[key[0]][key[1]], start_period, amount, schedule_engine=schedule_engine)
+
+def _evaluate_chunk(context, choices):
+    """evaluates a list of choice combinations in a worker process. See AIPool.evaluate.
+    Returns the results and the number of outcomes each combination was scored with"""
+    from backend.prosperville import Prosperville
+    from backend.player import Player
+    from backend.optimizer import SearchStats
+
+    engines = (context['sim_engine'], context['schedule_engine'])
+    if engines not in _worker_games:
+        _worker_games[engines] = Prosperville(player_names=[], sim_engine=engines[0], schedule_engine=engines[1], ai_search='brute_force')
+    game = _worker_games[engines]
+
+    # restore where the game is
+    game.step_table.overlay = {c: dict(v) for c, v in context['step_overlay'].items()}
+    game.iStep, game.iTurn, game.iStage = context['steps']
+    game.ai_search = context['ai_search']
+    game.rnd_evt_prob = context['rnd_evt_prob']
+
+    # rebuild the AI player
+    aiPlayer = Player('AI', game, is_system=True, init_cash=context['init_cash'], sim_engine=engines[0])
+    aiPlayer.bankrupt, aiPlayer.bankrupt_period = context['bankrupt']
+    aiPlayer.choices._data.update(context['choices'])
+    aiPlayer.selected_bked_objs = [_get_bked_obj(*c, engines[1]) for c in context['bked_objs']]
+    # only the last few periods before the stage are read by the simulation. The earlier periods are left as zeros
+    n_tail = len(context['tail']['score'])
+    aiPlayer._score_table.write(context['tail_start'], context['tail'], n_tail)
+    game.players[-1] = aiPlayer
+
+    stats = SearchStats()
+    return game.evaluate_ai_choices(context['event_names'], choices, stats=stats), stats.n_outcomes
@@ -0,0 +1,219 @@
+# Copyright (C) 2023, Bank of America.  The file below is licensed to LSC for use with HSoF.  All other rights are reserved.
+"""This file defines the benchmark suite of the hot paths of the game:
+    schedule_<type>_<engine>:   calculating the schedule of every loan, asset and expense object of the game definitions (see backend/schedule.py)
+    simulate_<engine>:          simulating a player over a full life (Player.simulate from the first to the last period of the game)
+    ai_turn_<turn>:             the AI search of each turn with options, as the game runs it at the end of the turn (see Prosperville.suggest_choices)
+    score_table / choice_table: building the tables a player's dashboard shows from scratch
+    dataframe2html(_page):      converting a player's score table (or the first page of it, as the dashboard does) to HTML for the graphic user interface (see gui/_shared.py)
+    game_<n>_players:           playing a complete seeded game with n human players that always pick the first available option
+Every benchmark runs the same work on the same seeded game, so two runs of the suite can be compared.
+
+Each benchmark is run a few times after one warm up run, and reports
+    wall_min, wall_median:      the shortest and the median wall time of the runs in seconds
+    alloc_bytes, alloc_blocks:  the memory (bytes and number of blocks) allocated by one run that is still in use when the run ends
+    peak_bytes:                 the highest memory in use during one run, above the memory in use before the run
+The memory is measured with tracemalloc on one extra run, so it does not slow down the timed runs.
+
+The suite is run from a terminal. It saves the results as a JSON file and compares them with a saved baseline:
+    python -m backend.benchmark --out baseline.json
+    python -m backend.benchmark --out new.json --baseline baseline.json
+The command exits with status 1 if a benchmark got slower than the baseline by more than the tolerance, so it can be used in a build pipeline.
+
+Learning tip:
+What is a benchmark?
+See: https://en.wikipedia.org/wiki/Benchmark_(computing)
+"""
+
+# the format version of the result file. Increase it when the content or the layout of the file changes
+BenchmarkVersion = 1
+
+class Benchmark:
+    """Represents one benchmark of the suite"""
+
+    def __init__(self, name, run):
+        """Represents one benchmark of the suite
+
+        Input Arguments
+        ---------------
+        name:   required str. The name of the benchmark in the result file.
+        run:    required function without arguments that does the work once. The work must be the same every time it is called.
+        """
+        self.name = name
+        self.run = run
+
+    def measure(self, repeats=5):
+        """Runs the benchmark and returns its results (a dictionary, see the description of this file)"""
+        import gc, time, tracemalloc, statistics
+
+        # the first run fills the caches (eg the backend objects that are created lazily) so that all timed runs do the same work
+        self.run()
+        times = []
+        for _ in range(repeats):
+            gc.collect()
+            crntStart = time.perf_counter()
+            self.run()
+            times.append(time.perf_counter() - crntStart)
+
+        # the memory is measured on one more run. tracemalloc slows down every allocation, so it is not on while timing
+        gc.collect()
+        tracemalloc.start()
+        try:
+            before = tracemalloc.take_snapshot()
+            base_bytes = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            self.run()
+            crnt_bytes, peak_bytes = tracemalloc.get_traced_memory()
+            after = tracemalloc.take_snapshot()
+        finally:
+            tracemalloc.stop()
+        alloc_blocks = sum(c.count_diff for c in after.compare_to(before, 'filename'))
+        return {'wall_min': min(times), 'wall_median': statistics.median(times), 'repeats': repeats
+                , 'alloc_bytes': crnt_bytes - base_bytes, 'alloc_blocks': alloc_blocks, 'peak_bytes': peak_bytes - base_bytes}
+
+def build_suite(n_players=2, seed=0):
+    """Returns the list of benchmarks (see the description of this file).
+
+    Input Arguments
+    ---------------
+    n_players:  optional int. The number of human players of the complete game benchmark.
+    seed:       optional int. The seed of the games the benchmarks use.
+    """
+    import copy
+    import backend.gameitems as gamedef
+    from backend.schedule import ScheduleEngines
+    from backend.prosperville import Prosperville
+    from backend.steptable import StepTable
+    from backend.tournament import play_game, make_strategy
+
+    suite = []
+
+    # schedules of all backend objects of the game definitions by type. A copy of each object is recalculated so the shared objects are not changed
+    gamedef.pvBkEndObj_by_name.prewarm()
+    for crntType in ['loan', 'asset', 'expense']:
+        bked_objs = [copy.deepcopy(c) for crntName in gamedef.pvBkEndObj_by_name for c in gamedef.pvBkEndObj_by_name[crntName] if c.type == crntType]
+        for crntEngine in ScheduleEngines:
+            suite.append(Benchmark(f'schedule_{crntType}_{crntEngine}'
+                                   , lambda objs=bked_objs, engine=crntEngine: [c.calculate_schedule(engine=engine) for c in objs]))
+
+    # play one seeded game with a human player that always picks the first available option.
+    # the AI search of each turn with options is timed on the state the game is in right before the AI chooses
+    strategy = make_strategy('fixed')
+    strategy.start_game([seed, 0])
+    game = Prosperville(player_names=['player 1'], seed=seed)
+    while not game.is_end:
+        if game.crntEvent is not None and game.crntEvent.options and not game.crntPlayer.is_system:
+            game.crntPlayer.choices[game.crntEvent.name] = strategy.choose(game, game.crntPlayer)
+        if game.iStep == game.last_step_of_turn[game.iTurn] and game.is_last_player and len(game.turn_options(game.iTurn)[0]) > 0:
+            # the game, its step table (the random events drawn so far) and the AI player are copied, because the game moves on
+            aiGame, aiPlayer = copy.copy(game), game.players[-1].fork()
+            aiGame.step_table = StepTable(gamedef.step_table)
+            aiGame.step_table.overlay = {c: dict(v) for c, v in game.step_table.overlay.items()}
+            suite.append(Benchmark(f'ai_turn_{game.iTurn}', lambda g=aiGame, p=aiPlayer: g.suggest_choices(p)))
+        game.next()
+    game.close()
+
+    # the AI player has played the whole game
+    crntPlayer = game.players[-1]
+    last_period = int(gamedef.step_table['period_last'][-1])
+    for crntEngine in ['numpy', 'python']:
+        def simulate(player=crntPlayer, engine=crntEngine):
+            altPlayer = player.fork(0)
+            altPlayer.sim_engine = engine
+            altPlayer.bankrupt, altPlayer.bankrupt_period, altPlayer.bankrupt_step = False, -1, -1
+            altPlayer.simulate(0, last_period)
+        suite.append(Benchmark(f'simulate_{crntEngine}', simulate))
+
+    def choice_table(player=crntPlayer):
+        # the table is cached by the player. Clear the cache so the table is built from scratch
+        player.clear_table_caches()
+        return player.choice_table
+    def score_table(player=crntPlayer):
+        # the table is cached by the player too
+        player.clear_table_caches()
+        return player.score_table
+    suite.append(Benchmark('score_table', score_table))
+    suite.append(Benchmark('choice_table', choice_table))
+
+    from gui._shared import dataframe2html
+    score_table = crntPlayer.score_table
+    suite.append(Benchmark('dataframe2html', lambda df=score_table: dataframe2html(df)))
+    suite.append(Benchmark('dataframe2html_page', lambda df=score_table: dataframe2html(df, page=0)))
+
+    suite.append(Benchmark(f'game_{n_players}_players', lambda: play_game(['fixed'] * n_players, seed=seed)))
+    return suite
+
+def run_suite(repeats=5, n_players=2, seed=0, only=None, progress=None):
+    """Runs the benchmark suite and returns the content of the result file: a dictionary with
+        version:    BenchmarkVersion
+        settings:   the arguments of this function and the versions of python and numpy
+        results:    the results of each benchmark (see Benchmark.measure) by name
+
+    Input Arguments
+    ---------------
+    repeats:    optional int. The number of timed runs of each benchmark.
+    n_players:  optional int. The number of human players of the complete game benchmark.
+    seed:       optional int. The seed of the games the benchmarks use.
+    only:       optional list of str. Only the benchmarks whose names start with one of them are run. Defaults to all benchmarks.
+    progress:   optional function called with (benchmark name, its results) after each benchmark.
+    """
+    import sys, platform
+    import numpy as np
+
+    rtn = {'version': BenchmarkVersion
+           , 'settings': {'repeats': repeats, 'n_players': n_players, 'seed': seed
+                          , 'python': sys.version.split()[0], 'numpy': np.__version__, 'machine': platform.machine()}
+           , 'results': dict()}
+    for crntBenchmark in build_suite(n_players, seed):
+        if only is not None and not any(crntBenchmark.name.startswith(c) for c in only):
+            continue
+        rtn['results'][crntBenchmark.name] = crntBenchmark.measure(repeats)
+        if progress is not None:
+            progress(crntBenchmark.name, rtn['results'][crntBenchmark.name])
+    return rtn
+
+def compare(results, baseline, tolerance=0.25):
+    """Compares the results of a run with a baseline run. Returns a list of (benchmark name, ratio of wall_min to the baseline, is a regression).
+    A benchmark is a regression if its wall_min is more than (1 + tolerance) times the baseline's. Benchmarks missing from either run are left out."""
+    rtn = []
+    for crntName, crntResult in results['results'].items():
+        if crntName not in baseline['results'] or baseline['results'][crntName]['wall_min'] <= 0:
+            continue
+        ratio = crntResult['wall_min'] / baseline['results'][crntName]['wall_min']
+        rtn.append((crntName, ratio, ratio > 1 + tolerance))
+    return rtn
+
+def main(args=None):
+    """the command line entry point. Run "python -m backend.benchmark --help" for the arguments."""
+    import sys, json, argparse
+
+    parser = argparse.ArgumentParser(prog='python -m backend.benchmark', description='Times the hot paths of Prosperville and compares them with a baseline.')
+    parser.add_argument('--repeats', type=int, default=5, help='number of timed runs of each benchmark')
+    parser.add_argument('--players', type=int, default=2, help='number of human players of the complete game benchmark')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the games the benchmarks use')
+    parser.add_argument('--only', action='append', help='run only the benchmarks whose names start with this. Repeat for more names.')
+    parser.add_argument('--out', default=None, help='JSON file to save the results to')
+    parser.add_argument('--baseline', default=None, help='JSON file with the results of an earlier run to compare with')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='a benchmark regressed if it is slower than the baseline by more than this fraction')
+    args = parser.parse_args(args)
+
+    results = run_suite(args.repeats, args.players, args.seed, args.only
+                        , progress=lambda name, r: print(f'{name:<28} {r["wall_min"]*1000:10.2f} ms  peak {r["peak_bytes"]/1024:10.1f} KiB', file=sys.stderr))
+    if args.out is not None:
+        with open(args.out, 'w') as f:
+            json.dump(results, f, indent=1)
+
+    if args.baseline is not None:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get('version') != BenchmarkVersion:
+            raise ValueError(f'{args.baseline} is not a benchmark result file of version {BenchmarkVersion}.')
+        regressions = 0
+        for crntName, ratio, is_regression in compare(results, baseline, args.tolerance):
+            print(f'{crntName:<28} {ratio:6.2f}x {"REGRESSION" if is_regression else ""}')
+            regressions += is_regression
+        if regressions > 0:
+            print(f'{regressions} benchmark(s) are slower than the baseline by more than {args.tolerance:.0%}.', file=sys.stderr)
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main()
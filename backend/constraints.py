@@ -0,0 +1,105 @@
+# Copyright (C) 2023, Bank of America.  The file below is licensed to LSC for use with HSoF.  All other rights are reserved.
+"""This file compiles the option dependencies of the event definitions into bit mask tables.
+Some options cannot be chosen together. For example, a player who does not go to college cannot live in a dorm.
+An option declares the options that rule it out in its excluded_by field (see backend/design/eventdef.py).
+An option is not available to a player if the player has chosen any of the options in its excluded_by list.
+
+Each option that appears in an excluded_by list gets one bit. The choices of a player become an int with the bits of the chosen options set (choice_mask),
+and each option has an int with the bits of the options that rule it out (its excluded mask). An option is available if the two masks share no bit.
+This lets the game check the availability of an option, and the AI drop every infeasible combination of options in a turn,
+without copying or simulating a player (see Prosperville.__search_best_choices).
+
+Learning tip:
+What is a bit mask?
+See: https://en.wikipedia.org/wiki/Mask_(computing)
+"""
+
+import numpy as np
+
+class OptionConstraints:
+    """Represents the option dependencies of all events as bit masks"""
+
+    # the masks are kept in int64 numpy arrays, so at most this many options can rule out another option
+    MaxBits = 63
+
+    def __init__(self, events):
+        """Represents the option dependencies of all events as bit masks
+
+        Input Argument
+        --------------
+        events:     required list of event definitions (see backend/design/eventdef.py)
+        """
+        # the event name and option index of each option, by option name
+        option_index = dict()
+        for crntEvt in events:
+            for iOption, crntOption in enumerate(crntEvt.options or []):
+                option_index[crntOption.name] = (crntEvt.name, iOption)
+
+        # one bit for each option that rules out another option, in the order they are first named
+        bit_by_option = dict()
+        for crntEvt in events:
+            for crntOption in (crntEvt.options or []):
+                for crntName in (crntOption.excluded_by or []):
+                    if crntName not in option_index:
+                        raise ValueError(f'Option "{crntName}" in excluded_by of option "{crntOption.name}" is not defined in backend/design/eventdef.py.')
+                    if option_index[crntName][0] == crntEvt.name:
+                        raise ValueError(f'Option "{crntName}" in excluded_by of option "{crntOption.name}" belongs to the same event. Only one option of an event can be chosen anyway.')
+                    bit_by_option.setdefault(crntName, 1 << len(bit_by_option))
+        if len(bit_by_option) > OptionConstraints.MaxBits:
+            raise ValueError(f'At most {OptionConstraints.MaxBits} options can be named in excluded_by. {len(bit_by_option)} are named.')
+
+        # by event name, the bit of each option (0 if the option rules out nothing) and the mask of the options that rule out each option
+        self.option_bits = dict()
+        self.excluded_masks = dict()
+        for crntEvt in events:
+            if not crntEvt.options:
+                continue
+            self.option_bits[crntEvt.name] = np.array([bit_by_option.get(c.name, 0) for c in crntEvt.options], dtype=np.int64)
+            self.excluded_masks[crntEvt.name] = np.array([sum(bit_by_option[n] for n in (c.excluded_by or [])) for c in crntEvt.options], dtype=np.int64)
+
+    def choice_mask(self, choices):
+        """returns the mask (an int) of a dictionary of option indices by event name, eg the choices of a player"""
+        rtn = 0
+        for crntEvtNm, iOption in choices.items():
+            if crntEvtNm in self.option_bits:
+                rtn |= int(self.option_bits[crntEvtNm][iOption])
+        return rtn
+
+    def availability(self, eventName, choices):
+        """returns a list of booleans that indicate the availability of the options of an event for a dictionary of option indices by event name.
+        The choice of the event itself is ignored, because choosing another option replaces it."""
+        mask = self.choice_mask({k: v for k, v in choices.items() if k != eventName})
+        return [bool(c) for c in (self.excluded_masks[eventName] & mask) == 0]
+
+    def is_feasible(self, choices):
+        """returns True if none of the options in a dictionary of option indices by event name is ruled out by another one of them"""
+        mask = self.choice_mask(choices)
+        return all((int(self.excluded_masks[k][v]) & mask) == 0 for k, v in choices.items() if k in self.excluded_masks)
+
+    def feasible_combinations(self, event_names, options, choices):
+        """Returns the combinations of options that can be chosen together, in the order of itertools.product.
+
+        Input Arguments
+        ---------------
+        event_names:    required list of event names
+        options:        required list of the option indices of each event in event_names
+        choices:        required dictionary of option indices by event name that are already chosen (eg the player's choices from earlier turns).
+                        The choices of the events in event_names are ignored.
+
+        Output Argument
+        ---------------
+        a list of tuples of option indices, one per event in event_names
+        """
+        if len(event_names) == 0:
+            return [()]
+        mask = self.choice_mask({k: v for k, v in choices.items() if k not in event_names})
+        # the option indices of event k run along axis k, so every combination has one cell
+        grids = np.ix_(*[np.asarray(o, dtype=int) for o in options])
+        combination_mask = mask
+        for crntEvtNm, crntGrid in zip(event_names, grids):
+            combination_mask = combination_mask | self.option_bits[crntEvtNm][crntGrid]
+        feasible = np.ones([len(o) for o in options], dtype=bool)
+        for crntEvtNm, crntGrid in zip(event_names, grids):
+            feasible &= (self.excluded_masks[crntEvtNm][crntGrid] & combination_mask) == 0
+        # np.argwhere lists the cells in the order of itertools.product
+        return [tuple(int(options[k][i]) for k, i in enumerate(c)) for c in np.argwhere(feasible)]
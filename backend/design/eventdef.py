@@ -6,7 +6,9 @@ from collections import namedtuple
 # define a structure that can describe an event
 stctEvent = namedtuple('stctEvent', 'name title options desc tip backend')
 # define a structure that can describe an option
-stctOption = namedtuple('stctOption', 'name title image desc backend')
+# excluded_by is an optional list of the names of options (of other events) that make this option unavailable when the player has chosen any of them.
+# it defaults to None (always available). The dependencies are compiled into bit masks in backend/constraints.py
+stctOption = namedtuple('stctOption', 'name title image desc backend excluded_by', defaults=[None])
 
 # a list of all events. Order of the events does not matter
 pvEvents = [
@@ -46,8 +48,7 @@ pvEvents = [
     # stage 1 event -- higher ed
     , stctEvent(name='stg1_college', title='What is your plan after high school?', desc=''
                 , options=[
-                    # there is special logic to turn off the dorm option in 'stg1_lodging' event if 'stg1_no_college' is chosen
-                    # see Player.__on_set_choice class method in backend/player.py for the special logic
+                    # the dorm option in 'stg1_lodging' event is not available if 'stg1_no_college' is chosen. See excluded_by of 'stg1_lodging_dorm'
                     stctOption(name='stg1_no_college', title='First job full time', image='res/desk_icon1.png'
                                     , desc='Annual income: $20,000. Paid bi-weekly at $1,666.67. '
                                     , backend={'type':'salary', 'category':'income', 'title':'salary', 'amt':20000, 'amt_quote_term':'annual', 'pay_freq_n_periods':1, 'term':4, 'term_unit':'yr', 'start_period':0}
@@ -103,13 +104,12 @@ pvEvents = [
     )
     # stage 1 event -- lodging
     , stctEvent(name='stg1_lodging', title='Lodging', desc=''
-                # due to the special logic to turn off 'stg1_lodging_dorm' option when a player chooses 'stg1_no_college' option in 'stg1_college' event,
-                # the options list in this event is ordered. please do not change the order of the options
-                # see Player.__on_set_choice class method in backend/player.py
+                # 'stg1_lodging_dorm' option is not available when a player chooses 'stg1_no_college' option in 'stg1_college' event (see its excluded_by)
                 , options=[
                     stctOption(name='stg1_lodging_dorm', title='Dorm', image='res/bed_icon1.png'
                                      , desc='Living in the dorm costs $1800 every 6 months. \n\nThis option is not available if you did not choose to go to college in the previous screen.'
                                      , backend={'type':'expense', 'category':'housing', 'title':'dorm', 'amt':1800, 'amt_quote_term':'one-time', 'pay_freq_n_periods':12, 'term':4, 'term_unit':'yr', 'start_period':0, 'happiness_spending':True, 'annual_rate':0, 'rate_freq':1, 'rate_freq_unit':'yr'}
+                                     , excluded_by=['stg1_no_college']
                               )
                     , stctOption(name='stg1_lodging_off_campus_shared', title='Off campus with roommates', image='res/tall_building_icon1.png'
                                      , desc='Staying off campus with roommates costs $250/month paid monthly.'
@@ -0,0 +1,149 @@
+# Copyright (C) 2023, Bank of America.  The file below is licensed to LSC for use with HSoF.  All other rights are reserved.
+"""This file defines the effect vectors of backend objects and the caches that keep them.
+The effect of a backend object is what it adds to each score table column (income, spending, debt of each category, asset, happiness spending)
+in every simulation period it is active, or the happiness adjustment ratio it multiplies.
+The schedule table of an object is indexed from the start of the object. An effect is indexed by global simulation period,
+so that the simulation kernel (backend/simkernel.py) can add the effects of a player's objects without shifting indices or converting lists.
+
+An effect only depends on the object's definition, its start period and its amount, so it is calculated once and shared by all players and all games:
+    placed_object           returns the copy of an object that starts at a given period (and pays a given amount). 
+                            The copy is made once and shared while a player (or a cached contribution) still uses it.
+    object_effect           returns the effect of an object. It is calculated once per object and kept while the object is used.
+    option_contributions    returns the contribution of a group of objects (eg the objects of an option) to wealth,
+                            monthly happiness spending and the happiness adjustment ratio over a range of periods. Used by the AI search.
+                            Only the most recently used ContributionCacheSize contributions are kept.
+The objects these functions return or receive must not be changed once they are in use.
+
+Learning tip:
+What is memoization?
+See: https://en.wikipedia.org/wiki/Memoization
+"""
+
+import weakref
+import numpy as np
+from collections import OrderedDict
+
+class ObjectEffect:
+    """Represents the effect of a backend object in global simulation periods"""
+
+    def __init__(self, bkedObj):
+        """Represents the effect of a backend object in global simulation periods
+
+        Input Argument
+        --------------
+        bkedObj:    required backend object (see backend/__init__.py) with its start period set
+        """
+        # the first and the last global periods the object is active in
+        self.first = bkedObj.start_period
+        self.last = bkedObj.start_period + bkedObj.n_periods - 1
+        # happiness adjustment ratio the object multiplies. None if the object is not a HappinessAdjustmentRatio
+        self.adj_rate = None
+        # what the object adds to each column. Element i of an array is the amount for global period self.first+i
+        self.cols = dict()
+
+        if bkedObj.type == 'har':
+            # happiness adjustment ratio object has no schedule. It multiplies the happiness directly
+            self.adj_rate = bkedObj.adjRate
+            return
+
+        crntPay = np.asarray(bkedObj.schedule['pay'], dtype=float)
+        if bkedObj.type == 'salary':
+            self.cols['income'] = crntPay
+            # the total annual salary is used by the bankruptcy rule
+            self.cols['annual_salary'] = np.full(len(crntPay), bkedObj.amount)
+        elif bkedObj.type == 'loan':
+            crnt_obj_debt = np.asarray(bkedObj.schedule['bal_end'], dtype=float)
+            self.cols['spending'] = crntPay
+            self.cols['debt'] = crnt_obj_debt
+            if bkedObj.is_happiness_spending:
+                self.cols['spd_on_hapns'] = crntPay
+            # categorize the debt
+            if bkedObj.category == 'student':
+                self.cols['debt_std'] = crnt_obj_debt
+            elif bkedObj.category == 'mortgage':
+                self.cols['debt_mort'] = crnt_obj_debt
+            elif bkedObj.category == 'car':
+                self.cols['debt_car'] = crnt_obj_debt
+            else:
+                self.cols['debt_other'] = crnt_obj_debt
+        elif bkedObj.type == 'expense':
+            self.cols['spending'] = crntPay
+            if bkedObj.is_happiness_spending:
+                self.cols['spd_on_hapns'] = crntPay
+        elif bkedObj.type == 'asset':
+            self.cols['asset'] = np.asarray(bkedObj.schedule['value_end'], dtype=float)
+            self.cols['income'] = crntPay
+        else:
+            raise NotImplementedError(f'The backend object type (="{bkedObj.type}") is not supported.')
+
+        # the arrays are shared by all players. Make sure nobody changes them
+        for crntCol in self.cols.values():
+            crntCol.flags.writeable = False
+
+# the effect of each backend object. An entry is removed when its object is no longer used anywhere
+_effects = weakref.WeakKeyDictionary()
+# copies of backend objects by (key of the object, start period, amount, schedule engine). An entry is removed when its copy is no longer used anywhere
+_placed_objects = weakref.WeakValueDictionary()
+# the number of contributions of groups of backend objects that are kept. The least recently used one is removed first
+ContributionCacheSize = 1024
+# contributions of groups of backend objects by (the objects, first period, last period), from the least to the most recently used
+_contributions = OrderedDict()
+
+def object_effect(bkedObj):
+    """returns the ObjectEffect of a backend object. It is calculated the first time it is requested for the object"""
+    rtn = _effects.get(bkedObj)
+    if rtn is None:
+        rtn = _effects[bkedObj] = ObjectEffect(bkedObj)
+    return rtn
+
+def placed_object(bkedObj, start_period=None, amount=None, schedule_engine='python'):
+    """Returns a copy of a backend object from the game definitions (backend.gameitems.pvBkEndObj_by_name) that starts at start_period and pays amount.
+    The copy is made the first time it is requested and shared afterwards. The object itself is returned if nothing needs to change.
+
+    Input Arguments
+    ---------------
+    bkedObj:            required backend object
+    start_period:       optional int. The start period of the copy. Defaults to the start period of bkedObj.
+    amount:             optional float. The amount of the copy. Its schedule is recalculated if the amount changes. Defaults to the amount of bkedObj.
+    schedule_engine:    optional str. The schedule engine that recalculates the schedule (see backend/schedule.py).
+    """
+    import copy
+
+    start_period = bkedObj.start_period if start_period is None else start_period
+    amount = bkedObj.amount if amount is None else amount
+    if start_period == bkedObj.start_period and amount == bkedObj.amount:
+        return bkedObj
+
+    cache_key = (bkedObj.key, bkedObj.start_period, bkedObj.amount, start_period, amount, schedule_engine)
+    rtn = _placed_objects.get(cache_key) if bkedObj.key is not None else None
+    if rtn is None:
+        rtn = copy.deepcopy(bkedObj)
+        rtn.start_period = start_period
+        if amount != bkedObj.amount:
+            rtn.amount = amount
+            rtn.calculate_schedule(engine=schedule_engine)
+        # an object that does not come from the game definitions has no key. Its copies are not shared
+        if bkedObj.key is not None:
+            _placed_objects[cache_key] = rtn
+    return rtn
+
+def option_contributions(bked_objs, period_start, period_end):
+    """Returns the contribution of a group of backend objects to wealth, monthly happiness spending and the happiness adjustment ratio
+    between two global periods (see backend.optimizer.contributions). It is calculated the first time it is requested for the group and the periods.
+    The returned arrays must not be changed."""
+    from backend.simkernel import gather_period_arrays
+    from backend.optimizer import contributions
+
+    cache_key = (tuple(bked_objs), period_start, period_end)
+    rtn = _contributions.get(cache_key)
+    if rtn is None:
+        rtn = contributions(gather_period_arrays(bked_objs, period_start, period_end))
+        for crntArray in rtn:
+            crntArray.flags.writeable = False
+        _contributions[cache_key] = rtn
+        # the key keeps its objects alive, so the cache is kept small
+        if len(_contributions) > ContributionCacheSize:
+            _contributions.popitem(last=False)
+    else:
+        _contributions.move_to_end(cache_key)
+    return rtn
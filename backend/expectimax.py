@@ -0,0 +1,103 @@
+# Copyright (C) 2023, Bank of America.  The file below is licensed to LSC for use with HSoF.  All other rights are reserved.
+"""This file defines the expectimax evaluation that the AI player uses when the game is created with ai_search='expectimax'.
+The other AI searches score a combination of options at the end of the stage as if no more random events happened in the stage,
+because the random events of the later turns of the stage are not drawn yet (see Prosperville.__simulate_for_ai).
+The expectimax evaluation scores a combination with every possible draw of those random events (an outcome) instead,
+and weights the scores with the probabilities of the outcomes. The AI then picks the combination with the best expected score.
+
+The random events of the stage's random event turns are drawn independently, each with the stage's random event probabilities.
+A stage with k random event turns that are not drawn yet and m random events has m to the power of k outcomes.
+The evaluation is kept fast in two ways:
+1. the combination is simulated once without the undrawn random events. This simulation is shared by all outcomes up to the first undrawn random event.
+2. the periods from the first undrawn random event onwards are computed for all outcomes at once, one row per outcome (see backend.simkernel.derive_branch_scores).
+   The effect of each random event on each turn is gathered once per turn and shared by all combinations.
+
+Learning tip:
+What is expectimax?
+See: https://en.wikipedia.org/wiki/Expectiminimax
+"""
+
+import numpy as np
+from itertools import product
+from math import prod
+
+class Expectimax:
+    """Computes the expected end-of-stage score of a player over the random events of the stage that are not drawn yet"""
+
+    def __init__(self, branch_objs, probabilities, period_start, period_score):
+        """Computes the expected end-of-stage score of a player over the random events of the stage that are not drawn yet
+
+        Input Arguments
+        ---------------
+        branch_objs:    required list (one element per random event turn that is not drawn yet) of lists (one element per random event that can be drawn)
+                        of the lists of backend objects the random event adds in that turn
+        probabilities:  required list (one element per random event turn that is not drawn yet) of lists of the probability of each random event
+        period_start:   required int. The first period of the earliest random event turn that is not drawn yet. The outcomes are the same before it.
+        period_score:   required int. The simulation period at which the score is compared (the end of the stage).
+        """
+        from backend.simkernel import SumColumns, gather_period_arrays
+
+        self.period_start = period_start
+        self.period_score = period_score
+        n_periods = period_score - period_start + 1
+
+        # the effect of each random event in each turn, gathered once. Events that cannot be drawn are left out
+        turn_effects = []
+        for crntObjs, crntProbs in zip(branch_objs, probabilities):
+            turn_effects.append([(p, gather_period_arrays(o, period_start, period_score)) for o, p in zip(crntObjs, crntProbs) if p > 0])
+
+        # an outcome is one random event for every turn. Its probability is the product of the probabilities of its events
+        outcomes = list(product(*turn_effects))
+        self.probabilities = np.array([prod(c[0] for c in crntOutcome) for crntOutcome in outcomes])
+        # what each outcome adds to the summed columns, and the adjustment ratio it multiplies. One row per outcome
+        self.delta = {c: np.zeros((len(outcomes), n_periods)) for c in SumColumns + ['annual_salary']}
+        self.adj_ratio = np.ones((len(outcomes), n_periods))
+        for iOutcome, crntOutcome in enumerate(outcomes):
+            for _, crntCols in crntOutcome:
+                for c in self.delta:
+                    self.delta[c][iOutcome] += crntCols[c]
+                self.adj_ratio[iOutcome] *= crntCols['adj_ratio']
+
+    @property
+    def n_outcomes(self):
+        """gets the number of outcomes (draws of the random events) each player is evaluated with"""
+        return len(self.probabilities)
+
+    def evaluate(self, player):
+        """Returns a tuple of (probability of bankruptcy, expected score at the end of the stage) for a player
+        that is simulated to the end of the stage without the random events that are not drawn yet."""
+        from backend.player import Checkpoint
+        from backend.simkernel import gather_period_arrays, derive_branch_scores
+
+        if player.bankrupt and player.bankrupt_period < self.period_start:
+            # bankrupt before any undrawn random event can happen. Every outcome is the same
+            return 1.0, float(player._score_table['score'][player.bankrupt_period])
+
+        # the shared simulation: the state before the first undrawn random event, and the player's own objects after it
+        prev = Checkpoint(player._score_table, self.period_start-1)
+        base = gather_period_arrays(player.active_objects(self.period_start, self.period_score), self.period_start, self.period_score, init_adj_ratio=player.score_adj_ratio)
+        cols = {c: base[c] + v for c, v in self.delta.items()}
+        cols['adj_ratio'] = base['adj_ratio'] * self.adj_ratio
+        bankrupt, scores = derive_branch_scores(cols, self.period_start, self.period_score
+                                                , prev_wealth=prev.wealth, prev_debt=prev.debt, prev_asset=prev.asset
+                                                , prev_spd_on_hapns=prev.spd_on_hapns, prev_happiness_sum=prev.happiness_sum)
+        return float(self.probabilities @ bankrupt), float(self.probabilities @ scores)
+
+def pick_best_expected(choices, results):
+    """returns the best of a list of option combinations by their expected results:
+    the lowest probability of bankruptcy first, then the highest expected score. Among equal results, the first one in the list is kept.
+    With probabilities of 0 or 1, this picks the same combination as backend.optimizer.pick_best.
+
+    Input Arguments
+    ---------------
+    choices:    required list of tuples of option indices
+    results:    required list with one element per element of choices. Each element is None if the combination is not feasible,
+                otherwise a tuple of (probability of bankruptcy, expected score)
+    """
+    bestChoice, bestResult = None, None
+    for crntChoice, crntResult in zip(choices, results):
+        if crntResult is None:
+            continue
+        if bestResult is None or crntResult[0] < bestResult[0] or (crntResult[0] == bestResult[0] and crntResult[1] > bestResult[1]):
+            bestChoice, bestResult = crntChoice, crntResult
+    return bestChoice
@@ -6,12 +6,14 @@ from backend.othrbkendobj import BackendObjectBase
 class Expense(BackendObjectBase):
     """Represents an Expense item from an event."""
 
-    def __init__(self, backend_def):
+    def __init__(self, backend_def, schedule=None):
         """Represents an Expense item from an event.
         
-        Input Argument
-        --------------
+        Input Arguments
+        ---------------
         backend_def:    dict of values needed for this class.
+        schedule:       optional schedule table calculated beforehand (eg loaded from the compiled game definitions, see backend/gameartifact.py). 
+                        The table is calculated if it is not given.
         """
 
         from backend._shared import term_2_period, periodic_amount
@@ -29,17 +31,31 @@ class Expense(BackendObjectBase):
             self.rate_freq_n_periods = term_2_period(self.rate_freq, self.rate_freq_unit)
             self.periodic_amt__rate = periodic_amount(self.amt_annual_rate, self.rate_freq_n_periods)
 
-        self.calculate_schedule()
+        if schedule is None:
+            self.calculate_schedule()
+        else:
+            self.schedule = schedule
     
-    def calculate_schedule(self):
+    def calculate_schedule(self, engine='python'):
         """Calculates the schedule table for the life of this expense item.
         
         Each row of the table represents a simulation period. The rows are 0-indexed. 
         To convert to the global simulation period index, add self.start_period to the table row index.
 
         This table has one column whose value is the expense amount for a simulation period.
+
+        Input Argument
+        --------------
+        engine:     optional str. 'python' builds the table one period at a time. 'numpy' uses the array based engine in backend/schedule.py.
         """
 
+        if engine == 'numpy':
+            from backend.schedule import expense_schedule
+            self.schedule = expense_schedule(self)
+            return
+        elif engine != 'python':
+            raise ValueError(f'Unrecognized schedule engine "{engine}".')
+
         from collections import defaultdict
         
         crnt_pay = self.amount
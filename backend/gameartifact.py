@@ -0,0 +1,223 @@
+# Copyright (C) 2023, Bank of America.  The file below is licensed to LSC for use with HSoF.  All other rights are reserved.
+"""This file saves and loads the compiled game definitions (the artifact).
+Loading backend.gameitems processes the stage and event definitions into the step table and the index lists,
+and creates every backend object of the game, which calculates its full schedule one simulation period at a time.
+The artifact keeps the results of this work in one numpy .npz file so that the next process that loads backend.gameitems can skip it:
+    the step table columns
+    the first / last step, turn and period index lists
+    the random event probabilities of each stage
+    the schedule tables of all backend objects, packed into one array
+The event and stage definitions themselves (titles, descriptions, options, and so the dict_events of backend.gameitems) are not saved in the artifact.
+They are Python objects rather than arrays, and loading them from backend/design takes a few milliseconds, so they are still loaded from there.
+
+The artifact is keyed on a hash of the files the compiled values are derived from (see SourceFiles) and on the artifact version (ArtifactVersion).
+When any of them changes, backend.gameitems ignores the artifact and processes the definitions itself, only creating the backend objects the game uses.
+It then warns once that the artifact is missing or out of date (see warn_not_loaded). 
+Loading backend.gameitems never writes the artifact. It is only built (or replaced) by the command below, for example when a deployment is set up
+or after the definitions are changed:
+    python -m backend.gameartifact
+
+Learning tip:
+What is a hash function and how can it tell if a file has changed?
+See: https://en.wikipedia.org/wiki/Cryptographic_hash_function
+"""
+
+import os
+
+# the format version of the artifact. Increase it when the content or the layout of the artifact changes
+ArtifactVersion = 1
+
+# the folder of the backend package
+_backend_folder = os.path.dirname(os.path.abspath(__file__))
+
+# the location of the artifact
+ArtifactPath = os.path.join(_backend_folder, 'design', 'gamedef.npz')
+
+# the files that the compiled values are derived from, relative to the backend folder.
+# the definitions, plus the code that turns them into the step table and the schedules
+SourceFiles = ['design/eventdef.py', 'design/stagedef.py', 'design/__init__.py', 'gameitems.py', 'constraints.py', '_shared.py'
+               , 'loan.py', 'income.py', 'expense.py', 'othrbkendobj.py']
+
+# the index lists of backend.gameitems that are saved in the artifact
+IndexLists = ['last_step_of_stage', 'last_turn_of_stage', 'first_step_of_stage', 'first_turn_of_stage'
+              , 'last_step_of_turn', 'first_step_of_turn', 'first_period_of_turn', 'last_period_of_turn']
+
+def source_hash():
+    """returns the hash (a hex str) of the artifact version and the content of all SourceFiles"""
+    import hashlib
+
+    rtn = hashlib.sha256(f'version {ArtifactVersion}'.encode())
+    for crntFile in SourceFiles:
+        rtn.update(crntFile.encode())
+        with open(os.path.join(_backend_folder, crntFile), 'rb') as f:
+            rtn.update(f.read())
+    return rtn.hexdigest()
+
+def save(step_table, index_lists, rnd_evt_prob, bked_objs, path=ArtifactPath):
+    """Saves the compiled game definitions. The file is replaced in one step, so a process that loads it at the same time never reads a partial file.
+
+    Input Arguments
+    ---------------
+    step_table:     required dictionary of numpy arrays keyed by column name (backend.gameitems.step_table)
+    index_lists:    required dictionary of lists of int keyed by the names in IndexLists
+    rnd_evt_prob:   required dictionary of numpy arrays of random event probabilities keyed by stage name
+    bked_objs:      required dictionary of lists of backend objects keyed by event or option name (backend.gameitems.pvBkEndObj_by_name)
+    path:           optional str. Where to save the artifact.
+    """
+    import json
+    import tempfile
+    import numpy as np
+
+    # the schedule columns of all backend objects are put one after another into one array.
+    # schedule_index tells where each column is: [name, index of the object in the list of the name, column name, first element, number of elements]
+    schedule_index, schedule_values, n_values = [], [], 0
+    for crntName, crntObjs in bked_objs.items():
+        for iObj, crntObj in enumerate(crntObjs):
+            if not hasattr(crntObj, 'schedule'): # eg HappinessAdjustmentRatio has no schedule
+                continue
+            for crntCol, crntValues in crntObj.schedule.items():
+                schedule_index.append([crntName, iObj, crntCol, n_values, len(crntValues)])
+                schedule_values.append(np.asarray(crntValues, dtype=float))
+                n_values += len(crntValues)
+
+    meta = {'version': ArtifactVersion, 'hash': source_hash()
+            , 'index_lists': {c: [int(v) for v in index_lists[c]] for c in IndexLists}
+            , 'step_columns': list(step_table.keys())
+            , 'rnd_evt_prob': {k: [float(c) for c in v] for k, v in rnd_evt_prob.items()}
+            , 'schedule_index': schedule_index}
+    arrays = {'meta': np.array(json.dumps(meta))
+              , 'schedules': np.concatenate(schedule_values) if schedule_values else np.zeros(0)}
+    for crntCol, crntValues in step_table.items():
+        arrays['step_' + crntCol] = crntValues
+
+    # write to a temporary file in the same folder, then move it over the artifact
+    fd, tmp_path = tempfile.mkstemp(suffix='.npz', dir=os.path.dirname(path))
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            np.savez(f, **arrays)
+        # the temporary file is only readable by its owner. Let other processes (eg other users' kernels) read the artifact too
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+def load(path=ArtifactPath):
+    """Loads the compiled game definitions. Returns None if there is no artifact, or if it was compiled from different definitions or by a different version.
+    Otherwise, returns a dictionary with
+        step_table:     dictionary of numpy arrays keyed by column name
+        index_lists:    dictionary of lists of int keyed by the names in IndexLists
+        rnd_evt_prob:   dictionary of numpy arrays keyed by stage name
+        schedules:      CompiledSchedules object that gives the schedule table of a backend object by (event or option name, index of the object in the list of the name)
+    """
+    import json
+    import numpy as np
+
+    if not os.path.exists(path):
+        return None
+    try:
+        with np.load(path, allow_pickle=False) as f:
+            meta = json.loads(str(f['meta']))
+            if meta['version'] != ArtifactVersion or meta['hash'] != source_hash():
+                return None
+            step_table = {c: f['step_' + c] for c in meta['step_columns']}
+            all_values = f['schedules']
+    except (OSError, ValueError, KeyError):
+        # an unreadable artifact is treated as a missing one. It is replaced when the artifact is built again (see build)
+        return None
+
+    return {'step_table': step_table
+            , 'index_lists': meta['index_lists']
+            , 'rnd_evt_prob': {k: np.array(v) for k, v in meta['rnd_evt_prob'].items()}
+            , 'schedules': CompiledSchedules(meta['schedule_index'], all_values)}
+
+class CompiledSchedules:
+    """Represents the schedule tables saved in the artifact. A table is only unpacked when it is read, 
+    so that the schedules of backend objects that are never created are never unpacked."""
+
+    def __init__(self, schedule_index, values):
+        """Represents the schedule tables saved in the artifact
+
+        Input Arguments
+        ---------------
+        schedule_index: required list of [name, index of the object in the list of the name, column name, first element, number of elements]
+        values:         required numpy array of the columns of all schedule tables, one after another
+        """
+        # where the columns of each table are, by (name, index of the object in the list of the name)
+        self.__index = dict()
+        for crntName, iObj, crntCol, iStart, n_values in schedule_index:
+            self.__index.setdefault((crntName, iObj), []).append((crntCol, iStart, n_values))
+        self.__values = values
+
+    def __contains__(self, key):
+        return key in self.__index
+
+    def get(self, key):
+        """returns the schedule table of the backend object identified by key = (name, index of the object in the list of the name), or None if it is not saved.
+        The table is a dictionary of lists of float keyed by column name, the same as the one the object calculates."""
+        from collections import defaultdict
+
+        if key not in self.__index:
+            return None
+        rtn = defaultdict(list)
+        for crntCol, iStart, n_values in self.__index[key]:
+            # the objects calculate their schedules as lists of Python floats. tolist gives back exactly the same values
+            rtn[crntCol] = self.__values[iStart:(iStart+n_values)].tolist()
+        return rtn
+
+def warn_not_loaded(path=ArtifactPath):
+    """warns that the artifact could not be loaded, so the definitions are processed at startup, and names the command that builds it.
+    backend.gameitems calls it when it is loaded, so the warning is given once per process."""
+    import warnings
+
+    state = 'missing' if not os.path.exists(path) else 'out of date'
+    warnings.warn(f'The compiled game definitions {path} are {state}, so they are processed at startup, which is slower. '
+                  'Run "python -m backend.gameartifact" to build them.', stacklevel=2)
+
+def main(args=None):
+    """the command line entry point. Run "python -m backend.gameartifact --help" for the arguments."""
+    import argparse
+
+    parser = argparse.ArgumentParser(prog='python -m backend.gameartifact', description='Compiles the Prosperville game definitions into an artifact that speeds up loading the game.')
+    parser.add_argument('--check', action='store_true', help='only report if the artifact is up to date')
+    args = parser.parse_args(args)
+
+    is_current = load() is not None
+    if args.check:
+        print(f'{ArtifactPath} is {"up to date" if is_current else "missing or out of date"}.')
+        return
+    build()
+    print(f'Saved {ArtifactPath} ({source_hash()[:12]}).')
+
+def build(path=ArtifactPath):
+    """Processes the game definitions, calculates the schedules of all backend objects and saves them as the artifact.
+    Raises OSError if the artifact cannot be written, before any definition is processed.
+
+    Input Arguments
+    ---------------
+    path:           optional str. Where to save the artifact.
+    """
+    # check that the folder is writable first, since processing the definitions is the slow part
+    if not os.access(os.path.dirname(path), os.W_OK):
+        raise OSError(f'The artifact folder {os.path.dirname(path)} is not writable.')
+
+    # the artifact is ignored if it exists, so that backend.gameitems processes the definitions instead of loading them
+    if os.path.exists(path):
+        os.remove(path)
+    import warnings
+    with warnings.catch_warnings():
+        # backend.gameitems warns that the artifact is missing, which is expected here
+        warnings.simplefilter('ignore')
+        import backend.gameitems as gameitems
+    # calculate the schedules of all backend objects, then save them with the step table and the index lists
+    gameitems.pvBkEndObj_by_name.prewarm()
+    save(gameitems.step_table
+         , {c: getattr(gameitems, c) for c in IndexLists}
+         , {c.name: c.backend['rnd_evt_prob'] for c in gameitems.pvStages if c.n_random_event_turn != 0}
+         , gameitems.pvBkEndObj_by_name
+         , path=path)
+    if load(path) is None:
+        raise Exception(f'The artifact could not be saved to {path}.')
+
+if __name__ == '__main__':
+    main()
@@ -4,6 +4,7 @@ The step table is also created here. The script also creates backend objects tha
 import math
 import numpy as np
 from collections import defaultdict
+from collections.abc import Mapping
 
 from backend.design import NPeriodsPerMonth
 # load the event definitions as a list
@@ -12,118 +13,143 @@ from backend.design.eventdef import pvEvents
 from backend.design.stagedef import pvStages
 
 
-# tables that show the first / last step (list element) of a given turn / stage (list index)
-last_step_of_stage, last_turn_of_stage, first_step_of_stage, first_turn_of_stage = [0]*len(pvStages), [0]*len(pvStages),[0]*len(pvStages),[0]*len(pvStages)
-last_step_of_turn, first_step_of_turn = [], []
-
-# step table that shows how step, stage, turn, event and simulation period are mapped
-step_table = defaultdict(list)
-itrn, istp = 0, 0
-preGameAge = pvStages[0].init_age - 1
-for istg in range(len(pvStages)):
-    first_step_of_stage[istg], first_turn_of_stage[istg] = istp, itrn
-    first_step_of_turn.append(istp)
-    crntStageDef = pvStages[istg]
-    pFrist = (crntStageDef.init_age-preGameAge-1)*NPeriodsPerMonth*12
-    pLast = (crntStageDef.end_age-preGameAge)*NPeriodsPerMonth*12 - 1
+# load the compiled game definitions (see backend/gameartifact.py). It is None if the definitions need to be processed.
+# loading never builds the artifact: the backend objects stay lazy, and the artifact is only built by "python -m backend.gameartifact"
+import backend.gameartifact as gameartifact
+compiled = gameartifact.load()
+if compiled is None:
+    gameartifact.warn_not_loaded()
+
+if compiled is not None:
+    # take the step table and the index lists from the compiled game definitions
+    step_table = compiled['step_table']
+    last_step_of_stage, last_turn_of_stage, first_step_of_stage, first_turn_of_stage, last_step_of_turn, first_step_of_turn, first_period_of_turn, last_period_of_turn = \
+        [compiled['index_lists'][c] for c in gameartifact.IndexLists]
+else:
+    # tables that show the first / last step (list element) of a given turn / stage (list index)
+    last_step_of_stage, last_turn_of_stage, first_step_of_stage, first_turn_of_stage = [0]*len(pvStages), [0]*len(pvStages),[0]*len(pvStages),[0]*len(pvStages)
+    last_step_of_turn, first_step_of_turn = [], []
+
+    # step table that shows how step, stage, turn, event and simulation period are mapped
+    step_table = defaultdict(list)
+    itrn, istp = 0, 0
+    preGameAge = pvStages[0].init_age - 1
+    for istg in range(len(pvStages)):
+        first_step_of_stage[istg], first_turn_of_stage[istg] = istp, itrn
+        first_step_of_turn.append(istp)
+        crntStageDef = pvStages[istg]
+        pFrist = (crntStageDef.init_age-preGameAge-1)*NPeriodsPerMonth*12
+        pLast = (crntStageDef.end_age-preGameAge)*NPeriodsPerMonth*12 - 1
     
-    # if no events, usually the last stage
-    if len(pvStages[istg].life_event_seq) == 0:
-        step_table['stage'].append(istg)
-        step_table['turn'].append(itrn)
-        step_table['ievent_in_stage'].append(0)
-        step_table['stage_name'].append(crntStageDef.name)
-        step_table['event_name'].append('')
-        step_table['period_first'].append(pFrist)
-        step_table['period_sim_last'].append(0)
-        step_table['period_last'].append(pLast)
-        step_table['is_random_event_step'].append(False)
-        step_table['is_last_turn_of_stage'].append(False)
-        step_table['is_last_step_of_stage'].append(False)
-        last_step_of_stage[istg], last_turn_of_stage[istg] = istp, itrn
-        last_step_of_turn.append(istp)
-
-        istp += 1
-
-    # if stage has events
-    for iCrntEvDef in range(len(pvStages[istg].life_event_seq)):
-        crntEvtNm = crntStageDef.life_event_seq[iCrntEvDef]
-        step_table['stage'].append(istg)
-        step_table['turn'].append(itrn)
-        step_table['ievent_in_stage'].append(iCrntEvDef)
-        step_table['stage_name'].append(crntStageDef.name)
-        step_table['event_name'].append(crntEvtNm)
-        step_table['period_first'].append(pFrist)
-        step_table['period_sim_last'].append(0)
-        step_table['period_last'].append(pLast)
+        # if no events, usually the last stage
+        if len(pvStages[istg].life_event_seq) == 0:
+            step_table['stage'].append(istg)
+            step_table['turn'].append(itrn)
+            step_table['ievent_in_stage'].append(0)
+            step_table['stage_name'].append(crntStageDef.name)
+            step_table['event_name'].append('')
+            step_table['period_first'].append(pFrist)
+            step_table['period_sim_last'].append(0)
+            step_table['period_last'].append(pLast)
+            step_table['is_random_event_step'].append(False)
+            step_table['is_last_turn_of_stage'].append(False)
+            step_table['is_last_step_of_stage'].append(False)
+            last_step_of_stage[istg], last_turn_of_stage[istg] = istp, itrn
+            last_step_of_turn.append(istp)
+
+            istp += 1
+
+        # if stage has events
+        for iCrntEvDef in range(len(pvStages[istg].life_event_seq)):
+            crntEvtNm = crntStageDef.life_event_seq[iCrntEvDef]
+            step_table['stage'].append(istg)
+            step_table['turn'].append(itrn)
+            step_table['ievent_in_stage'].append(iCrntEvDef)
+            step_table['stage_name'].append(crntStageDef.name)
+            step_table['event_name'].append(crntEvtNm)
+            step_table['period_first'].append(pFrist)
+            step_table['period_sim_last'].append(0)
+            step_table['period_last'].append(pLast)
         
 
-        if crntStageDef.n_random_event_turn < 0:
-            raise Exception(f'In stage definition for "{crntStageDef.name}", n_random_event_turn should be non-negative.')
+            if crntStageDef.n_random_event_turn < 0:
+                raise Exception(f'In stage definition for "{crntStageDef.name}", n_random_event_turn should be non-negative.')
         
-        # last life stage event of the current stage
-        if crntEvtNm == crntStageDef.life_event_seq[-1]: 
-            last_step_of_turn.append(istp)
-            # if the stage has random event turns
-            if crntStageDef.n_random_event_turn!= 0:
-                if crntStageDef.random_event is None or len(crntStageDef.random_event)==0:
-                    raise Exception(f'In stage definition for "{crntStageDef.name}", random_event is not defined even though n_random_event_turn!=0')
-                if crntStageDef.rand_event_weight is None or len(crntStageDef.rand_event_weight) != len(crntStageDef.random_event):
-                    raise Exception(f'In stage definition for "{crntStageDef.name}", the number of elements in rand_event_weight and random_event is not consistent.')
-                # finish the current turn
-                step_table['is_random_event_step'].append(False)
-                step_table['is_last_turn_of_stage'].append(False)
-                step_table['is_last_step_of_stage'].append(False)
-                prlen = (pLast - pFrist + 1) / (crntStageDef.n_random_event_turn+1)
-                # add new random event turns
-                for ir in range(crntStageDef.n_random_event_turn):
-                    # add a new step for the random event card turn
-                    itrn += 1; istp += 1
-                    step_table['stage'].append(istg)
-                    step_table['turn'].append(itrn)
-                    step_table['ievent_in_stage'].append(ir)
-                    step_table['stage_name'].append(crntStageDef.name)
-                    step_table['event_name'].append('')
-                    step_table['period_first'].append(math.ceil(prlen*(ir+1)+pFrist-1))
-                    step_table['period_sim_last'].append(0)
-                    step_table['period_last'].append(math.ceil(prlen*(ir+2)+pFrist-1))
-                    step_table['is_random_event_step'].append(True)
+            # last life stage event of the current stage
+            if crntEvtNm == crntStageDef.life_event_seq[-1]: 
+                last_step_of_turn.append(istp)
+                # if the stage has random event turns
+                if crntStageDef.n_random_event_turn!= 0:
+                    if crntStageDef.random_event is None or len(crntStageDef.random_event)==0:
+                        raise Exception(f'In stage definition for "{crntStageDef.name}", random_event is not defined even though n_random_event_turn!=0')
+                    if crntStageDef.rand_event_weight is None or len(crntStageDef.rand_event_weight) != len(crntStageDef.random_event):
+                        raise Exception(f'In stage definition for "{crntStageDef.name}", the number of elements in rand_event_weight and random_event is not consistent.')
+                    # finish the current turn
+                    step_table['is_random_event_step'].append(False)
+                    step_table['is_last_turn_of_stage'].append(False)
+                    step_table['is_last_step_of_stage'].append(False)
+                    prlen = (pLast - pFrist + 1) / (crntStageDef.n_random_event_turn+1)
+                    # add new random event turns
+                    for ir in range(crntStageDef.n_random_event_turn):
+                        # add a new step for the random event card turn
+                        itrn += 1; istp += 1
+                        step_table['stage'].append(istg)
+                        step_table['turn'].append(itrn)
+                        step_table['ievent_in_stage'].append(ir)
+                        step_table['stage_name'].append(crntStageDef.name)
+                        step_table['event_name'].append('')
+                        step_table['period_first'].append(math.ceil(prlen*(ir+1)+pFrist-1))
+                        step_table['period_sim_last'].append(0)
+                        step_table['period_last'].append(math.ceil(prlen*(ir+2)+pFrist-1))
+                        step_table['is_random_event_step'].append(True)
                 
-                    last_step_of_turn.append(istp)
-                    first_step_of_turn.append(istp)
+                        last_step_of_turn.append(istp)
+                        first_step_of_turn.append(istp)
 
-                    step_table['is_last_turn_of_stage'].append(ir == crntStageDef.n_random_event_turn-1)
-                    step_table['is_last_step_of_stage'].append(ir == crntStageDef.n_random_event_turn-1)
+                        step_table['is_last_turn_of_stage'].append(ir == crntStageDef.n_random_event_turn-1)
+                        step_table['is_last_step_of_stage'].append(ir == crntStageDef.n_random_event_turn-1)
                 
-            else:
-                step_table['is_last_turn_of_stage'].append(True)
-                step_table['is_last_step_of_stage'].append(True)
-            last_step_of_stage[istg], last_turn_of_stage[istg] = istp, itrn
+                else:
+                    step_table['is_last_turn_of_stage'].append(True)
+                    step_table['is_last_step_of_stage'].append(True)
+                last_step_of_stage[istg], last_turn_of_stage[istg] = istp, itrn
             
-        else: # if the current life stage event is not the last of its stage
-            step_table['is_random_event_step'].append(False) # random event turn is always the last turns of a stage
-            step_table['is_last_turn_of_stage'].append(False)
-            step_table['is_last_step_of_stage'].append(False)
+            else: # if the current life stage event is not the last of its stage
+                step_table['is_random_event_step'].append(False) # random event turn is always the last turns of a stage
+                step_table['is_last_turn_of_stage'].append(False)
+                step_table['is_last_step_of_stage'].append(False)
             
-        istp += 1
+            istp += 1
     
-    itrn += 1
-
-# find the first and last simulation periods for each turn
-first_period_of_turn = [0] * len(first_step_of_turn)
-last_period_of_turn = [0] * len(first_step_of_turn)
-for iRefTurn in range(1, len(last_step_of_turn)):
-    first_period_of_turn[iRefTurn] = step_table['period_first'][first_step_of_turn[iRefTurn]]
-    last_period_of_turn[iRefTurn-1] = step_table['period_first'][first_step_of_turn[iRefTurn]] - 1
-    # update period_sim_last column in the step table
-    for istp in range(first_step_of_turn[iRefTurn - 1], last_step_of_turn[iRefTurn - 1]+1):
-        step_table['period_sim_last'][istp] = step_table['period_first'][first_step_of_turn[iRefTurn]] - 1
-step_table['period_sim_last'][-1] = step_table['period_last'][-1]
-last_period_of_turn[-1] = step_table['period_last'][-1]
+        itrn += 1
+
+    # find the first and last simulation periods for each turn
+    first_period_of_turn = [0] * len(first_step_of_turn)
+    last_period_of_turn = [0] * len(first_step_of_turn)
+    for iRefTurn in range(1, len(last_step_of_turn)):
+        first_period_of_turn[iRefTurn] = step_table['period_first'][first_step_of_turn[iRefTurn]]
+        last_period_of_turn[iRefTurn-1] = step_table['period_first'][first_step_of_turn[iRefTurn]] - 1
+        # update period_sim_last column in the step table
+        for istp in range(first_step_of_turn[iRefTurn - 1], last_step_of_turn[iRefTurn - 1]+1):
+            step_table['period_sim_last'][istp] = step_table['period_first'][first_step_of_turn[iRefTurn]] - 1
+    step_table['period_sim_last'][-1] = step_table['period_last'][-1]
+    last_period_of_turn[-1] = step_table['period_last'][-1]
+
+    # turn each column of the step table into a numpy array
+    step_table = {c: np.array(v) for c, v in step_table.items()}
+
+# freeze the step table. Its columns become read-only numpy arrays that are shared by all games.
+# a game reads the table through a backend.steptable.StepTable, which keeps the cells the game writes (the drawn random events) separately
+for crntCol in step_table.values():
+    crntCol.flags.writeable = False
 
 # a dictionary of events by their name
 dict_events = {c.name:c for c in pvEvents}
 
+# the options that cannot be chosen together, compiled into bit masks (see backend/constraints.py)
+from backend.constraints import OptionConstraints
+option_constraints = OptionConstraints(pvEvents)
+
 # add a mapping table to go from stage name to stage definition object
 dict_stages = dict()
 for crntStage in pvStages:
@@ -134,44 +160,122 @@ for crntStage in pvStages:
     for crntRndEvtNm in crntStage.random_event:
         if crntRndEvtNm not in dict_events:
             raise Exception(f'Random event name "{crntRndEvtNm}" is not defined in backend/design/eventdef.py for stage "{crntStage.name}"')
-    total_weight = sum(crntStage.rand_event_weight)
-    crntStage.backend['rnd_evt_prob'] = np.array([c/total_weight for c in crntStage.rand_event_weight])
+    if compiled is not None:
+        crntStage.backend['rnd_evt_prob'] = compiled['rnd_evt_prob'][crntStage.name]
+    else:
+        total_weight = sum(crntStage.rand_event_weight)
+        crntStage.backend['rnd_evt_prob'] = np.array([c/total_weight for c in crntStage.rand_event_weight])
+
+# the columns of the choice table that are the same for all players (see choice_table_base). They are made when they are first used
+_choice_table_base = None
+
+def choice_table_base():
+    """Returns the columns of the choice table (see backend.player.Player.choice_table) that do not depend on the player as a dictionary of numpy arrays: 
+    istage, iturn, Stage, Turn, Random and Event (the event titles without the random events, which are added as they are drawn).
+    The columns are made once because all games share the step table. The arrays must not be changed."""
+    global _choice_table_base
+
+    if _choice_table_base is None:
+        # the content is already in the step table. we are just repackaging it
+        rtn = {'istage': np.array(step_table['stage']), 'iturn': np.array(step_table['turn'])
+               , 'Stage': np.array([dict_stages[c].title for c in step_table['stage_name']], dtype=object)
+               , 'Turn': np.array(step_table['turn'])+1
+               , 'Random': np.where(step_table['is_random_event_step'], 'Yes', 'No').astype(object)
+               , 'Event': np.array([dict_events[c].title if c != '' else '' for c in step_table['event_name']], dtype=object)}
+        for crntCol in rtn.values():
+            crntCol.flags.writeable = False
+        _choice_table_base = rtn
+    return _choice_table_base
 
 # create backend objects. Here we use a dictionary to map the backend object type defined in the event defition to its corresponding backend object class.
 from backend import Loan, Salary, Asset, Expense, HappinessAdjustmentRatio
 bked_obj_map = {'salary':Salary, 'loan':Loan, 'expense':Expense, 'asset':Asset, 'har':HappinessAdjustmentRatio}
-# this dictionary has all the backend objects. The dictionary is organized by the event names. 
-# Under each event name, there is a list of backend objects that are associated with the event.
-pvBkEndObj_by_name = dict()
-# this helper function converts a backend object definition (=backend_def) to backend object, 
-# then save it to backend_def under the key that equals input argument name.
-def __instantiate_backend_objects(name, backend_def):
-    if backend_def is None:
-        return
-    if isinstance(backend_def, dict):
-        lst_obj = [backend_def]
-    elif isinstance(backend_def, list):
-        lst_obj = backend_def
-    else:
-        raise Exception('Backend object type can only be dict or list for defition named "{}"')
-    rtn_list = []
-    for crntDef in lst_obj:
-        # instantiates the backend object, then add to the list. 
-        # Note that "bked_obj_map[crntDef['type']]"" part of the line returns a class according to the type defined in crntDef
-        # and "(crntDef)" part of the line instantiates the class.
-        rtn_list.append(bked_obj_map[crntDef['type']](crntDef))
-    pvBkEndObj_by_name[name] = rtn_list
 
+class LazyBackendObjectMap(Mapping):
+    """Represents the backend objects of all events and options, organized by the event or option names. 
+    Under each name, there is a list of backend objects that are associated with the event or option.
+    It is read like a dictionary, but the backend objects of a name are only created (and their schedules calculated) the first time the name is read.
+    A game therefore only pays for the events and options it reaches. Call prewarm to create the objects ahead of time, eg when a server starts."""
+
+    def __init__(self):
+        # the backend object definitions by name
+        self.__defs = dict()
+        # the backend objects created so far by name
+        self.__objs = dict()
+
+    def define(self, name, backend_def):
+        """Adds the backend object definition of an event or option. The objects are created when the name is first read.
+
+        Input Arguments
+        ---------------
+        name:           required str. Name of the event or option.
+        backend_def:    required dict or list of dict. The backend field of the event or option definition.
+        """
+        if not isinstance(backend_def, (dict, list)):
+            raise Exception(f'Backend object type can only be dict or list for defition named "{name}"')
+        self.__defs[name] = backend_def
+
+    def __getitem__(self, name):
+        if name not in self.__objs:
+            self.__objs[name] = self.__instantiate(name)
+        return self.__objs[name]
+
+    def __contains__(self, name):
+        return name in self.__defs
+
+    def __iter__(self):
+        return iter(self.__defs)
+
+    def __len__(self):
+        return len(self.__defs)
+
+    @property
+    def n_created(self):
+        """gets the number of names whose backend objects have been created"""
+        return len(self.__objs)
+
+    def prewarm(self, names=None):
+        """Creates the backend objects ahead of time.
+
+        Input Argument
+        --------------
+        names:  optional list of event or option names. Defaults to all names.
+        """
+        for crntName in (self.__defs if names is None else names):
+            self[crntName]
+
+    def __instantiate(self, name):
+        """converts the backend object definition of a name to a list of backend objects"""
+        backend_def = self.__defs[name]
+        if isinstance(backend_def, dict):
+            lst_obj = [backend_def]
+        else:
+            lst_obj = backend_def
+        rtn_list = []
+        for crntDef in lst_obj:
+            # instantiates the backend object, then add to the list. 
+            # Note that "bked_obj_map[crntDef['type']]"" part of the line returns a class according to the type defined in crntDef
+            # and "(crntDef)" part of the line instantiates the class.
+            # the schedule of the object is taken from the compiled game definitions if they are loaded. Otherwise, the object calculates it
+            schedule = None if compiled is None else compiled['schedules'].get((name, len(rtn_list)))
+            if schedule is None:
+                rtn_list.append(bked_obj_map[crntDef['type']](crntDef))
+            else:
+                rtn_list.append(bked_obj_map[crntDef['type']](crntDef, schedule=schedule))
+            rtn_list[-1].key = (name, len(rtn_list)-1)
+        return rtn_list
+
+# this dictionary has all the backend objects. See LazyBackendObjectMap
+pvBkEndObj_by_name = LazyBackendObjectMap()
 for crntEvtDef in pvEvents:
     if crntEvtDef.backend is not None:
         if crntEvtDef.name in pvBkEndObj_by_name:
             raise Exception(f'Event name "{crntEvtDef.name}" is shared with another object. This is likely caused by an event definition and an option definition share a same name.')
-        __instantiate_backend_objects(crntEvtDef.name, crntEvtDef.backend)
+        pvBkEndObj_by_name.define(crntEvtDef.name, crntEvtDef.backend)
     if crntEvtDef.options is not None and len(crntEvtDef.options)!=0:
         # if current event has options, then loop through each option definition
         for crntOptionDef in crntEvtDef.options:
             if crntOptionDef.name in pvBkEndObj_by_name:
                 raise Exception(f'Option name "{crntOptionDef.name}" is shared with another object. This is likely caused by an event definition and an option definition share a same name.')
-            __instantiate_backend_objects(crntOptionDef.name, crntOptionDef.backend)
-
-
+            if crntOptionDef.backend is not None:
+                pvBkEndObj_by_name.define(crntOptionDef.name, crntOptionDef.backend)
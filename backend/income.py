@@ -6,12 +6,14 @@ from backend.othrbkendobj import BackendObjectBase
 class Salary(BackendObjectBase):
     """Represents Salary provided by an event."""
 
-    def __init__(self, backend_def):
+    def __init__(self, backend_def, schedule=None):
         """Represents Salary provided by an event.
         
-        Input Argument
-        --------------
+        Input Arguments
+        ---------------
         backend_def:    dict of values needed for this class.
+        schedule:       optional schedule table calculated beforehand (eg loaded from the compiled game definitions, see backend/gameartifact.py). 
+                        The table is calculated if it is not given.
         """
 
         from backend._shared import periodic_amount
@@ -23,17 +25,31 @@ class Salary(BackendObjectBase):
 
         self.pay_check = round(periodic_amount(self.amount, backend_def['pay_freq_n_periods'], amt_quote_term=backend_def['amt_quote_term']),2)
 
-        self.calculate_schedule()
+        if schedule is None:
+            self.calculate_schedule()
+        else:
+            self.schedule = schedule
         
-    def calculate_schedule(self):
+    def calculate_schedule(self, engine='python'):
         """Calculates the schedule table for the life of the salary.
 
         Each row of the table represents a simulation period. The rows are 0-indexed. 
         To convert to the global simulation period index, add self.start_period to the table row index.
 
         This table has one column whose value is the amount the salary pays out in a simulation period.
+
+        Input Argument
+        --------------
+        engine:     optional str. 'python' builds the table one period at a time. 'numpy' uses the array based engine in backend/schedule.py.
         """
 
+        if engine == 'numpy':
+            from backend.schedule import salary_schedule
+            self.schedule = salary_schedule(self)
+            return
+        elif engine != 'python':
+            raise ValueError(f'Unrecognized schedule engine "{engine}".')
+
         paysch = defaultdict(list)
         # loop through each simulation period
         for iPeriod in range(self.n_periods):
@@ -50,12 +66,14 @@ class Salary(BackendObjectBase):
 class Asset(BackendObjectBase):
     """Represents a piece of asset provided by an event."""
 
-    def __init__(self, backend_def):
+    def __init__(self, backend_def, schedule=None):
         """Represents a piece of asset provided by an event.
         
-        Input Argument
-        --------------
+        Input Arguments
+        ---------------
         backend_def:    dict of values needed for this class.
+        schedule:       optional schedule table calculated beforehand (eg loaded from the compiled game definitions, see backend/gameartifact.py). 
+                        The table is calculated if it is not given.
         """
 
         from backend._shared import periodic_amount
@@ -78,9 +96,12 @@ class Asset(BackendObjectBase):
         else:
             self.recurring_n_periods, self.recurring_end_period = 0, 0
 
-        self.calculate_schedule()
+        if schedule is None:
+            self.calculate_schedule()
+        else:
+            self.schedule = schedule
     
-    def calculate_schedule(self):
+    def calculate_schedule(self, engine='python'):
         """Calculates the schedule table for the life of this asset.
         
         Each row of the table represents a simulation period. The rows are 0-indexed. 
@@ -92,8 +113,19 @@ class Asset(BackendObjectBase):
         appreciation:           the appreciation value that occurred during the simulation period
         total_appreciation:     the total appreciation value up to a a period
         pay:                    the amount of cash the asset pays in a simulation period
+
+        Input Argument
+        --------------
+        engine:     optional str. 'python' builds the table one period at a time. 'numpy' uses the array based engine in backend/schedule.py.
         """
 
+        if engine == 'numpy':
+            from backend.schedule import asset_schedule
+            self.schedule = asset_schedule(self)
+            return
+        elif engine != 'python':
+            raise ValueError(f'Unrecognized schedule engine "{engine}".')
+
         # calculate the income schedule
         paysch = defaultdict(list)
         bal_init, bal_end, tot_app = self.amount, self.amount, 0
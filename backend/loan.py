@@ -5,12 +5,14 @@ from backend.othrbkendobj import BackendObjectBase
 class Loan(BackendObjectBase):
     """Represents loan provided by an event that requires fixed amount of payment over a the life of the loan."""
 
-    def __init__(self, backend_def):
+    def __init__(self, backend_def, schedule=None):
         """Represents loan provided by an event that requires fixed amount of payment over a the life of the loan.
         
-        Input Argument
-        --------------
+        Input Arguments
+        ---------------
         backend_def:    dict of values needed for this class.
+        schedule:       optional schedule table calculated beforehand (eg loaded from the compiled game definitions, see backend/gameartifact.py). 
+                        The table is calculated if it is not given.
         """
 
         from backend._shared import periodic_amount
@@ -32,9 +34,12 @@ class Loan(BackendObjectBase):
             # https://en.wikipedia.org/wiki/Amortization_calculator
             self.periodic_payment_amt = math.ceil(self.amount * self.periodic_rate / (1-(1+self.periodic_rate)**(-self.n_payments))*100)/100.0
         
-        self.calculate_schedule()
+        if schedule is None:
+            self.calculate_schedule()
+        else:
+            self.schedule = schedule
 
-    def calculate_schedule(self):
+    def calculate_schedule(self, engine='python'):
         """Calculates the schedule / amortization table for the life of the loan. 
         
         Each row of the table represents a simulation period. The rows are 0-indexed. 
@@ -48,8 +53,19 @@ class Loan(BackendObjectBase):
         payment_principal:  amount of loan payment that pays down the principal for a simulation period
         interest:           total interest paid up to a simulation period.
         pay:                =payment.
+
+        Input Argument
+        --------------
+        engine:     optional str. 'python' builds the table one period at a time. 'numpy' uses the array based engine in backend/schedule.py.
         """
 
+        if engine == 'numpy':
+            from backend.schedule import loan_schedule
+            self.schedule = loan_schedule(self)
+            return
+        elif engine != 'python':
+            raise ValueError(f'Unrecognized schedule engine "{engine}".')
+
         paysch = defaultdict(list)
         bal_init, bal_end, tot_int = self.amount, self.amount, 0
         # loop through each simulation period
@@ -0,0 +1,99 @@
+# Copyright (C) 2023, Bank of America.  The file below is licensed to LSC for use with HSoF.  All other rights are reserved.
+"""This file defines the latency metrics a game records when it is created with Prosperville(metrics=...).
+The click of the Next button that ends a turn runs the slow phases of the game one after another (see Prosperville.next):
+    score_players:      simulates every surviving human player to the end of the turn
+    rank_players:       ranks the human players by score
+    simulate_for_ai:    searches for the AI player's best choices and simulates the AI player to the end of the stage
+    update_crnt_objs:   moves the game to the next step (and draws the random event of the step if there is one)
+For each such click, the game records how long each phase took, how many periods were simulated in it,
+how long the batch simulation of the human players took, and how many choice combinations the AI search evaluated.
+The records are kept in GameMetrics.records and can also be appended to a JSON lines file, one record per line.
+
+A game without metrics (the default) does not time anything, so the game is not slowed down.
+
+Learning tip:
+What is latency?
+See: https://en.wikipedia.org/wiki/Latency_(engineering)
+"""
+
+from time import perf_counter
+
+class GameMetrics:
+    """Records the latency of the phases of each turn of a game"""
+
+    def __init__(self, log_path=None):
+        """Records the latency of the phases of each turn of a game
+
+        Input Argument
+        --------------
+        log_path:   optional str. Path of a JSON lines file each record is appended to when its turn ends. None keeps the records in memory only.
+        """
+        self.log_path = log_path
+        # one record (a dictionary) per turn that ended, in the order of the game. See begin_turn for the content of a record
+        self.records = []
+        # the record of the turn that is ending, the time its last phase ended and the game it belongs to
+        self.__crnt = None
+        self.__mark, self.__periods = 0.0, 0
+        self.__game = None
+
+    @property
+    def last(self):
+        """gets the record of the last turn that ended, or None if no turn ended yet"""
+        return self.records[-1] if len(self.records) > 0 else None
+
+    def begin_turn(self, game):
+        """starts the record of the turn that is ending. A record is a dictionary with
+            turn, stage, step:  the indices of the turn, stage and step that ended
+            time:               the time the turn ended (seconds since the epoch)
+            total_seconds:      the wall time of the whole click
+            phases:             a dictionary by phase name of {'seconds', 'periods_simulated'}
+            simulate_batch:     {'seconds', 'n_players', 'periods_simulated'} of the simulation of the human players, or None if no player was simulated. 
+                                The players are simulated together in one batch (see Player.simulate_batch), so the time is only known for the whole batch
+            players:            a list with one {'name', 'periods_simulated', 'bankrupt'} per human player simulated in the turn
+            ai_search:          the counts of the AI search (see backend.optimizer.SearchStats), or None if the AI had no options in the turn
+        """
+        import time
+        self.__game = game
+        self.__crnt = {'turn': game.iTurn, 'stage': game.iStage, 'step': game.iStep, 'time': time.time()
+                       , 'total_seconds': 0.0, 'phases': dict(), 'simulate_batch': None, 'players': [], 'ai_search': None}
+        self.__periods = game.sim_stats['periods_simulated']
+        self.__mark = perf_counter()
+
+    @property
+    def in_turn(self):
+        """gets a boolean value that indicates if a turn is being recorded"""
+        return self.__crnt is not None
+
+    def end_phase(self, name):
+        """records the phase that just ended. It started when the previous phase ended (or when the turn began)"""
+        crntTime, crntPeriods = perf_counter(), self.__game.sim_stats['periods_simulated']
+        self.__crnt['phases'][name] = {'seconds': crntTime - self.__mark, 'periods_simulated': crntPeriods - self.__periods}
+        self.__crnt['total_seconds'] += crntTime - self.__mark
+        self.__mark, self.__periods = crntTime, crntPeriods
+
+    def simulate(self, players, period_start, period_end):
+        """simulates the human players between two periods in one batch (see Player.simulate_batch) and records how long the batch took, 
+        and the periods simulated and the bankruptcy of each player"""
+        from backend.player import Player
+
+        crntStart, crntPeriods = perf_counter(), [c.sim_stats['periods_simulated'] for c in players]
+        Player.simulate_batch(players, period_start, period_end)
+        crntSeconds = perf_counter() - crntStart
+        crntPlayers = [{'name': c.name, 'periods_simulated': c.sim_stats['periods_simulated'] - n_periods, 'bankrupt': bool(c.bankrupt)} 
+                       for c, n_periods in zip(players, crntPeriods)]
+        self.__crnt['players'].extend(crntPlayers)
+        self.__crnt['simulate_batch'] = {'seconds': crntSeconds, 'n_players': len(players), 'periods_simulated': sum(c['periods_simulated'] for c in crntPlayers)}
+
+    def ai_searched(self, stats):
+        """records the counts of the AI search of the turn (a backend.optimizer.SearchStats object)"""
+        self.__crnt['ai_search'] = {'candidates': stats.n_candidates, 'evaluated': stats.n_evaluated, 'pruned': stats.n_pruned
+                                    , 'infeasible': stats.n_infeasible, 'outcomes': stats.n_outcomes}
+
+    def end_turn(self):
+        """finishes the record of the turn and appends it to the log file if there is one"""
+        self.records.append(self.__crnt)
+        if self.log_path is not None:
+            import json
+            with open(self.log_path, 'a') as f:
+                f.write(json.dumps(self.__crnt) + '\n')
+        self.__crnt, self.__game = None, None
@@ -0,0 +1,246 @@
+# Copyright (C) 2023, Bank of America.  The file below is licensed to LSC for use with HSoF.  All other rights are reserved.
+"""This file defines the branch-and-bound search that the AI player uses to pick the best combination of options in a turn.
+The brute force search simulates every combination of options. The number of combinations is the product of the number of options of all events in the turn.
+The branch-and-bound search starts from a promising combination, then visits the combinations in the same order as the brute force search,
+but skips a group of combinations (a branch) when an upper bound on the score they can reach is below the best score found so far.
+It finds the same best combination as the brute force search.
+
+The bound relies on two properties of the game:
+1. wealth, monthly happiness spending and the happiness adjustment ratio of a period are built from the backend objects of a player.
+   Wealth and spending are sums of per-object contributions and the adjustment ratio is a product of them.
+   The options of different events in a turn contribute independently, so the best value each event can contribute is known before the other events are decided.
+2. happiness is the sigmoid of wealth plus the tanh of monthly happiness spending, times the adjustment ratio (see Player.__calculate_happiness).
+   It only goes up when any of the three goes up.
+Therefore, taking for each undecided event the highest contribution among its options in every period gives an upper bound of happiness in every period,
+and an upper bound of the score at the end of the stage.
+
+Learning tip:
+What is branch and bound?
+See: https://en.wikipedia.org/wiki/Branch_and_bound
+"""
+
+import numpy as np
+from math import prod
+from backend.design import NPeriodsPerMonth # number of simulation periods in a month
+
+class SearchStats:
+    """Counts how many option combinations the AI search has visited"""
+    def __init__(self):
+        self.n_candidates = 0 # number of option combinations in the turn
+        self.n_evaluated = 0 # number of combinations that were simulated
+        self.n_pruned = 0 # number of combinations that were skipped because their upper bound was below the best known score
+        self.n_infeasible = 0 # number of combinations that cannot be chosen together (eg no college and living in a dorm)
+        self.n_outcomes = 1 # number of draws of the undrawn random events each combination was scored with. More than 1 only for the expectimax search
+
+    def __repr__(self):
+        return f'SearchStats(candidates={self.n_candidates}, evaluated={self.n_evaluated}, pruned={self.n_pruned}, infeasible={self.n_infeasible}, outcomes={self.n_outcomes})'
+
+def contributions(cols, prev_spd_on_hapns=[]):
+    """Turns the per-period arrays from backend.simkernel.gather_period_arrays into the contribution of a group of backend objects
+    to wealth, monthly happiness spending and the happiness adjustment ratio of every period.
+
+    Input Arguments
+    ---------------
+    cols:               a dictionary returned by backend.simkernel.gather_period_arrays
+    prev_spd_on_hapns:  optional list of happiness spending in the periods right before the first period of cols
+
+    Output Argument
+    ---------------
+    a tuple of three numpy arrays: (wealth, monthly happiness spending, happiness adjustment ratio)
+    """
+    # wealth is the running net income minus debt plus asset. See backend.simkernel.derive_score_arrays
+    wealth = np.cumsum(cols['income'] - cols['spending']) - cols['debt'] + cols['asset']
+    # monthly happiness spending is the happiness spending of the current period plus the NPeriodsPerMonth-1 periods before it
+    prev_spd_on_hapns = list(prev_spd_on_hapns)[-(NPeriodsPerMonth-1):] if NPeriodsPerMonth > 1 else []
+    padded = np.concatenate(([0.0]*(NPeriodsPerMonth-1-len(prev_spd_on_hapns)), prev_spd_on_hapns, cols['spd_on_hapns']))
+    mth_spd_hapns = np.lib.stride_tricks.sliding_window_view(padded, NPeriodsPerMonth).sum(axis=1)
+    return wealth, mth_spd_hapns, cols['adj_ratio']
+
+class BranchAndBound:
+    """Searches for the best combination of options of a turn with branch and bound"""
+
+    # relative tolerance added to the upper bound. The bound is computed with a different order of floating point operations than the simulation.
+    BoundTolerance = 1e-9
+
+    def __init__(self, base, option_effects, period_start, period_score, prev_happiness_sum):
+        """Searches for the best combination of options of a turn with branch and bound
+
+        Input Arguments
+        ---------------
+        base:               required tuple returned by contributions() for the backend objects that do not depend on the options of the turn.
+                            The wealth element already includes the wealth carried from before period_start.
+        option_effects:     required list (one element per event) of lists (one element per option) of tuples returned by contributions()
+        period_start:       required int. The first simulation period of the arrays in base and option_effects.
+        period_score:       required int. The simulation period at which the score is compared. Must be covered by the arrays.
+        prev_happiness_sum: required float. Sum of happiness from period 0 to period_start-1.
+        """
+        n_periods = period_score - period_start + 1
+        # the bound can only be computed if the arrays cover the scoring period. Otherwise, no combination is skipped.
+        self.can_prune = n_periods <= len(base[0])
+        self.period_score = period_score
+        self.prev_happiness_sum = prev_happiness_sum
+        # only the periods up to the scoring period matter
+        self.base = tuple(c[:n_periods] for c in base)
+        self.option_effects = [[tuple(c[:n_periods] for c in crntOption) for crntOption in crntEvent] for crntEvent in option_effects]
+        self.n_options = [len(c) for c in option_effects]
+
+        # the highest contribution of each event in every period among all its options
+        best_effects = [tuple(np.max([crntOption[i] for crntOption in crntEvent], axis=0) for i in range(3)) for crntEvent in self.option_effects]
+        self.__best_effects = best_effects
+        # self.__best_rest[k] is the best contribution of events k, k+1, ... combined. Wealth and spending are summed, adjustment ratios are multiplied.
+        self.__best_rest = [(np.zeros(n_periods), np.zeros(n_periods), np.ones(n_periods))]
+        for crntBest in reversed(best_effects):
+            rest = self.__best_rest[0]
+            self.__best_rest.insert(0, (rest[0]+crntBest[0], rest[1]+crntBest[1], rest[2]*crntBest[2]))
+
+        self.stats = SearchStats()
+
+    def upper_bound(self, decided, k):
+        """returns an upper bound of the score at period_score when the first k events are decided and their combined contribution is decided"""
+        from backend.simkernel import calculate_happiness
+        rest = self.__best_rest[k]
+        happiness = calculate_happiness(decided[0]+rest[0], np.maximum(decided[1]+rest[1], 0), adj_ratio=decided[2]*rest[2])
+        bound = (self.prev_happiness_sum + happiness.sum()) / (self.period_score + 1)
+        return bound + abs(bound)*BranchAndBound.BoundTolerance
+
+    def search(self, evaluate):
+        """Finds the best option combination. The result is the same as visiting all combinations in the order of itertools.product.
+
+        Input Argument
+        --------------
+        evaluate:   required function that takes a tuple of option indices (one per event) and returns None if the combination is not feasible.
+                    Otherwise, it returns a tuple of (bankrupt indicator, score at period_score, any object to return with the best combination).
+
+        Output Argument
+        ---------------
+        the object returned by evaluate for the best combination. Combinations that do not go bankrupt are always preferred.
+        Among combinations with the same score, the first one in the order of itertools.product is kept.
+        """
+        self.stats = SearchStats()
+        self.stats.n_candidates = prod(self.n_options)
+        # similar structure as in Prosperville.__simulate_for_ai: 
+        # [[best surviving score, its option indices, object], [best bankrupt score, its option indices, object]]
+        self.__best = [[-99999, None, None], [-99999, None, None]]
+        self.__evaluate = evaluate
+        self.__to_visit = None
+
+        # a good combination found early lets the search skip more branches.
+        # start with the combination whose options have the highest bound when the other events are at their best
+        self.__first_guess = self.__guess()
+        self.__visit(self.__first_guess)
+        # then visit all combinations, skipping the branches that cannot beat the best score
+        self.__branch((), self.base, 0)
+        return self.__best[0][2] if self.__best[0][1] is not None else self.__best[1][2]
+
+    def search_batch(self, evaluate_many, batch_size):
+        """Finds the best option combination like self.search, but evaluates the combinations in rounds (batches) so that each batch can be evaluated in parallel.
+        The first round is the first guess. The combinations the first guess cannot rule out are then sorted by their upper bound, highest first,
+        and evaluated batch_size at a time. After each round, the combinations whose upper bound is below the best score found so far are skipped.
+        Since the bounds are sorted, the search stops at the first combination that cannot beat the best score.
+
+        Input Arguments
+        ---------------
+        evaluate_many:  required function that takes a list of tuples of option indices and returns a list with one element per tuple.
+                        Each element is None if the combination is not feasible, otherwise a tuple of (bankrupt indicator, score at period_score).
+        batch_size:     required int. The number of combinations evaluated in each round, eg the number of worker processes.
+
+        Output Argument
+        ---------------
+        the tuple of option indices of the best combination
+        """
+        self.stats = SearchStats()
+        self.stats.n_candidates = prod(self.n_options)
+        self.__best = [[-99999, None, None], [-99999, None, None]]
+        # the results are saved by their option indices, then visited the same way as in self.search
+        results = dict()
+        self.__evaluate = lambda choice: None if results[choice] is None else (results[choice][0], results[choice][1], choice)
+
+        self.__first_guess = self.__guess()
+        results[self.__first_guess] = evaluate_many([self.__first_guess])[0]
+        self.__visit(self.__first_guess)
+        # find the combinations that the first guess cannot rule out with the upper bound of each, in the order of itertools.product
+        self.__to_visit = []
+        self.__branch((), self.base, 0)
+        # the sort is stable, so combinations with the same bound stay in the order of itertools.product
+        to_visit = sorted(self.__to_visit, key=lambda c: -c[1])
+        self.__to_visit = None
+
+        iNext = 0
+        while iNext < len(to_visit):
+            # the remaining combinations cannot beat the best surviving score if the highest remaining bound cannot
+            if self.can_prune and self.__best[0][1] is not None and to_visit[iNext][1] < self.__best[0][0]:
+                self.stats.n_pruned += len(to_visit) - iNext
+                break
+            crntBatch = [c[0] for c in to_visit[iNext:(iNext+batch_size)]]
+            results.update(zip(crntBatch, evaluate_many(crntBatch)))
+            for crntChoice in crntBatch:
+                self.__visit(crntChoice)
+            iNext += len(crntBatch)
+        return self.__best[0][2] if self.__best[0][1] is not None else self.__best[1][2]
+
+    def __guess(self):
+        """returns a tuple of option indices. For each event, the option with the highest bound when all other events contribute their best."""
+        rtn = []
+        for k in range(len(self.n_options)):
+            # combined best contribution of all events except k
+            others = [self.base[0].copy(), self.base[1].copy(), self.base[2].copy()]
+            for j in range(len(self.n_options)):
+                if j != k:
+                    others[0] += self.__best_effects[j][0]; others[1] += self.__best_effects[j][1]; others[2] = others[2]*self.__best_effects[j][2]
+            bounds = [self.upper_bound((others[0]+c[0], others[1]+c[1], others[2]*c[2]), len(self.n_options)) for c in self.option_effects[k]]
+            rtn.append(int(np.argmax(bounds)))
+        return tuple(rtn)
+
+    def __visit(self, choice):
+        """evaluates a combination of options and keeps it if it is the best so far"""
+        rtn = self.__evaluate(choice)
+        if rtn is None:
+            self.stats.n_infeasible += 1
+            return
+        self.stats.n_evaluated += 1
+        islot = int(rtn[0])
+        crntBest = self.__best[islot]
+        # a higher score wins. A tie goes to the combination that comes first in the order of itertools.product
+        if crntBest[0] < rtn[1] or (crntBest[0] == rtn[1] and crntBest[1] is not None and choice < crntBest[1]):
+            self.__best[islot] = [rtn[1], choice, rtn[2]]
+
+    def __branch(self, choice, decided, k):
+        """visits all combinations that start with the options in choice. decided is the combined contribution of base and the decided events."""
+        # a branch can only be skipped once a surviving combination is known.
+        # Before that, a bankrupt combination may be the final answer, and the bound does not apply to bankrupt combinations.
+        if self.can_prune and self.__best[0][1] is not None and self.upper_bound(decided, k) < self.__best[0][0]:
+            # the first guess is already counted if it is in the skipped branch
+            self.stats.n_pruned += prod(self.n_options[k:]) - int(self.__first_guess[:k] == choice)
+            return
+
+        if k == len(self.n_options): # all events are decided
+            if choice == self.__first_guess: # the first guess is already evaluated
+                return
+            if self.__to_visit is not None: # in search_batch, the combination is evaluated later with the others, in the order of its upper bound
+                self.__to_visit.append((choice, self.upper_bound(decided, k) if self.can_prune else 0.0))
+            else:
+                self.__visit(choice)
+            return
+
+        for iOption in range(self.n_options[k]):
+            crntEffect = self.option_effects[k][iOption]
+            self.__branch(choice + (iOption,), (decided[0]+crntEffect[0], decided[1]+crntEffect[1], decided[2]*crntEffect[2]), k+1)
+
+def pick_best(choices, results):
+    """returns the best of a list of option combinations the same way as the brute force search in Prosperville.__simulate_for_ai:
+    combinations that do not go bankrupt are preferred, then the highest score. Among equal scores, the first one in the list is kept.
+
+    Input Arguments
+    ---------------
+    choices:    required list of tuples of option indices
+    results:    required list with one element per element of choices. Each element is None if the combination is not feasible, 
+                otherwise a tuple of (bankrupt indicator, score)
+    """
+    bestResults = [[-99999, None], [-99999, None]]
+    for crntChoice, crntResult in zip(choices, results):
+        if crntResult is None:
+            continue
+        islot = int(crntResult[0])
+        if bestResults[islot][0] < crntResult[1]:
+            bestResults[islot] = [crntResult[1], crntChoice]
+    return bestResults[0][1] if bestResults[0][1] is not None else bestResults[1][1]
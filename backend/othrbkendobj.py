@@ -18,6 +18,10 @@ class BackendObjectBase:
         self.n_periods = term_2_period(backend_def['term'], backend_def['term_unit'])
         self.n_payments = self.n_periods / backend_def['pay_freq_n_periods']
 
+        # identifies the definition the object is created from: (name of the event or option, index in the list of backend objects of that name).
+        # it is set by backend/gameitems.py. A copy of the object keeps the key of the object it is copied from.
+        self.key = None
+
 class HappinessAdjustmentRatio(BackendObjectBase):
     """Represents a direct impact on happiness outside of the influence of wealth and spending. 
     This class has no schedule filed and is only a data holder with no simulation logic. 
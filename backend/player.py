@@ -3,14 +3,15 @@
 stores player attributes and scores the player based on the attribute values."""
 
 from backend.design import NPeriodsPerMonth
-from collections import defaultdict
 from backend.prosperville import Prosperville
+from backend.scoretable import ScoreTable
+from backend.activeindex import ActiveObjectIndex
 from typing import Optional, Callable
 
 class Player:
     """Represents a player in the game."""
     
-    def __init__(self, name:str, game_instance:Prosperville, is_system=False, init_cash=0.0):
+    def __init__(self, name:str, game_instance:Prosperville, is_system=False, init_cash=0.0, sim_engine='numpy'):
         """Represents a player in the game.
         
         Input Arguments
@@ -19,6 +20,9 @@ class Player:
         game_instance:  required object of Prosperville class that represents the current running game.
         is_system:      optional boolean value that indiates if the player is an AI or a human player. 
         init_cash:      optional float value that presents the initial cash the player has upon creation. 
+        sim_engine:     optional str that selects how the player is simulated. 
+                        'numpy' uses the vectorized kernel in backend/simkernel.py. 
+                        'python' uses the period-by-period loop in Player.__update_score_table.
         """
         
         if not isinstance(game_instance, Prosperville):
@@ -27,11 +31,15 @@ class Player:
         if init_cash < 0:
             raise ValueError(f'init_cash should be non-negative. "{init_cash}" is given.')
 
+        if sim_engine not in ['numpy', 'python']:
+            raise ValueError(f'sim_engine should be either "numpy" or "python". "{sim_engine}" is given.')
+
         # save the input argument values
         self.name = name # name of the player
         self.crntGame = game_instance # this variable is used to access current game information such as step table, game progression, etc
         self.is_system=is_system
         self.init_cash = init_cash # this is used to generate the starting point of the score table
+        self.sim_engine = sim_engine # decides which simulation implementation the simulate method uses
 
         # current value of player attributes
         self.score = 0
@@ -56,38 +64,76 @@ class Player:
         self.choices = RestrictedDict(on_set=Player.__on_set_choice)
         # set the player instance to the choice so that the __on_set_choice method can access the parent player object from choices collection
         self.choices.player = self
-        # this is an internal cache that saves the availability of options for events that the game has visited
-        self._available_options = dict()
 
         # a list of backend objects that are affecting this player.
         # these objects are added by self.crntGame via ___add_bkedobj_2_player method in backend/prosperville.py
         self.selected_bked_objs = list()
+        # the interval index of the backend objects. A simulation only visits the objects that are active in its periods (see backend/activeindex.py)
+        self._active_index = ActiveObjectIndex()
         # this is the raw structure of the score table. it keeps track of items that are essential to the game. 
-        # each row in this table represents a simulation period
-        self._score_table = defaultdict(list)
+        # each row in this table represents a simulation period. The columns are preallocated for the whole game. see backend/scoretable.py
+        self._score_table = ScoreTable()
+        # the state of the player at the end of each simulated turn, by turn index (see Checkpoint). 
+        # simulating again can restart from the latest checkpoint that is still valid instead of from the start of the requested periods (see simulate)
+        self.checkpoints = dict()
+        # number of periods at the start of the score table that agree with the current backend objects of the player. 
+        # adding a backend object makes the periods from its start period onwards out of date (see add_bked_objs)
+        self._n_valid_periods = 0
+        # counts of the simulated periods, for monitoring. The dictionary is shared with the forks of the player, so the AI's candidates are counted too
+        #   periods_simulated:      number of periods that were calculated
+        #   periods_reused:         number of periods that were requested but not calculated because a valid checkpoint was after them
+        #   checkpoint_restarts:    number of simulations that restarted from a checkpoint
+        self.sim_stats = {'periods_simulated': 0, 'periods_reused': 0, 'checkpoint_restarts': 0}
 
         # these two are used to cache the choice table property. 
         # The property does not generate the whole table every time it is accessed. 
         # It simply adds new content to the previous cached table as the game progresses
         self._last_turn_cached = 0
         self._cache_choice_table = None
+        # the columns of the choice table as arrays by column name. The table is made from them (see the choice_table property)
+        self._choice_cols = None
+        # the score table property is cached the same way. self._score_frame_valid is the number of rows of the cached table that agree with self._score_table. 
+        # simulating a period again makes the rows from that period onwards out of date (see __finish_simulation)
+        self._score_frame = None
+        self._score_frame_valid = 0
+
+    def fork(self, period_start=None):
+        """Returns a lightweight copy of the player that can be simulated without changing this player. 
+        The AI uses it to try out a choice combination.
+
+        Nothing that is shared between the two players is changed by the game after the fork:
+        the backend objects are shared (the game copies a backend object before it changes one),
+        and the score table rows before period_start are shared with this player's score table (see ScoreTable.fork). 
+        Choices and the list of backend objects are copied because the copy adds to them.
+        
+        Input Argument
+        --------------
+        period_start:   optional int. The first simulation period the copy may simulate again. Defaults to the number of periods simulated so far.
+        """
+        rtn = Player.__new__(Player)
+        # copy all attribute references. Mutable attributes are replaced below
+        rtn.__dict__.update(self.__dict__)
+        rtn.choices = self.choices.copy()
+        rtn.choices.player = rtn
+        rtn.selected_bked_objs = list(self.selected_bked_objs)
+        rtn._active_index = self._active_index.copy(rtn.selected_bked_objs)
+        rtn._score_table = self._score_table.fork(period_start)
+        rtn.checkpoints = dict(self.checkpoints)
+        # the choice table and score table caches are rebuilt when they are needed
+        rtn.clear_table_caches()
+        return rtn
+
+    def clear_table_caches(self):
+        """Clears the caches of the choice_table and score_table properties, so that both tables are built from scratch the next time they are read.
+        The game never needs it: the caches are updated as the game progresses. It is used by the benchmarks (see backend/benchmark.py)."""
+        self._last_turn_cached, self._cache_choice_table, self._choice_cols = 0, None, None
+        self._score_frame, self._score_frame_valid = None, 0
 
     # this class level method is called when elements in self.choices is added or modified
     def __on_set_choice(collection, eventName, newChoice):
-        """adds special logic to option dependency"""
-        
-        # if new event or new value for the event
-        if eventName not in collection or collection[eventName] != newChoice:
-            
-            # special logic to set available options for the 'stg1_lodging' event based on the choice made in 'stg1_college' event
-            # the available options for 'stg1_lodging' event is set when a choice is made in the 'stg1_college' event
-            if eventName == 'stg1_college':
-                if collection.player.crntGame.event_by_name[eventName].options[newChoice].name == 'stg1_no_college':
-                    collection.player._available_options['stg1_lodging'] = [False, True, True]
-                else:
-                    collection.player._available_options['stg1_lodging'] = [True, True, True]
+        """checks the option dependencies (see backend/constraints.py) before a choice is set"""
 
-        # if the new choice is not available to the player
+        # if the new choice is not available to the player (eg living in a dorm without going to college)
         if collection.player.get_option_availability(eventName)[newChoice] == False:
             raise ValueError('Option "{0}" (index {1}) is not available to player {2}.'.format(collection.player.crntGame.event_by_name[eventName].options[newChoice].name, newChoice, collection.player.name))
 
@@ -96,98 +142,91 @@ class Player:
 
     @property
     def score_table(self):
-        """gets the score table of the player up to the end of the game's current step"""
+        """gets the score table of the player up to the end of the game's current step. 
+        The table is built once and only extended with the periods simulated since the last access (see __extend_score_frame). 
+        The returned table is shared with later accesses, so it must not be changed."""
+        # total number of periods in the internal score table (_score_table)
+        end_period = len(self._score_table)
+        # rebuild the rows that were simulated again, and add the new rows
+        if self._score_frame is None or self._score_frame_valid < end_period:
+            self.__extend_score_frame(end_period)
+        # limit the rows to the end period of the current turn. 
+        # Note that AI may simulate ahead within a stage even if it does not know the outcome of random event turns.
+        return self._score_frame.loc[:(self.bankrupt_period if self.bankrupt else self.crntGame.step_table['period_sim_last'][self.crntGame.iStep])]
+
+    def __extend_score_frame(self, end_period):
+        """builds the rows of the cached score table (self._score_frame) from the first row that is out of date up to end_period (excluded)"""
         import pandas as pd
         import numpy as np
         from backend.design import NPeriodsPerMonth # number of simulation periods per month
-        
-        # total number of periods in the internal score table (_score_table)
-        end_period = len(self._score_table['score'])
+
+        # the rows before start_period are kept
+        start_period = 0 if self._score_frame is None else min(self._score_frame_valid, len(self._score_frame))
         # the next two lines get the values for the month column
-        # this first line sets a sequence from 1 to end_period to get the length of the values right.
+        # this first line sets a sequence from start_period+1 to end_period to get the length of the values right.
         # Dividing by NPeriodsPerMonth sets the right number of months. 
         # Taking the remainder of 12 (%12) converts to actual month number so that Jan = 1, Feb = 2, etc
-        mth_vals = np.arange(start=1,stop=end_period+1,step=1)/NPeriodsPerMonth%12
+        mth_vals = np.arange(start=start_period+1,stop=end_period+1,step=1)/NPeriodsPerMonth%12
         # Due to the remainder operation, any multiple of 12 gets the value of 0. we need to set it to 12 to indicate December.
         mth_vals = np.where(mth_vals==0,12,mth_vals)
         
-        # assemble the raw data in a dictionary with each key-value pair being a column. 
-        # then convert the dictionary to pandas dataframe. 
-        # finally, limit the rows to the end period of the current turn. 
-        # Note that AI may simulate ahead within a stage even if it does not know the outcome of random event turns.
-        return pd.DataFrame({
+        # assemble the raw data of the new rows in a dictionary with each key-value pair being a column. 
+        # then convert the dictionary to pandas dataframe, and add it to the rows that are kept
+        new_rows = pd.DataFrame({
             'Stage': ""
-            , 'Age':(np.floor(np.arange(start=0,stop=end_period,step=1)/12/NPeriodsPerMonth)
+            , 'Age':(np.floor(np.arange(start=start_period,stop=end_period,step=1)/12/NPeriodsPerMonth)
                     +self.crntGame.stage_by_name[self.crntGame.step_table['stage_name'][0]].init_age
                 ).astype(int)
             , 'Month':mth_vals
-            , 'Score':np.array(self._score_table['score'],int)
-            , 'Happiness':np.array(self._score_table['happiness'],int)
-            , 'Equity':np.array(self._score_table['wealth'],int)
-            , 'Debt':np.array(self._score_table['debt'],int)
-        }).loc[:(self.bankrupt_period if self.bankrupt else self.crntGame.step_table['period_sim_last'][self.crntGame.iStep])]
+            , 'Score':np.array(self._score_table['score'][start_period:end_period],int)
+            , 'Happiness':np.array(self._score_table['happiness'][start_period:end_period],int)
+            , 'Equity':np.array(self._score_table['wealth'][start_period:end_period],int)
+            , 'Debt':np.array(self._score_table['debt'][start_period:end_period],int)
+        }, index=pd.RangeIndex(start_period, end_period))
+        self._score_frame = new_rows if start_period == 0 else pd.concat([self._score_frame.iloc[:start_period], new_rows])
+        self._score_frame_valid = end_period
 
     @property
     def choice_table(self):
-        """gets a table that shows the choices the player made"""
+        """gets a table that shows the choices the player made. 
+        The columns of the table are kept as arrays (self._choice_cols). Only the turns from the last cached turn onwards are updated, 
+        and the table is made from the arrays again only when a value changes. The returned table is shared with later accesses, so it must not be changed."""
         import pandas as pd
+        import numpy as np
 
-        # if the cache has not been made yet, set up the table structure
-        if self._cache_choice_table is None:
-            from collections import defaultdict
-            # we will create a dictionary of lists first. 
-            # each list represents a column. The column name is the key in the dictionary for the list.
-            tmp_tbl = defaultdict(list)
-            
-            # add stage index and turn index
-            tmp_tbl['istage'] = self.crntGame.step_table['stage']
-            tmp_tbl['iturn'] = self.crntGame.step_table['turn']
-            
-            # go through each turn and add stage and event name, and turn number
-            # the content is already in crntGame.step_table. we are just repackaging it
-            for istp in range(len(self.crntGame.step_table['stage'])):
-                tmp_tbl['Stage'].append(self.crntGame.stage_by_name[self.crntGame.step_table['stage_name'][istp]].title)
-                tmp_tbl['Turn'].append(self.crntGame.step_table['turn'][istp]+1)
-                tmp_tbl['Random'].append('Yes' if self.crntGame.step_table['is_random_event_step'][istp] else 'No')
-                if self.crntGame.step_table['event_name'][istp] != "":
-                    tmp_tbl['Event'].append(self.crntGame.event_by_name[self.crntGame.step_table['event_name'][istp]].title)
-                else:
-                    tmp_tbl['Event'].append('')
-            
+        # if the cache has not been made yet, set up the columns. 
+        # the columns that do not depend on the player are made once and shared by all players (see backend.gameitems.choice_table_base). Event and Choice are updated, so they are copied
+        if self._choice_cols is None:
+            import backend.gameitems as gamedef
+            self._choice_cols = dict(gamedef.choice_table_base())
+            self._choice_cols['Event'] = self._choice_cols['Event'].copy()
             # leave all choices empty
-            tmp_tbl['Choice'] = [''] * len(tmp_tbl['istage'])
-            
-            self._cache_choice_table = pd.DataFrame(tmp_tbl)
-        
-        rtn = self._cache_choice_table
+            self._choice_cols['Choice'] = np.full(len(self._choice_cols['Event']), '', dtype=object)
+            self._cache_choice_table = None
+
         # we only refresh the table for the turns between the last cached turn and the current turn. 
         # choices in turns before the previous turn cannot change. so we don't need to update them
-        for itrn in range(self._last_turn_cached, self.crntGame.iTurn+1,1):
-            for istp in range(self.crntGame.first_step_of_turn[itrn],self.crntGame.last_step_of_turn[itrn]+1):
-                # if random event has not been drawn, skip this step
-                if self.crntGame.step_table['event_name'][istp] == '': 
-                    rtn.loc[istp,'Choice'] = 'N/A'
-                    continue 
-                
-                # get the current event object
-                evtObj = self.crntGame.event_by_name[self.crntGame.step_table['event_name'][istp]]
-                
-                # if the event is a random event, add the event title to the return table
-                if self.crntGame.step_table['is_random_event_step'][istp]:
-                    rtn.loc[istp,'Event'] = evtObj.title
-
-                # add choices
-                if evtObj.options is None or len(evtObj.options) == 0:
-                    # if the event does not have options, set choice to NA
-                    rtn.loc[istp,'Choice'] = 'N/A'
-                elif evtObj.name in self.choices:
-                    # if the user has made a choice for the event
-                    rtn.loc[istp, 'Choice'] = evtObj.options[self.choices[evtObj.name]].title
+        first = self.crntGame.first_step_of_turn[self._last_turn_cached]
+        last = self.crntGame.last_step_of_turn[self.crntGame.iTurn] + 1
+        # the event object of each step. None if the random event has not been drawn
+        evtObjs = [self.crntGame.event_by_name[c] if c != '' else None for c in self.crntGame.step_table['event_name'][first:last]]
+        # if the event is a random event that has been drawn, show its title
+        new_event = [e.title if e is not None and r else c
+                     for e, r, c in zip(evtObjs, self.crntGame.step_table['is_random_event_step'][first:last], self._choice_cols['Event'][first:last])]
+        # the choice is N/A if the random event has not been drawn or the event does not have options. 
+        # it is the title of the option if the user has made a choice for the event
+        new_choice = ['N/A' if e is None or e.options is None or len(e.options) == 0 else e.options[self.choices[e.name]].title if e.name in self.choices else c
+                      for e, c in zip(evtObjs, self._choice_cols['Choice'][first:last])]
+        if new_event != list(self._choice_cols['Event'][first:last]) or new_choice != list(self._choice_cols['Choice'][first:last]):
+            self._choice_cols['Event'][first:last] = new_event
+            self._choice_cols['Choice'][first:last] = new_choice
+            self._cache_choice_table = None
 
         # set the current turn as the cahced turn. choices made in the previous turn cannot be changed.    
         self._last_turn_cached = self.crntGame.iTurn
-        self._cache_choice_table = rtn
-        return rtn
+        if self._cache_choice_table is None:
+            self._cache_choice_table = pd.DataFrame(self._choice_cols)
+        return self._cache_choice_table
 
     def get_option_availability(self, eventName):
         """returns a list of booleans that indicate the availability of options for a given event"""
@@ -198,48 +237,160 @@ class Player:
         if eventName not in self.crntGame.event_by_name or self.crntGame.event_by_name[eventName].options is None or len(self.crntGame.event_by_name[eventName].options) == 0:
             return None
         
-        # if the event has no previously cached results, create it. 
-        # Player.__on_set_choice method creates and updates the cache for the dependent event choices whenever the user makes changes to the contingent event choice
-        # because of the above, when an event has no cache, it simply means it is not an event (dependent) that depends on another (contingent)
-        # in that case, we just set all options of non-dependent event to be available.
-        if eventName not in self._available_options:
-            self._available_options[eventName] = [True] * len(self.crntGame.event_by_name[eventName].options)
-        return self._available_options[eventName]
-
-    def simulate(self, period_start, period_end):
+        # an option is not available if the player has chosen an option in its excluded_by list (see backend/design/eventdef.py)
+        return self.crntGame.option_constraints.availability(eventName, self.choices._data)
+
+    def add_bked_objs(self, bked_objs, period_floor=0):
+        """Adds backend objects to the player. The score table periods from the earliest start period of the objects onwards become out of date, 
+        and so do the checkpoints in those periods.
+
+        Input Arguments
+        ---------------
+        bked_objs:      required list of backend objects (see backend/__init__.py)
+        period_floor:   optional int. The first period the game may simulate again for the player (eg the first period of the current stage). 
+                        The periods before it are final: an object's effect before period_floor is never added to them, 
+                        so they stay valid whatever objects are added.
+        """
+        # the periods before the floor are final once the table has them
+        self._n_valid_periods = max(self._n_valid_periods, min(period_floor, len(self._score_table)))
+        if len(bked_objs) == 0:
+            return
+        self.selected_bked_objs.extend(bked_objs)
+        self._active_index.sync(self.selected_bked_objs)
+        self._n_valid_periods = min(self._n_valid_periods, max(period_floor, min(c.start_period for c in bked_objs)))
+        self.checkpoints = {k: v for k, v in self.checkpoints.items() if v.period < self._n_valid_periods}
+
+    def active_objects(self, period_start, period_end):
+        """Returns the backend objects of the player that are active in any period between period_start and period_end (included), 
+        in the order of self.selected_bked_objs (see backend/activeindex.py)"""
+        return self._active_index.overlapping(self.selected_bked_objs, period_start, period_end)
+
+    def restart_period(self, period_start):
+        """Returns the period a simulation that is requested from period_start can restart from: 
+        the period after the latest valid checkpoint, or period_start if no valid checkpoint is at or after period_start-1."""
+        rtn = period_start
+        for crntCheckpoint in self.checkpoints.values():
+            if crntCheckpoint.period >= period_start-1 and crntCheckpoint.period < self._n_valid_periods:
+                rtn = max(rtn, crntCheckpoint.period+1)
+        return rtn
+
+    def simulate(self, period_start, period_end, from_checkpoint=False):
         """Simulates for the player between two simulation periods
         
         Input Argument
         --------------
-        period_start:   required int that indicates the starting period to simulate
-        peirod_end:     required int that indicates the last period to simulate to. This period is included in the simulation.
+        period_start:       required int that indicates the starting period to simulate
+        peirod_end:         required int that indicates the last period to simulate to. This period is included in the simulation.
+        from_checkpoint:    optional boolean. If True, the periods before the latest valid checkpoint are not calculated again (see restart_period). 
+                            The player's attributes still summarize all periods from period_start.
+                            Use it when the score table already has the periods from period_start (eg the AI, which simulates to the end of the stage every turn).
         """
 
         # no the simulation if the player is already bankrupted
         if self.bankrupt:
             return
         
-        # loop through the periods, and performs scoring. this is where the actual simulation results are combined
-        for iPeriod in range(period_start, period_end+1):
-            self.__update_score_table(iPeriod)
-
-            # if after this period (=iPeriod), the player becomes bankrupt
-            if self.bankrupt:
-                # adjust the end period to when they bankrupt. 
-                # Note self.bankrupt_period is set by self.__update_score_table 
-                period_end = self.bankrupt_period
-                break # simulate no more when bankrupt
+        # the first period that is actually calculated
+        period_restart = self.restart_period(period_start) if from_checkpoint else period_start
+        if period_restart > period_start:
+            self.sim_stats['checkpoint_restarts'] += 1
+            self.sim_stats['periods_reused'] += min(period_restart, period_end+1) - period_start
+        
+        if period_restart > period_end:
+            # every requested period is still valid. nothing to calculate
+            pass
+        elif self.sim_engine == 'numpy':
+            # compute all periods at once with the vectorized kernel
+            self.__simulate_vectorized(period_restart, period_end)
+        else:
+            # loop through the periods, and performs scoring. this is where the actual simulation results are combined
+            # the index gives the backend objects that are active in each period, so the objects that ended or have not started yet are not visited
+            for iPeriod, active_objs in self._active_index.sweep(self.selected_bked_objs, period_restart, period_end):
+                self.__update_score_table(iPeriod, active_objs)
+
+                # if after this period (=iPeriod), the player becomes bankrupt
+                if self.bankrupt:
+                    # Note self.bankrupt_period is set by self.__update_score_table 
+                    break # simulate no more when bankrupt
+
+        self.__finish_simulation(period_start, period_restart, period_end)
+
+    @staticmethod
+    def simulate_batch(players, period_start, period_end):
+        """Simulates many players between the same two simulation periods in one pass. 
+        The players become the rows of two-dimensional arrays (players x periods), so the derived values of all players are calculated together (see backend.simkernel.derive_score_matrix).
+        Each player ends up the same as if its simulate method was called. Bankrupt players are skipped, 
+        and players that use the 'python' simulation engine are simulated one by one.
+
+        Input Arguments
+        ---------------
+        players:        required list of Player objects
+        period_start:   required int that indicates the starting period to simulate
+        period_end:     required int that indicates the last period to simulate to. This period is included in the simulation.
+        """
+        import numpy as np
+        from backend.simkernel import gather_batch_arrays, derive_score_matrix
+
+        batch = [c for c in players if not c.bankrupt and c.sim_engine == 'numpy']
+        for crntPlayer in players:
+            if not crntPlayer.bankrupt and crntPlayer.sim_engine != 'numpy':
+                crntPlayer.simulate(period_start, period_end)
+        if len(batch) == 0:
+            return
+        for crntPlayer in batch:
+            if period_start > len(crntPlayer._score_table):
+                raise IndexError(f'Period {period_start} cannot be simulated for player {crntPlayer.name} before period {len(crntPlayer._score_table)} is simulated.')
+
+        # the state of each player at the end of the previous period. A saved checkpoint is used if there is one, as in Player.__simulate_vectorized
+        prev = [None] * len(batch)
+        if period_start > 0:
+            for j, crntPlayer in enumerate(batch):
+                prev[j] = Checkpoint(crntPlayer._score_table, period_start-1)
+                for crntCheckpoint in crntPlayer.checkpoints.values():
+                    if crntCheckpoint.period == period_start-1:
+                        prev[j] = crntCheckpoint
+        prev_value = lambda name: np.array([getattr(c, name) for c in prev]) if period_start > 0 else 0
+        # one row per player. The backend objects of each player are added in the order of its list, as in Player.__simulate_vectorized
+        cols = gather_batch_arrays([c.active_objects(period_start, period_end) for c in batch], period_start, period_end, init_adj_ratio=[c.score_adj_ratio for c in batch])
+        ibankrupt = derive_score_matrix(cols, period_start
+                                        , prev_wealth=prev_value('wealth'), prev_debt=prev_value('debt'), prev_asset=prev_value('asset')
+                                        , prev_spd_on_hapns=[c.spd_on_hapns for c in prev] if period_start > 0 else []
+                                        , prev_happiness_sum=prev_value('happiness_sum')
+                                        , init_cash=np.array([c.init_cash for c in batch]))
+
+        for j, crntPlayer in enumerate(batch):
+            # periods after the bankruptcy are not written to the score table
+            n_periods = cols['income'].shape[1] if ibankrupt[j] == -1 else int(ibankrupt[j]) + 1
+            crntPlayer._score_table.write(period_start, {k: v[j] for k, v in cols.items()}, n_periods)
+            if ibankrupt[j] != -1:
+                crntPlayer.bankrupt = True
+                crntPlayer.bankrupt_period = period_start + int(ibankrupt[j])
+            crntPlayer.__finish_simulation(period_start, period_start, period_end)
+
+    def __finish_simulation(self, period_start, period_restart, period_end):
+        """Counts the calculated periods, saves the checkpoints and sets the attributes of the player that summarize a simulation.
+        period_restart is the first period that was actually calculated (see simulate)."""
+        if period_restart <= period_end:
+            # the rows of the cached score table from the first calculated period onwards are out of date
+            self._score_frame_valid = min(self._score_frame_valid, period_restart)
+            # the last period that was calculated
+            period_last = self.bankrupt_period if self.bankrupt else period_end
+            self.sim_stats['periods_simulated'] += period_last - period_restart + 1
+            self.__save_checkpoints(period_restart, period_last)
+        if self.bankrupt:
+            # adjust the end period to when they bankrupt. 
+            period_end = self.bankrupt_period
         
         # calculate total number of periods that we just simulated. 
         sim_n_periods = period_end - period_start + 1
         
         self.happiness = self._score_table['happiness'][period_end]
         # calculate the average monthly net income over this simulation
-        self.net_income = sum(self._score_table['net_income'][period_start:(period_end+1)]) * NPeriodsPerMonth / sim_n_periods
+        self.net_income = self._score_table['net_income'][period_start:(period_end+1)].sum() * NPeriodsPerMonth / sim_n_periods
         # calculate the average monthly spending over this simulation
-        self.spending = sum(self._score_table['spending'][period_start:(period_end+1)]) * NPeriodsPerMonth / sim_n_periods
+        self.spending = self._score_table['spending'][period_start:(period_end+1)].sum() * NPeriodsPerMonth / sim_n_periods
         # calculate the average monthly income over this simulation
-        self.income = sum(self._score_table['income'][period_start:(period_end+1)]) * NPeriodsPerMonth / sim_n_periods
+        self.income = self._score_table['income'][period_start:(period_end+1)].sum() * NPeriodsPerMonth / sim_n_periods
 
         # gather the other attribute values at the end of the simulation
         self.debt_std = self._score_table['debt_std'][period_end]
@@ -253,12 +404,74 @@ class Player:
         self.asset = self._score_table['asset'][period_end]
         
     
-    def __update_score_table(self, iprd):
-        """Calculates effects of all backend objects attached to this player
+    def __save_checkpoints(self, period_start, period_end):
+        """Saves a checkpoint at the end of each turn that was just calculated, between period_start and period_end"""
+        import bisect
+        import backend.gameitems as gamedef
+
+        if period_start > self._n_valid_periods:
+            # the periods before period_start are out of date, so the calculated periods are too. 
+            # This happens when a human player is given a backend object that starts in an earlier turn of the stage than the turn the player is simulated for
+            return
+        # the calculated periods now agree with the backend objects. The periods after them are left from an earlier simulation
+        self._n_valid_periods = period_end+1
+        # the turns that end in the calculated periods. A turn that ends in the bankruptcy period has no checkpoint
+        last_period_of_turn = gamedef.last_period_of_turn
+        for iTurn in range(bisect.bisect_left(last_period_of_turn, period_start), bisect.bisect_right(last_period_of_turn, period_end)):
+            if self.bankrupt and last_period_of_turn[iTurn] >= self.bankrupt_period:
+                break
+            self.checkpoints[iTurn] = Checkpoint(self._score_table, last_period_of_turn[iTurn])
+
+    def __simulate_vectorized(self, period_start, period_end):
+        """Calculates effects of all backend objects attached to this player for a range of periods with the vectorized kernel. 
+        This method produces the same score table as calling self.__update_score_table for each period in the range.
         
         Input Argument
         --------------
+        period_start:   required int that indicates the starting period to simulate
+        peirod_end:     required int that indicates the last period to simulate to. This period is included in the simulation.
+        """
+
+        from backend.simkernel import gather_period_arrays, derive_score_arrays
+
+        n_existing = len(self._score_table)
+        if period_start > n_existing:
+            raise IndexError(f'Period {period_start} cannot be simulated before period {n_existing} is simulated.')
+
+        # the state at the end of the previous period. It is read from the checkpoint when the simulation restarts from one, otherwise from the score table
+        if period_start > 0:
+            prev = Checkpoint(self._score_table, period_start-1)
+            for crntCheckpoint in self.checkpoints.values():
+                if crntCheckpoint.period == period_start-1:
+                    prev = crntCheckpoint
+        # turn the backend objects into per-period arrays, then compute the derived values from the last simulated period
+        cols = gather_period_arrays(self.active_objects(period_start, period_end), period_start, period_end, init_adj_ratio=self.score_adj_ratio)
+        ibankrupt = derive_score_arrays(cols, period_start
+                                        , prev_wealth=prev.wealth if period_start > 0 else 0
+                                        , prev_debt=prev.debt if period_start > 0 else 0
+                                        , prev_asset=prev.asset if period_start > 0 else 0
+                                        , prev_spd_on_hapns=prev.spd_on_hapns if period_start > 0 else []
+                                        , prev_happiness_sum=prev.happiness_sum if period_start > 0 else 0
+                                        , init_cash=self.init_cash)
+
+        # periods after the bankruptcy are not written to the score table
+        n_periods = len(cols['income']) if ibankrupt == -1 else ibankrupt + 1
+        # write the results to the score table. Periods that exist are overwritten, new periods are added
+        self._score_table.write(period_start, cols, n_periods)
+
+        if ibankrupt != -1:
+            self.bankrupt = True
+            # set the period at which the player went bankrupt
+            self.bankrupt_period = period_start + ibankrupt
+
+    def __update_score_table(self, iprd, bked_objs=None):
+        """Calculates effects of all backend objects attached to this player
+        
+        Input Arguments
+        ---------------
         iprd:       required int that represents the period this method works on. This is a 0-based index.
+        bked_objs:  optional list of the backend objects to visit, in the order of self.selected_bked_objs. 
+                    Defaults to all backend objects of the player. The objects that are not active in the period can be left out (see backend/activeindex.py).
         """
 
         if self.bankrupt:
@@ -268,7 +481,7 @@ class Player:
         # this is the value that makes all players to have 100 happiness score at the beginning of the game irregardless of the initial cash value.
         hAdjRate = self.score_adj_ratio
         # has the current period been simulated for this player already. this happens for AI when it simulates ahead of turn to the end of a stage (ignoring undrawn random events).
-        does_period_exists = iprd < len(self._score_table['income'])
+        does_period_exists = iprd < len(self._score_table)
         
         # the following for loop gathers variable values / attributes for this player 
         # by looping through all backend objects this player has, 
@@ -276,7 +489,7 @@ class Player:
         income, spending, debt, hpness_spding, asset, annual_salary = 0,0,0,0,0,0
         debt_std, debt_mort, debt_car, debt_other = 0,0,0,0
         # loop through each backend object that this player has
-        for crntObj in self.selected_bked_objs:
+        for crntObj in (self.selected_bked_objs if bked_objs is None else bked_objs):
             # this is the index used in the backend object's schedule table. Because not all events start at period 0, 
             # crntObj.start_period to adjust the schedule table to always start at 0. To reverse that effect, 
             # we simply subtract crntObj.start_period from the global simulation period value. 
@@ -342,8 +555,7 @@ class Player:
         colnames = ['income', 'spending', 'net_income', 'debt', 'asset', 'spd_on_hapns','mth_spd_hapns','wealth','happiness','score','debt_std','debt_mort','debt_car', 'debt_other','debt_ratio']
         colvalues = [income, spending, net_income, debt, asset, hpness_spding,0,0,0,0,debt_std,debt_mort,debt_car,debt_other,0]
         if does_period_exists == False:
-            for crntCol in colnames:
-                self._score_table[crntCol].append(0)
+            self._score_table.extend(iprd+1)
         # add new value to the current period
         for crntCol, crntVal in zip(colnames, colvalues):
             if crntCol not in ['mth_spd_hapns','wealth','happiness','score','debt_ratio']:
@@ -377,7 +589,9 @@ class Player:
         # calculate the happiness for this period
         self._score_table['happiness'][iprd] = self.__calculate_happiness(self._score_table['wealth'][iprd], self._score_table['mth_spd_hapns'][iprd], adj_ratio=hAdjRate)
         # calculate the score: the average happiness value up to this simulation period
-        self._score_table['score'][iprd] = sum(self._score_table['happiness'][:(iprd+1)]) / (iprd+1)
+        # the running happiness sum makes this a constant time operation no matter how many periods have been simulated
+        self._score_table['happiness_sum'][iprd] = (self._score_table['happiness_sum'][iprd-1] if iprd > 0 else 0) + self._score_table['happiness'][iprd]
+        self._score_table['score'][iprd] = self._score_table['happiness_sum'][iprd] / (iprd+1)
 
         # bankrupt condition: wealth excluding student debt is less than -2 times annual income
         self.bankrupt = self._score_table['wealth'][iprd]+self._score_table['debt_std'][iprd] < -2*annual_salary
@@ -418,6 +632,32 @@ class Player:
         else:
             self.__dict__[name] = value
         
+class Checkpoint:
+    """Represents the state of a player at the end of a simulation period: the values the simulation of the next period starts from.
+    Checkpoints are only saved while the player is not bankrupt, because a bankrupt player is not simulated any more."""
+
+    def __init__(self, score_table, period):
+        """Represents the state of a player at the end of a simulation period
+
+        Input Arguments
+        ---------------
+        score_table:    required ScoreTable of the player that has the period
+        period:         required int. The simulation period.
+        """
+        import numpy as np
+
+        self.period = period
+        self.wealth = score_table['wealth'][period]
+        self.debt = score_table['debt'][period]
+        self.asset = score_table['asset'][period]
+        # cumulative happiness. The score is this sum divided by the number of periods
+        self.happiness_sum = score_table['happiness_sum'][period]
+        # the happiness spending of the last periods of the rolling month (see mth_spd_hapns)
+        self.spd_on_hapns = np.array(score_table['spd_on_hapns'][max(0,period-NPeriodsPerMonth+2):(period+1)])
+
+    def __repr__(self):
+        return f'Checkpoint(period={self.period}, wealth={self.wealth}, happiness_sum={self.happiness_sum})'
+
 # this class below functionally provides the ability to add additional logic when a dictionary is modified.
 # we use this implementation to introduce Python's data model. Please refer to the following link for an in depth read:
 # https://docs.python.org/3.11/reference/datamodel.html
@@ -506,6 +746,11 @@ class RestrictedDict():
         from inspect import signature
         return len(signature(func).parameters) == n_args
 
+    def copy(self):
+        """returns a shallow copy of the dictionary with the same restriction functions. The functions are not called for the copied content."""
+        rtn = RestrictedDict(on_get=self._on_get, on_set=self._on_set, on_delete=self._on_delete, init_dict=dict(self._data))
+        return rtn
+
     # implements the in operator. to learn more, 
     # see https://docs.python.org/3.11/reference/datamodel.html#object.__contains__
     def __contains__(self, item):
@@ -0,0 +1,251 @@
+# Copyright (C) 2023, Bank of America.  The file below is licensed to LSC for use with HSoF.  All other rights are reserved.
+"""This file defines the offline solver that finds the AI player's choices for the whole game, and the policy table that keeps them.
+The AI search of Prosperville only looks at the current turn (see Prosperville.__simulate_for_ai).
+The solver looks at all turns of the game at once: it plays every combination of options of every option turn and every random event of every random event turn,
+then picks, working backwards from the end of the game, the combination of each turn with the best expected score at the end of the game (dynamic programming).
+
+Each turn is played the same way the game plays the AI player's turn (see Prosperville.play_turn), so the solver reaches the same states as the AI player in a game.
+Like every AI search of the game, the solver prefers the choices that do not go bankrupt: 
+a state is valued by its probability of bankruptcy first and its expected final score second (see backend.expectimax.pick_best_expected).
+
+Playing every path of the game is not possible (about 10 to the power of 11 paths), so the players are compressed into states:
+    the turn, the wealth rounded to a bucket (wealth_bucket), the score rounded to a bucket (score_bucket),
+    and the backend objects that are still active (the objects of earlier turns that have no effect any more are left out).
+Two paths that reach the same state are played on as one. A bankrupt state is not played on: its final score is its score at the bankruptcy.
+At most max_states surviving states are kept in each turn, the ones with the highest scores. The others are not played on.
+A state that is left out gets the value of the kept state of the same turn with the closest wealth: the same probability of bankruptcy, 
+and its own score so far plus the score the kept state still gains until the end of the game. 
+The policy is therefore the best one up to the compression and the state limit.
+
+The policy table maps each state at an option turn to its best combination of options. It is saved as a JSON file,
+and a game created with Prosperville(ai_policy=...) makes the AI player look up its choices in the table instead of searching.
+The table is solved for one set of game definitions, initial cash and random event weights. It cannot be used with any other.
+
+The solver is run from a terminal:
+    python -m backend.policy --max-states 200 --out policy.json
+
+Learning tip:
+What is dynamic programming?
+See: https://en.wikipedia.org/wiki/Dynamic_programming
+"""
+
+import os
+
+# the format version of the policy table. Increase it when the content or the layout of the file changes
+PolicyVersion = 2
+
+# the default location of the policy table
+PolicyPath = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'design', 'policy.json')
+
+class PolicyTable:
+    """Represents the best combination of options of each state at each option turn of the game"""
+
+    def __init__(self, settings, policy=None, value=None, bankruptcy=None):
+        """Represents the best combination of options of each state at each option turn of the game
+
+        Input Arguments
+        ---------------
+        settings:   required dictionary with the settings the table was solved with:
+                    init_cash, rand_event_weight, wealth_bucket, score_bucket, max_states
+        policy:     optional dictionary of {'choice': option indices by event name, 'bankruptcy': probability of bankruptcy, 'value': expected final score} 
+                    keyed by state (see state_key)
+        value:      optional float. The expected final score of the game when the AI follows the policy.
+        bankruptcy: optional float. The probability that the AI goes bankrupt when it follows the policy.
+        """
+        self.settings = settings
+        self.policy = dict() if policy is None else policy
+        self.value = value
+        self.bankruptcy = bankruptcy
+
+    def __len__(self):
+        return len(self.policy)
+
+    @staticmethod
+    def first_period(iTurn):
+        """Returns the first period of a turn, or the number of periods of the game for the turn after the last turn"""
+        import backend.gameitems as gamedef
+        return gamedef.first_period_of_turn[iTurn] if iTurn < len(gamedef.first_period_of_turn) else len(gamedef.step_table['period_first'])
+
+    @staticmethod
+    def wealth_and_score(player, iTurn):
+        """Returns the wealth and the score of a player at the end of the period before a turn starts"""
+        # the first period of the turn. The periods before it have been simulated
+        period = PolicyTable.first_period(iTurn)
+        if period == 0:
+            return float(player.init_cash), 0.0
+        # a player who went bankrupt has no periods after the bankruptcy
+        iLast = min(period, len(player._score_table)) - 1
+        return float(player._score_table['wealth'][iLast]), float(player._score_table['score'][iLast])
+
+    def state_key(self, player, iTurn):
+        """Returns the state (a str) of a player at the start of a turn"""
+        import hashlib
+
+        period = PolicyTable.first_period(iTurn)
+        wealth, score = PolicyTable.wealth_and_score(player, iTurn)
+        # the objects that still have an effect from the start of the turn
+        active = sorted((c.key, int(c.start_period), round(float(c.amount), 2)) for c in player.selected_bked_objs if c.start_period + c.n_periods > period)
+        state = (iTurn, int(wealth // self.settings['wealth_bucket']), int(score // self.settings['score_bucket']), bool(player.bankrupt), active)
+        return hashlib.sha1(repr(state).encode()).hexdigest()
+
+    def lookup(self, player, iTurn):
+        """Returns the best choices (option indices by event name) of a player at the start of an option turn, or None if the player's state is not in the table.
+        The solver plays the turns the same way the game plays the AI player's turns (see Prosperville.play_turn), so only the player's own state is looked up."""
+        key = self.state_key(player, iTurn)
+        if key in self.policy:
+            return dict(self.policy[key]['choice'])
+        return None
+
+    def check(self, init_cash, rand_event_weight):
+        """Raises an error if the table was solved for other game definitions, initial cash or random event weights"""
+        from backend.gameartifact import source_hash
+
+        if self.settings['hash'] != source_hash():
+            raise ValueError('The policy table was solved for different game definitions. Solve it again with "python -m backend.policy".')
+        if self.settings['init_cash'] != init_cash or self.settings['rand_event_weight'] != rand_event_weight:
+            raise ValueError(f'The policy table was solved with init_cash={self.settings["init_cash"]} and rand_event_weight={self.settings["rand_event_weight"]}.')
+
+    def save(self, path=PolicyPath):
+        """Saves the table as a JSON file"""
+        import json
+        with open(path, 'w') as f:
+            json.dump({'version': PolicyVersion, 'settings': self.settings, 'value': self.value, 'bankruptcy': self.bankruptcy, 'policy': self.policy}, f)
+
+    @staticmethod
+    def load(path=PolicyPath):
+        """Loads a table saved by PolicyTable.save"""
+        import json
+        with open(path) as f:
+            content = json.load(f)
+        if content.get('version') != PolicyVersion:
+            raise ValueError(f'{path} is not a policy table of version {PolicyVersion}. Solve it again with "python -m backend.policy".')
+        return PolicyTable(content['settings'], content['policy'], content['value'], content['bankruptcy'])
+
+def solve(max_states=200, wealth_bucket=5000.0, score_bucket=1.0, init_cash=0.0, rand_event_weight=None, progress=None):
+    """Solves the policy table of the AI player for the whole game.
+
+    Input Arguments
+    ---------------
+    max_states:         optional int. The maximum number of surviving states kept in each turn. The states with the highest scores are kept.
+    wealth_bucket:      optional float. Size of the wealth buckets of the states.
+    score_bucket:       optional float. Size of the score buckets of the states.
+    init_cash:          optional float. The initial cash of the games the table is used in.
+    rand_event_weight:  optional dictionary of random event weights by stage name of the games the table is used in (see Prosperville).
+    progress:           optional function called with (turn index, number of states in the turn) as each turn is solved.
+
+    Output Argument
+    ---------------
+    a PolicyTable object
+    """
+    import bisect
+    from backend.prosperville import Prosperville
+    from backend.gameartifact import source_hash
+    from backend.expectimax import pick_best_expected
+
+    table = PolicyTable({'hash': source_hash(), 'init_cash': init_cash, 'rand_event_weight': rand_event_weight
+                         , 'wealth_bucket': wealth_bucket, 'score_bucket': score_bucket, 'max_states': max_states})
+    # the game the turns are played in. It has the AI player only
+    game = Prosperville(player_names=[], init_cash=init_cash, rand_event_weight=rand_event_weight, ai_search='brute_force')
+
+    # play forward. states[t] has the surviving players at the start of turn t by state.
+    # branches[t] has the branches of each state of turn t: a list of (option indices or probability, state at the start of turn t+1)
+    states = [{table.state_key(game.players[-1], 0): game.players[-1]}]
+    branches = []
+    # the (bankruptcy indicator, final score) of each state that is not played on: bankrupt players and the end of the game
+    final = dict()
+    # dropped[t] has the (wealth, score) of the surviving states of turn t that are left out by max_states, by state. See the description of this file
+    dropped = [dict()]
+    for iTurn in range(game.n_turns):
+        event_names, options, random_events = game.turn_options(iTurn)
+        crntBranches, nextStates = dict(), dict()
+        for crntKey, crntPlayer in states[iTurn].items():
+            if len(options) > 0:
+                # one branch per feasible combination of options (see backend/constraints.py)
+                played = [(c, game.play_turn(crntPlayer, iTurn, choice=dict(zip(event_names, c))))
+                          for c in game.option_constraints.feasible_combinations(event_names, options, crntPlayer.choices._data)]
+            elif len(random_events) > 0:
+                # one branch per random event that can be drawn
+                played = [(p, game.play_turn(crntPlayer, iTurn, random_event=c)) for c, p in random_events.items() if p > 0]
+            else:
+                played = [(1.0, game.play_turn(crntPlayer, iTurn))]
+            crntBranches[crntKey] = []
+            for crntLabel, nextPlayer in played:
+                if nextPlayer is None: # the combination is not feasible
+                    continue
+                nextKey = table.state_key(nextPlayer, iTurn+1)
+                if nextPlayer.bankrupt:
+                    # a bankrupt player is not played on. Its score does not change any more
+                    final.setdefault(nextKey, (1.0, float(nextPlayer.score)))
+                else:
+                    # the first player that reaches a state represents it
+                    nextStates.setdefault(nextKey, nextPlayer)
+                crntBranches[crntKey].append((crntLabel, nextKey))
+            if len(crntBranches[crntKey]) == 0: # no combination is feasible. The player is not played on
+                del crntBranches[crntKey]
+                final[crntKey] = (float(crntPlayer.bankrupt), float(crntPlayer.score))
+        branches.append(crntBranches)
+
+        # keep the surviving states with the highest scores. The states of a turn have all played the same turns, so their scores can be compared.
+        # the other states are valued after the kept states of the turn are valued (see below)
+        ranked = sorted(nextStates, key=lambda k: nextStates[k].score, reverse=True)
+        dropped.append({k: table.wealth_and_score(nextStates[k], iTurn+1) for k in ranked[max_states:]})
+        nextStates = {k: nextStates[k] for k in ranked[:max_states]}
+        states.append(nextStates)
+        if progress is not None:
+            progress(iTurn, len(nextStates))
+    for crntKey, crntPlayer in states[-1].items():
+        final[crntKey] = (float(crntPlayer.bankrupt), float(crntPlayer.score))
+
+    # work backwards: the value of a state is its (probability of bankruptcy, expected final score) when the best combination is picked at every option turn
+    value = dict(final)
+    for iTurn in reversed(range(game.n_turns)):
+        # value the states of the next turn that were left out by the kept state with the closest wealth.
+        # a left out state keeps its own score so far, and gains the score the kept state gains from the start of the turn to the end of the game
+        if len(dropped[iTurn+1]) > 0:
+            kept = sorted((*table.wealth_and_score(c, iTurn+1), k) for k, c in states[iTurn+1].items())
+            kept_wealth = [c[0] for c in kept]
+            for crntKey, (wealth, score) in dropped[iTurn+1].items():
+                iKept = bisect.bisect_left(kept_wealth, wealth)
+                iKept = min([c for c in [iKept-1, iKept] if 0 <= c < len(kept)], key=lambda c: abs(kept_wealth[c] - wealth))
+                _, kept_score, kept_key = kept[iKept]
+                value[crntKey] = (value[kept_key][0], score + value[kept_key][1] - kept_score)
+
+        event_names, options, random_events = game.turn_options(iTurn)
+        for crntKey, crntBranches in branches[iTurn].items():
+            if len(options) > 0:
+                # the best combination, the same way as the AI searches of the game pick it. Among equal values, the first one in the order of itertools.product is kept
+                bestChoice = pick_best_expected([c for c, _ in crntBranches], [value[k] for _, k in crntBranches])
+                value[crntKey] = value[dict(crntBranches)[bestChoice]]
+                table.policy[crntKey] = {'choice': dict(zip(event_names, bestChoice)), 'bankruptcy': value[crntKey][0], 'value': value[crntKey][1]}
+            else:
+                # the expected values over the random events. The probabilities of the feasible branches add up to 1
+                total = sum(p for p, _ in crntBranches)
+                value[crntKey] = (sum(p * value[k][0] for p, k in crntBranches) / total, sum(p * value[k][1] for p, k in crntBranches) / total)
+    table.bankruptcy, table.value = value[next(iter(states[0]))]
+    game.close()
+    return table
+
+def main(args=None):
+    """the command line entry point. Run "python -m backend.policy --help" for the arguments."""
+    import sys, json, argparse
+
+    parser = argparse.ArgumentParser(prog='python -m backend.policy', description='Solves the AI player\'s choices for the whole Prosperville game and saves them as a policy table.')
+    parser.add_argument('--max-states', type=int, default=200, help='maximum number of states kept in each turn')
+    parser.add_argument('--wealth-bucket', type=float, default=5000.0, help='size of the wealth buckets of the states')
+    parser.add_argument('--score-bucket', type=float, default=1.0, help='size of the score buckets of the states')
+    parser.add_argument('--init-cash', type=float, default=0.0, help='initial cash of the games the table is used in')
+    parser.add_argument('--event-weights', default=None, help='JSON file with random event weights by stage name')
+    parser.add_argument('--out', default=PolicyPath, help='file to save the policy table to')
+    args = parser.parse_args(args)
+
+    rand_event_weight = None
+    if args.event_weights is not None:
+        with open(args.event_weights) as f:
+            rand_event_weight = json.load(f)
+    table = solve(args.max_states, args.wealth_bucket, args.score_bucket, args.init_cash, rand_event_weight
+                  , progress=lambda iTurn, n_states: print(f'turn {iTurn}: {n_states} states', file=sys.stderr))
+    table.save(args.out)
+    print(f'Saved {len(table)} states to {args.out}. Expected final score: {table.value:.2f}. Probability of bankruptcy: {table.bankruptcy:.2%}.')
+
+if __name__ == '__main__':
+    main()
@@ -1,31 +1,55 @@
 # Copyright (C) 2023, Bank of America.  The file below is licensed to LSC for use with HSoF.  All other rights are reserved.
 """This file defines the main backend engine of the game. 
-It contains two entities: the Prosperville class and a variable crntGame. 
-The Prosperville class maintains the most of the backend logic 
-while the crntGame variable is mainly used to store the current running instance of the Prosperville class.
+The Prosperville class maintains the most of the backend logic. 
+Each running game is an instance of the Prosperville class. The running games of a process are kept in game sessions (see backend/session.py).
 
 Learning tip: 
 What is the difference between a class and an instance? 
 See: https://stackoverflow.com/questions/2885385/what-is-the-difference-between-an-instance-and-an-object
 """
 
-import copy
 import backend.gameitems as gamedef 
+import backend.effects as effects
+
+# the changes of the game state that Prosperville.next and Prosperville.back notify the listeners of (see Prosperville.add_listener)
+#   player:     the current player changed
+#   step:       the current step changed (and with it the current event, and possibly the turn and the stage)
+#   turn:       the current turn changed
+#   stage:      the current stage changed
+#   scores:     the players were simulated, so their scores, stats and score tables changed
+#   ranking:    the ranking of the human players changed
+#   end:        the game ended
+GameChanges = ('player', 'step', 'turn', 'stage', 'scores', 'ranking', 'end')
 
 class Prosperville:
     """Represents the backend logic of the game Prosperville."""
 
-    def __init__(self, player_names=['player 1', 'player 2'], init_cash=0.0):
+    def __init__(self, player_names=['player 1', 'player 2'], init_cash=0.0, sim_engine='numpy', schedule_engine='numpy', ai_search='branch_and_bound', ai_workers=0, rand_event_weight=None, seed=None, ai_policy=None, metrics=None):
         """Represents the backend logic of the game Prosperville.
         
         Input Arguments
         ---------------
         player_names:  a list of player names. 
         cash:          the amount of cash that all players have at the start of the game
+        sim_engine:    the simulation implementation used by all players. 'numpy' for the vectorized kernel (backend/simkernel.py) or 'python' for the period-by-period loop.
+        schedule_engine: the implementation used when the game recalculates a backend object schedule. 'numpy' for backend/schedule.py or 'python' for the loops in the backend object classes.
+        ai_search:     how the AI player searches for its best choices. 'branch_and_bound' for the search in backend/optimizer.py or 'brute_force' to simulate every combination of options.
+                       'expectimax' simulates every combination with every draw of the stage's random events that are not drawn yet, and picks the best expected score (see backend/expectimax.py).
+        ai_workers:    number of worker processes that evaluate the AI player's choice combinations in parallel (see backend/aipool.py). 0 evaluates them in this process.
+                       Sending a turn to the workers costs a few milliseconds per round of evaluations, and the best combination is simulated once more in this process.
+                       With the game definitions (at most about 100 combinations per turn), the AI search in the workers was slower than in this process,
+                       so only the turns with at least AIPool.MinCombinations feasible combinations are sent to the workers.
+        rand_event_weight: optional dictionary of random event weights by stage name. It replaces rand_event_weight of the stage definitions (backend/design/stagedef.py) for this game only.
+        seed:          optional seed of the game's random number generator. The same seed reproduces the same random events. None draws a fresh seed from the operating system.
+        ai_policy:     optional policy table of the whole game (see backend/policy.py): a PolicyTable object or the path of a saved table. 
+                       The AI player makes the choices of the table when its state is in the table, and searches with ai_search otherwise.
+        metrics:       optional. True records how long each phase of every turn takes in self.metrics.records (see backend/metrics.py). 
+                       A str also appends each record to the JSON lines file at that path. None (default) records nothing.
 
         """
 
         from backend.player import Player
+        from backend.steptable import StepTable
         
         # indices that indicate the current turn, stage, player and step the game is at
         self.iTurn = 0
@@ -41,9 +65,9 @@ class Prosperville:
 
         # expose game definitions
         # this table contains the info about what stage / turn / event each step corresponds to
-        # we use a deep copy here because we need to insert random event names to the table when these events are drawn.
-        # to learn more about deep copy vs shallow copy, see https://stackoverflow.com/questions/62349558/mutable-and-inmutable-deep-shallow-copies-python
-        self.step_table = copy.deepcopy(gamedef.step_table) 
+        # the table is shared by all games. Random event names are inserted to the table when these events are drawn. 
+        # StepTable keeps these names for this game only, so the shared table is not copied (see backend/steptable.py)
+        self.step_table = StepTable(gamedef.step_table) 
         # these lists define the first / last of something. They are used in loops to quickly find all elements of an entity. 
         self.last_step_of_stage = gamedef.last_step_of_stage # list index: stage index. list value: index of the first step of the stage
         self.last_turn_of_stage = gamedef.last_turn_of_stage # list index: turn index. list value: index of the last turn of the stage
@@ -57,9 +81,58 @@ class Prosperville:
         # for the content of the elements in them, please refer to stagedef.py and eventdef.py files in backend/design
         self.stage_by_name = gamedef.dict_stages
         self.event_by_name = gamedef.dict_events
+        # the options that cannot be chosen together (see backend/constraints.py)
+        self.option_constraints = gamedef.option_constraints
+
+        import numpy as np
+        # probability of each random event of a stage by stage name. See __draw_all_random_events
+        self.rnd_evt_prob = {c.name: c.backend['rnd_evt_prob'] for c in gamedef.pvStages if c.n_random_event_turn != 0}
+        if rand_event_weight is not None:
+            for crntStageNm, crntWeights in rand_event_weight.items():
+                if crntStageNm not in self.rnd_evt_prob:
+                    raise ValueError(f'Stage "{crntStageNm}" in rand_event_weight does not exist or has no random event.')
+                if len(crntWeights) != len(self.stage_by_name[crntStageNm].random_event):
+                    raise ValueError(f'rand_event_weight for stage "{crntStageNm}" should have {len(self.stage_by_name[crntStageNm].random_event)} elements.')
+                self.rnd_evt_prob[crntStageNm] = np.array(crntWeights) / sum(crntWeights)
+
+        # the random number generator of the game. Each game owns its generator, so games do not affect each other's random events
+        # for more details on numpy random number generators, please refer to https://numpy.org/doc/stable/reference/random/generator.html
+        self.seed = seed
+        self.rng = np.random.default_rng(seed)
+        # the random events of all random event steps are drawn now. 
+        # A drawn event is only written to the step table when the game reaches its step, so the AI cannot see it ahead of time.
+        self.__drawn_events = self.__draw_all_random_events()
 
         # create player objects and save in a list. The last player on the list is AI. 
-        self.players = [Player(pn, self, init_cash=init_cash) for pn in player_names] + [Player('AI',self,is_system=True, init_cash=init_cash)]
+        from backend.schedule import ScheduleEngines
+        if schedule_engine not in ScheduleEngines:
+            raise ValueError(f'schedule_engine should be one of {ScheduleEngines}. "{schedule_engine}" is given.')
+        self.schedule_engine = schedule_engine
+        if ai_search not in ['branch_and_bound', 'brute_force', 'expectimax']:
+            raise ValueError(f'ai_search should be one of "branch_and_bound", "brute_force" or "expectimax". "{ai_search}" is given.')
+        self.ai_search = ai_search
+        # counts of option combinations the AI search evaluated / pruned in the last turn. See backend.optimizer.SearchStats
+        self.ai_search_stats = None
+        if not isinstance(ai_workers, int) or ai_workers < 0:
+            raise ValueError(f'ai_workers should be a non-negative integer. "{ai_workers}" is given.')
+        self.ai_workers = ai_workers
+        # the process pool is started the first time the AI needs it. See self.close
+        self.__ai_pool = None
+        self.sim_engine = sim_engine
+        # the policy table the AI player looks up its choices in. It must be solved for the same initial cash and random event weights as the game
+        if isinstance(ai_policy, str):
+            from backend.policy import PolicyTable
+            ai_policy = PolicyTable.load(ai_policy)
+        if ai_policy is not None:
+            ai_policy.check(init_cash, rand_event_weight)
+        self.ai_policy = ai_policy
+        # the latency metrics of the turns. None if the game does not record them
+        if metrics is None or metrics is False:
+            self.metrics = None
+        else:
+            from backend.metrics import GameMetrics
+            self.metrics = GameMetrics(None if metrics is True else metrics)
+        self.players = [Player(pn, self, init_cash=init_cash, sim_engine=sim_engine) for pn in player_names] + [Player('AI',self,is_system=True, init_cash=init_cash, sim_engine=sim_engine)]
         
         # a list of player index in self.players based on the score ranking of human players. 
         # for example, if player 2 is the highest scored player, its index 2 is the first element in self.ranked_players.
@@ -77,7 +150,7 @@ class Prosperville:
         # expose numbers of elements. these fields are primarily for front end.
         self.n_players = len(player_names) # number of human players
         self.n_stages = len(gamedef.pvStages) # number of stages in the game
-        self.n_turns = gamedef.step_table['turn'][-1]+1 # number of turns in the game
+        self.n_turns = int(gamedef.step_table['turn'][-1])+1 # number of turns in the game
         self.n_steps = len(gamedef.step_table['turn']) # number of steps in the game
         # number of players who are not bankrupt in the game
         self.n_players_survived = self.n_players 
@@ -85,6 +158,9 @@ class Prosperville:
         # a boolean value to indicate if the game has reached the end
         self.is_end = False
 
+        # the functions that are called with the set of changes (see GameChanges) each time next or back changes the game state
+        self.__listeners = []
+
         
         
     @property
@@ -95,7 +171,18 @@ class Prosperville:
     @property
     def is_random_event_step(self):
         """gets a boolean value that indicates if the current step is a random event step"""
-        return self.step_table['is_random_event_step'][self.iStep]
+        return bool(self.step_table['is_random_event_step'][self.iStep])
+
+    @property
+    def sim_stats(self):
+        """gets the simulation counts of all players added together (see Player.sim_stats):
+        the periods calculated, the periods reused from checkpoints and the number of restarts from a checkpoint.
+        The AI's candidate evaluations in worker processes (ai_workers) are not counted."""
+        rtn = {'periods_simulated': 0, 'periods_reused': 0, 'checkpoint_restarts': 0}
+        for crntPlayer in self.players:
+            for k in rtn:
+                rtn[k] += crntPlayer.sim_stats[k]
+        return rtn
 
     @property
     def is_last_player(self):
@@ -118,16 +205,29 @@ class Prosperville:
         # a stage may have multiple turns. 
 
 
+        # the state before the move, to find what changed (see self.__notify_changes)
+        before, scored = self.__change_state(), False
+
         # if the game is at last step of the current turn
         if self.iStep == self.last_step_of_turn[self.iTurn]:
             if self.is_last_player: # if the current player is the last player to play, this is when a turn ends
+                scored = True
+                # time the phases of the turn if the game records metrics
+                if self.metrics is not None:
+                    self.metrics.begin_turn(self)
                 # simulate and calculate the score for each human player
                 self.__score_players()
+                if self.metrics is not None:
+                    self.metrics.end_phase('score_players')
                 # rank human players
                 self.ranked_players = self.__rank_players()
+                if self.metrics is not None:
+                    self.metrics.end_phase('rank_players')
                 # make choices for the AI, then score the AI choices. 
                 # AI makes the best choice among all the options to maximize the score at the end of the current stage. 
                 self.__simulate_for_ai()
+                if self.metrics is not None:
+                    self.metrics.end_phase('simulate_for_ai')
 
             # if the game reached the end: because either no one survived or there is no more step left in the game
             if self.n_players_survived ==0 \
@@ -159,17 +259,55 @@ class Prosperville:
             self.iStep += 1 
         
         # update the corresponding stage and turn counters
-        self.iStage, self.iTurn = self.step_table['stage'][self.iStep], self.step_table['turn'][self.iStep]
+        self.iStage, self.iTurn = int(self.step_table['stage'][self.iStep]), int(self.step_table['turn'][self.iStep])
         
         # update the definition objects so the front end modules can correctly display them
         self.__update_crnt_objs()
-            
+        if self.metrics is not None and self.metrics.in_turn:
+            self.metrics.end_phase('update_crnt_objs')
+            self.metrics.end_turn()
+        self.__notify_changes(before, scored)
+
+    def add_listener(self, listener):
+        """Registers a function that is called with a set of the names of the changes (see GameChanges) each time next or back changes the game state. 
+        The front end uses it to render only the areas whose content changed (see gui/footer.py)."""
+        self.__listeners.append(listener)
+
+    def remove_listener(self, listener):
+        """Stops calling a function registered with add_listener"""
+        if listener in self.__listeners:
+            self.__listeners.remove(listener)
+
+    def __change_state(self):
+        """returns the fields of the game state that the changes in GameChanges are found from"""
+        return {'player': self.iPlayer, 'step': self.iStep, 'turn': self.iTurn, 'stage': self.iStage, 'ranking': list(self.ranked_players), 'end': self.is_end}
+
+    def __notify_changes(self, before, scored=False):
+        """calls the listeners with the changes between a state returned by self.__change_state and the current state. 
+        scored indicates if the players were simulated. The listeners are not called if nothing changed."""
+        after = self.__change_state()
+        changes = {c for c in after if after[c] != before[c]}
+        if scored:
+            changes.add('scores')
+        if len(changes) > 0:
+            for crntListener in list(self.__listeners):
+                crntListener(changes)
+
+    def close(self):
+        """Stops the worker processes of the AI player if there are any. The game can still be played afterwards; the pool is started again when needed."""
+        if self.__ai_pool is not None:
+            self.__ai_pool.close()
+            self.__ai_pool = None
+
     def back(self):
         """requests to move the game backwards. The request may not be accepted if the game is at the beginning of a turn for the first player."""
         
         if not self.can_step_back:
             return
         
+        # the state before the move, to find what changed (see self.__notify_changes)
+        before = self.__change_state()
+
         if self.iStep == self.first_step_of_turn[self.iTurn]: 
             # if the game is at first step of the turn, move player back
             self.__progress_player(back=True)
@@ -179,10 +317,11 @@ class Prosperville:
             self.iStep -= 1
             
         # update the corresponding stage and turn counters based on the newly set step counter according to the step table
-        self.iStage, self.iTurn = self.step_table['stage'][self.iStep], self.step_table['turn'][self.iStep]
+        self.iStage, self.iTurn = int(self.step_table['stage'][self.iStep]), int(self.step_table['turn'][self.iStep])
         
         # update the current object fields
         self.__update_crnt_objs()
+        self.__notify_changes(before)
 
     def __progress_player(self, back=False):
         """Progresses current player counter (iPlayer field) to the next player. If all human players are bankrupt, the player counter does not change."""
@@ -233,24 +372,22 @@ class Prosperville:
 
     def __score_players(self):
         """Score all human players up to the end of the turn"""
-        # loop through all surviving players
-        iplyr = 0
-        while iplyr < len(self.players_survived):
-            crntPlayer = self.players_survived[iplyr]
-            # add backend objects relevant to the current turn to the player in the loop 
+        from backend.player import Player
+
+        # add backend objects relevant to the current turn to all surviving players
+        for crntPlayer in self.players_survived:
             self.___add_bkedobj_2_player(crntPlayer, self.iTurn, self.iTurn)
-            # simulate all periods corresponding to the current turn for the current player in the loop
-            crntPlayer.simulate(gamedef.first_period_of_turn[self.iTurn], gamedef.last_period_of_turn[self.iTurn])
-            
-            # if the current player in the loop goes bankrupt after the simulation
-            if crntPlayer.bankrupt:
-                # reduce the surviver count, and remove the current player from the surviver list
-                self.n_players_survived -= 1
-                self.players_survived.remove(crntPlayer)
-                # note that because we removed a player in the list, the current counter iplyr now points to the player next to the player we just removed
-            else: # if the current player in the loop is not bankrupt after the simulation
-                # progresses to the next player in the loop
-                iplyr += 1
+        # simulate all periods corresponding to the current turn for all surviving players at once. 
+        # the players are the rows of the arrays of one batch (see Player.simulate_batch)
+        if self.metrics is None:
+            Player.simulate_batch(self.players_survived, gamedef.first_period_of_turn[self.iTurn], gamedef.last_period_of_turn[self.iTurn])
+        else:
+            self.metrics.simulate(self.players_survived, gamedef.first_period_of_turn[self.iTurn], gamedef.last_period_of_turn[self.iTurn])
+
+        # remove the players that went bankrupt in this turn from the surviver list, and reduce the surviver count
+        for crntPlayer in [c for c in self.players_survived if c.bankrupt]:
+            self.n_players_survived -= 1
+            self.players_survived.remove(crntPlayer)
 
         # if there is still surviver
         if self.n_players_survived > 0:
@@ -274,68 +411,122 @@ class Prosperville:
         # get a list of event names for all the steps of the turns
         evt_names = [self.step_table['event_name'][i] for i in range(self.first_step_of_turn[first_turn], self.last_step_of_turn[last_turn]+1)] 
 
+        # the game never simulates the periods before the current stage again, so the objects cannot change them
+        period_floor = gamedef.first_period_of_turn[self.first_turn_of_stage[self.iStage]]
         for crntEvtNm in evt_names: # loop through each event name
-            
-            # gather backend objects according to choices
-            if crntEvtNm in crntPlayer.choices: 
-                # if the event name is in the player choice dictionary, meaning if the player has made a choice for the event
-                # note not all events have choices
-
-                # get the option definition corresponding to the player's choice
-                crntOPtionDef = self.event_by_name[crntEvtNm].options[crntPlayer.choices[crntEvtNm]]
-                # some choices do not have a backend object. This usually happens if the choice does nothing, eg: Q:do you want to take a part time job? A: No. 
-                if crntOPtionDef.name not in gamedef.pvBkEndObj_by_name: continue
-
-                # get the backend object indexed by the option definition name
-                bkedObj_list = gamedef.pvBkEndObj_by_name[crntOPtionDef.name]
-            elif crntEvtNm in gamedef.pvBkEndObj_by_name:
-                # if the event has a backend object of its own (eg random event)
-                bkedObj_list = gamedef.pvBkEndObj_by_name[crntEvtNm]
-            else: # this happens when we simulate ahead of the game play for AI (eg when random events are not drawn for the current stage)
-                continue
-
-            # add gathered backend objects to the current player
-            for bkedObj in bkedObj_list:
-                if bkedObj.start_period == -1: # if event start period is not set
-                    # set event start period to the current period of the step
-                    bkedObj = copy.deepcopy(bkedObj)
-                    bkedObj.start_period = self.step_table['period_first'][self.iStep]
-                
-                # special logic for the first job: adjust salary if college degree
-                if crntEvtNm == 'stg2_firstjob' and bkedObj.type=='salary' and 'stg1_college' in crntPlayer.choices:
-                    college_option_name = self.event_by_name['stg1_college'].options[crntPlayer.choices['stg1_college']].name
-                    # if the player in stage 1 chose public school
-                    if college_option_name in ['stg1_college_public_in_state', 'stg1_college_public_out_state']:
-                        bkedObj = copy.deepcopy(bkedObj)
-                        bkedObj.amount = bkedObj.amount * 1.1
-                        bkedObj.calculate_schedule()
-                    elif college_option_name == 'stg1_college_ivy_league':
-                        bkedObj = copy.deepcopy(bkedObj)
-                        bkedObj.amount = bkedObj.amount * 1.15
-                        bkedObj.calculate_schedule()
-
-                # special logic for the second house buying event
-                if 'stg2_firsthouse_rent' in crntPlayer.choices \
-                    and ('stg3_house_small' in crntPlayer.choices or 'stg3_house_mid' in crntPlayer.choices or 'stg3_house_big' in crntPlayer.choices) \
-                    and bkedObj.type=='salary':
-                    # if the player rent in stage 2 (no house) and bought a house in stage 3, the new house is a first house for the player
-                    # we need to remove the rental income by ignoring it in the loop
-                    continue
-                
-                # add the backend object to the player's list so that the simulation can take into account this object
-                crntPlayer.selected_bked_objs.append(bkedObj)
+            # add gathered backend objects to the player's list so that the simulation can take into account these objects
+            crntPlayer.add_bked_objs(self.__get_event_bkedobjs(crntPlayer, crntEvtNm), period_floor=period_floor)
 
         # since class objects are mutable, returning the player object is technically redundant. 
         # Read below to see why:
         # https://www.mygreatlearning.com/blog/understanding-mutable-and-immutable-in-python/
         return crntPlayer
 
+    def __get_event_bkedobjs(self, crntPlayer, crntEvtNm, iOption=None, iStep=None):
+        """Returns the list of backend objects that an event adds to a given player
+
+        Input Arguments
+        ---------------
+        crntPlayer:     a Player object 
+        crntEvtNm:      name of the event
+        iOption:        optional int. Index of the option of the event. If None, the player's choice for the event is used.
+        iStep:          optional int. The step the event takes place at. Objects without a start period start at the first period of the step. Defaults to the current step.
+        """
+
+        rtn_list = []
+        # gather backend objects according to choices
+        if iOption is not None or crntEvtNm in crntPlayer.choices: 
+            # if an option is given or the event name is in the player choice dictionary, meaning if the player has made a choice for the event
+            # note not all events have choices
+
+            # get the option definition corresponding to the player's choice
+            crntOPtionDef = self.event_by_name[crntEvtNm].options[crntPlayer.choices[crntEvtNm] if iOption is None else iOption]
+            # some choices do not have a backend object. This usually happens if the choice does nothing, eg: Q:do you want to take a part time job? A: No. 
+            if crntOPtionDef.name not in gamedef.pvBkEndObj_by_name: return rtn_list
+
+            # get the backend object indexed by the option definition name
+            bkedObj_list = gamedef.pvBkEndObj_by_name[crntOPtionDef.name]
+        elif crntEvtNm in gamedef.pvBkEndObj_by_name:
+            # if the event has a backend object of its own (eg random event)
+            bkedObj_list = gamedef.pvBkEndObj_by_name[crntEvtNm]
+        else: # this happens when we simulate ahead of the game play for AI (eg when random events are not drawn for the current stage)
+            return rtn_list
+
+        # add gathered backend objects to the current player
+        for bkedObj in bkedObj_list:
+            # the start period and the amount the object has for this player. The objects are shared, so they are never changed here.
+            # an object that needs a different start period or amount is replaced by its copy from backend.effects, which is made once per process
+            crnt_start_period, crnt_amount = bkedObj.start_period, bkedObj.amount
+            if bkedObj.start_period == -1: # if event start period is not set
+                # set event start period to the current period of the step
+                crnt_start_period = int(self.step_table['period_first'][self.iStep if iStep is None else iStep])
+
+            # special logic for the first job: adjust salary if college degree
+            if crntEvtNm == 'stg2_firstjob' and bkedObj.type=='salary' and 'stg1_college' in crntPlayer.choices:
+                college_option_name = self.event_by_name['stg1_college'].options[crntPlayer.choices['stg1_college']].name
+                # if the player in stage 1 chose public school
+                if college_option_name in ['stg1_college_public_in_state', 'stg1_college_public_out_state']:
+                    crnt_amount = bkedObj.amount * 1.1
+                elif college_option_name == 'stg1_college_ivy_league':
+                    crnt_amount = bkedObj.amount * 1.15
+            bkedObj = effects.placed_object(bkedObj, crnt_start_period, crnt_amount, schedule_engine=self.schedule_engine)
+
+            # special logic for the second house buying event
+            if 'stg2_firsthouse_rent' in crntPlayer.choices \
+                and ('stg3_house_small' in crntPlayer.choices or 'stg3_house_mid' in crntPlayer.choices or 'stg3_house_big' in crntPlayer.choices) \
+                and bkedObj.type=='salary':
+                # if the player rent in stage 2 (no house) and bought a house in stage 3, the new house is a first house for the player
+                # we need to remove the rental income by ignoring it in the loop
+                continue
+
+            rtn_list.append(bkedObj)
+
+        return rtn_list
+
     def __simulate_for_ai(self):
-        '''make best choices for the current stage for the AI player. This is a brute force implementation of optimizing over stage choices.'''
+        '''make best choices for the current stage for the AI player. 
+        Depending on self.ai_search, this either simulates every choice combination (brute force), uses branch and bound to skip the combinations that cannot be the best,
+        or simulates every choice combination with every draw of the random events of the stage that are not drawn yet (expectimax).'''
+
+        event_names, options = self.__get_turn_options()
 
+        # if there is no choice in this turn, just simulate without picking optimal options
+        if len(options) == 0:
+            # add backend objects to the current AI player for the current turn
+            self.___add_bkedobj_2_player(self.players[-1], self.iTurn, self.iTurn)
+            # simulate for the current AI player to the last period of the stage. The periods before the latest valid checkpoint are not calculated again
+            self.players[-1].simulate(gamedef.first_period_of_turn[self.first_turn_of_stage[self.iStage]], gamedef.last_period_of_turn[self.last_turn_of_stage[self.iStage]], from_checkpoint=True)
+            return
+
+        self.players[-1] = self.__search_best_choices(self.players[-1], event_names, options)
+        if self.metrics is not None:
+            self.metrics.ai_searched(self.ai_search_stats)
+        # the AI player is now a fork (see Player.fork). Copy the shared score table rows so that it no longer depends on the previous AI player
+        self.players[-1]._score_table.materialize()
+
+    def suggest_choices(self, player=None):
+        """Returns the choices the AI would make for a player in the current turn. The player is not changed.
+        The suggestion should be requested at the start of the player's turn, before the player's choices for the turn are simulated.
+
+        Input Argument
+        --------------
+        player:     optional Player object. Defaults to the current player.
+
+        Output Argument
+        ---------------
+        a dictionary of option indices by event name. Empty if the turn has no event with options.
+        """
+        if player is None:
+            player = self.crntPlayer
+        event_names, options = self.__get_turn_options()
+        if len(options) == 0:
+            return dict()
+        bestPlayer = self.__search_best_choices(player, event_names, options)
+        return {crntEvtNm: bestPlayer.choices[crntEvtNm] for crntEvtNm in event_names}
+
+    def __get_turn_options(self):
+        """returns the names of the events with options in the current turn and a list of the option indices of each of those events"""
         from collections import deque
-        from itertools import product
-        import copy
 
         # define two lists respectively for event names and the list of options the event offers
         # note options variable is a list of lists. Each inner list has all options of an event. The outer list enumerates all events. 
@@ -350,80 +541,345 @@ class Prosperville:
             event_names.append(self.step_table['event_name'][istp])
             # for this event, add all its options to the end of list options
             options.append(range(len(self.event_by_name[self.step_table['event_name'][istp]].options)))
+        return event_names, options
+
+    def turn_options(self, iTurn):
+        """Returns what can happen in a turn: a tuple of
+            the names of the events with options in the turn,
+            a list of the option indices of each of those events,
+            and the probability of each random event that can be drawn in the turn by event name (empty if the turn is not a random event turn).
+        This is used by the policy solver in backend/policy.py."""
+        event_names, options, random_events = [], [], dict()
+        for istp in range(self.first_step_of_turn[iTurn], self.last_step_of_turn[iTurn]+1):
+            if self.step_table['is_random_event_step'][istp]:
+                crntStage = gamedef.pvStages[int(self.step_table['stage'][istp])]
+                random_events = dict(zip(crntStage.random_event, [float(c) for c in self.rnd_evt_prob[crntStage.name]]))
+            elif self.step_table['event_name'][istp] in self.event_by_name and self.event_by_name[self.step_table['event_name'][istp]].options:
+                event_names.append(self.step_table['event_name'][istp])
+                options.append(range(len(self.event_by_name[self.step_table['event_name'][istp]].options)))
+        return event_names, options, random_events
+
+    def play_turn(self, player, iTurn, choice=None, random_event=None):
+        """Plays a turn for a copy of a player outside of the game progression, the same way the game plays the AI player's turn (see __simulate_for_ai):
+        the backend objects of the turn are added and the copy is simulated to the end of the stage. 
+        The game itself is not changed: its turn, step and stage counters and the random events of its step table are restored before this method returns. 
+        This is used by the policy solver in backend/policy.py, so the states it solves are the states the AI player reaches in a game.
 
-        # if there is no choice in this turn, just simulate without picking optimal options
-        if len(options) == 0:
-            # add backend objects to the current AI player for the current turn
-            self.___add_bkedobj_2_player(self.players[-1], self.iTurn, self.iTurn)
-            # simulate for the current AI player to the last period of the stage
-            self.players[-1].simulate(gamedef.first_period_of_turn[self.first_turn_of_stage[self.iStage]], gamedef.last_period_of_turn[self.last_turn_of_stage[self.iStage]])
-            return
+        Input Arguments
+        ---------------
+        player:         required Player object that has played the turns before iTurn. The player is not changed.
+        iTurn:          required int. The turn to play.
+        choice:         optional dictionary of option indices by event name for the events of the turn that have options.
+        random_event:   optional str. The name of the random event drawn in the turn, if it is a random event turn.
+
+        Output Argument
+        ---------------
+        the copy of the player simulated to the end of the stage of the turn, or None if the choice is not feasible for the player
+        """
+        if choice is not None and not self.option_constraints.is_feasible({**player.choices._data, **choice}):
+            # an option is not available to the player
+            return None
+
+        # the game is moved to the last step of the turn, where the AI player plays the turn when the last player clicks Next
+        saved = (self.iTurn, self.iStep, self.iStage, dict(self.step_table.overlay['event_name']))
+        try:
+            self.iTurn, self.iStep = iTurn, self.last_step_of_turn[iTurn]
+            self.iStage = int(self.step_table['stage'][self.iStep])
+            # only the random events of the turn are drawn. The random events of the later turns are not drawn yet
+            for istp in range(self.first_step_of_turn[iTurn], len(self.step_table)):
+                if self.step_table['is_random_event_step'][istp]:
+                    self.step_table['event_name'][istp] = random_event if istp <= self.iStep and random_event is not None else ''
+
+            period_start = gamedef.first_period_of_turn[self.first_turn_of_stage[self.iStage]]
+            period_end = gamedef.last_period_of_turn[self.last_turn_of_stage[self.iStage]]
+            # the copy keeps the checkpoints of the player, so it restarts its simulation from the same period as the AI player does in the game
+            rtn = player.fork(period_start)
+            for crntEvtNm, iOption in (choice or dict()).items():
+                rtn.choices[crntEvtNm] = iOption
+            self.___add_bkedobj_2_player(rtn, iTurn, iTurn)
+            rtn.simulate(period_start, period_end, from_checkpoint=True)
+        finally:
+            self.iTurn, self.iStep, self.iStage = saved[:3]
+            self.step_table.overlay['event_name'] = saved[3]
+        return rtn
+
+    def __search_best_choices(self, player, event_names, options):
+        """Searches for the choice combination of the current turn that gives a player the best score at the end of the current stage.
+
+        Input Arguments
+        ---------------
+        player:         the Player object to search for. The player is not changed.
+        event_names:    a list of the event names of the current turn that have options
+        options:        a list of the option indices of each event in event_names
+
+        Output Argument
+        ---------------
+        a fork of the player (see Player.fork) with the best choices, simulated to the end of the stage
+        """
+        from math import prod
+
+        if self.ai_policy is not None:
+            # the choices of the policy table answer without a search when the player's state is in the table
+            crntChoice = self.ai_policy.lookup(player, self.iTurn)
+            if crntChoice is not None and set(crntChoice) == set(event_names):
+                from backend.optimizer import SearchStats
+                rtn = self.__evaluate_ai_choice(player, event_names, tuple(crntChoice[c] for c in event_names))
+                if rtn is not None:
+                    self.ai_search_stats = SearchStats()
+                    self.ai_search_stats.n_candidates = self.ai_search_stats.n_evaluated = 1
+                    return rtn[2]
+
+        if self.ai_workers > 0:
+            from backend.aipool import AIPool
+            # the combinations that cannot be chosen together are dropped before they are sent to the workers (see backend/constraints.py)
+            lstChoice = self.option_constraints.feasible_combinations(event_names, options, player.choices._data)
+        if self.ai_workers > 0 and len(lstChoice) >= AIPool.MinCombinations:
+            # evaluate the choice combinations in the worker processes. The workers only return scores, 
+            # so the best combination is simulated once more in this process to get the player with that combination.
+            # a turn with fewer combinations is evaluated faster in this process (see AIPool.MinCombinations)
+            from backend.aipool import make_context
+            if self.__ai_pool is None:
+                self.__ai_pool = AIPool(self.ai_workers)
+            context = make_context(self, event_names, player)
+            evaluate_many = lambda lstChoice: self.__ai_pool.evaluate(context, lstChoice)
+            if self.ai_search == 'expectimax':
+                from backend.optimizer import SearchStats
+                from backend.expectimax import pick_best_expected
+                self.ai_search_stats = SearchStats()
+                # the workers tell how many outcomes they scored each combination with
+                results = self.__ai_pool.evaluate(context, lstChoice, self.ai_search_stats)
+                self.__count_ai_search(options, lstChoice, results)
+                bestChoice = pick_best_expected(lstChoice, results)
+            elif self.ai_search == 'brute_force':
+                from backend.optimizer import SearchStats, pick_best
+                self.ai_search_stats = SearchStats()
+                results = evaluate_many(lstChoice)
+                self.__count_ai_search(options, lstChoice, results)
+                bestChoice = pick_best(lstChoice, results)
+            else:
+                search = self.__build_ai_search(player, event_names)
+                bestChoice = search.search_batch(evaluate_many, self.ai_workers)
+                self.ai_search_stats = search.stats
+            return self.__evaluate_ai_choice(player, event_names, bestChoice)[2]
+        
+        if self.ai_search == 'brute_force':
+            from backend.optimizer import SearchStats
+            self.ai_search_stats = SearchStats()
+            # save the best results. 
+            # The structure of the variable: [[best surviving score, player obj with that score], [best bankrupt score, player obj with that score]]
+            bestResults = [[-99999,None],[-99999,None]]
+            # enumerate all choice combinations that can be chosen together. this is a brute force method
+            lstChoice = self.option_constraints.feasible_combinations(event_names, options, player.choices._data)
+            self.ai_search_stats.n_candidates = prod(len(c) for c in options)
+            self.ai_search_stats.n_infeasible = self.ai_search_stats.n_candidates - len(lstChoice)
+            for crntChoice in lstChoice:
+                rtn = self.__evaluate_ai_choice(player, event_names, crntChoice)
+                if rtn is None: # the choice combination is not feasible
+                    self.ai_search_stats.n_infeasible += 1
+                    continue
+                self.ai_search_stats.n_evaluated += 1
+                # rtn[0] is 1 if bankrupt, 0 otherwise
+                islot = int(rtn[0])
+                # if the choice combo has better score than the previously known best score, update
+                if bestResults[islot][0] < rtn[1]:
+                    bestResults[islot][0] = rtn[1]
+                    bestResults[islot][1] = rtn[2]
+
+            # find the best results
+            if bestResults[0][1] is not None:
+                # if there is a best score and the player is not in bankrupt, use that
+                return bestResults[0][1]
+            # if all choices lead to bankruptcy, pick the best results among them
+            return bestResults[1][1]
+        
+        if self.ai_search == 'expectimax':
+            from backend.optimizer import SearchStats
+            from backend.expectimax import pick_best_expected
+            self.ai_search_stats = SearchStats()
+            # every feasible combination is scored with every draw of the random events that are not drawn yet. See backend/expectimax.py
+            outcomes = self.__build_ai_outcomes(player)
+            self.ai_search_stats.n_outcomes = 1 if outcomes is None else outcomes.n_outcomes
+            lstChoice, results, players = self.option_constraints.feasible_combinations(event_names, options, player.choices._data), [], []
+            for crntChoice in lstChoice:
+                rtn = self.__evaluate_ai_choice(player, event_names, crntChoice, outcomes)
+                results.append(None if rtn is None else rtn[:2])
+                players.append(None if rtn is None else rtn[2])
+            self.__count_ai_search(options, lstChoice, results)
+            return players[lstChoice.index(pick_best_expected(lstChoice, results))]
+
+        # branch and bound skips the choice combinations that cannot beat the best score found so far. See backend/optimizer.py
+        search = self.__build_ai_search(player, event_names)
+        bestPlayer = search.search(lambda crntChoice: self.__evaluate_ai_choice(player, event_names, crntChoice))
+        self.ai_search_stats = search.stats
+        return bestPlayer
+
+    def __count_ai_search(self, options, lstChoice, results):
+        """Counts the candidates, the infeasible and the evaluated combinations of a search that evaluated every feasible combination in self.ai_search_stats.
+
+        Input Arguments
+        ---------------
+        options:        a list of the option indices of each event of the turn
+        lstChoice:      the list of feasible combinations (see backend.constraints.OptionConstraints.feasible_combinations)
+        results:        a list with one element per element of lstChoice. None if the combination turned out not to be feasible
+        """
+        from math import prod
+
+        self.ai_search_stats.n_candidates = prod(len(c) for c in options)
+        self.ai_search_stats.n_infeasible = self.ai_search_stats.n_candidates - len(lstChoice) + results.count(None)
+        self.ai_search_stats.n_evaluated = len(lstChoice) - results.count(None)
+
+    def evaluate_ai_choices(self, event_names, choices, player=None, stats=None):
+        """Simulates a player with each of a list of choice combinations without changing the player. This is used by the worker processes in backend/aipool.py.
+
+        Input Arguments
+        ---------------
+        event_names:    a list of the event names of the current turn that have options
+        choices:        a list of tuples of option indices. Each tuple has one option index for each event in event_names.
+        player:         optional Player object. Defaults to the AI player.
+        stats:          optional backend.optimizer.SearchStats object. If given, its n_outcomes is set to the number of outcomes each combination is scored with.
+
+        Output Argument
+        ---------------
+        a list with one element per element in choices. 
+        Each element is None if the combination is not feasible, otherwise a tuple of (bankruptcy indicator, score at the end of the stage).
+        If self.ai_search is 'expectimax', the tuple is (probability of bankruptcy, expected score at the end of the stage) instead.
+        """
+        if player is None:
+            player = self.players[-1]
+        outcomes = self.__build_ai_outcomes(player) if self.ai_search == 'expectimax' else None
+        if stats is not None:
+            stats.n_outcomes = 1 if outcomes is None else outcomes.n_outcomes
+        rtn = []
+        for crntChoice in choices:
+            crntResult = self.__evaluate_ai_choice(player, event_names, crntChoice, outcomes)
+            if crntResult is None:
+                rtn.append(None)
+            elif self.ai_search == 'expectimax':
+                rtn.append((float(crntResult[0]), float(crntResult[1])))
+            else:
+                rtn.append((bool(crntResult[0]), float(crntResult[1])))
+        return rtn
+
+    def __evaluate_ai_choice(self, player, event_names, crntChoice, outcomes=None):
+        """Simulates a copy of a player with a candidate choice combination to the end of the current stage.
+
+        Input Arguments
+        ---------------
+        player:         the Player object to copy. Usually the AI player.
+        event_names:    a list of the event names of the current turn that have options
+        crntChoice:     a tuple of option indices. One for each event in event_names.
+        outcomes:       optional backend.expectimax.Expectimax object. If given, the copy is also scored with every draw of the random events that are not drawn yet.
+
+        Output Argument
+        ---------------
+        None if the choice combination is not feasible. 
+        Otherwise a tuple of (bankruptcy indicator, score at the end of the stage, the simulated copy of the player).
+        If outcomes is given, the first two elements are the probability of bankruptcy and the expected score at the end of the stage instead. 
+        The copy is always simulated without the undrawn random events.
+        """
+        # some choices cannot be selected together (eg someone who's not in college cannot choose to live in a dorm). 
+        # the option dependencies are checked on bit masks (see backend/constraints.py), so an infeasible combination is never copied or simulated
+        if not self.option_constraints.is_feasible({**player.choices._data, **dict(zip(event_names, crntChoice))}):
+            return None
+        # a lightweight copy of the player. Only the periods from the start of the stage are simulated again, so only those are copied
+        altPlayer = player.fork(gamedef.first_period_of_turn[self.first_turn_of_stage[self.iStage]])
+        # add new possible choices, these are our candidate choice combination
+        for ievt in range(len(event_names)):
+            altPlayer.choices[event_names[ievt]] = crntChoice[ievt]
+        self.___add_bkedobj_2_player(altPlayer, self.iTurn, self.iTurn)
+        # simulate / score based on the candidate choice combination all the way to the end of the stage. 
+        # The periods before the latest checkpoint that the candidate's backend objects do not change are not calculated again
+        altPlayer.simulate(gamedef.first_period_of_turn[self.first_turn_of_stage[self.iStage]], gamedef.last_period_of_turn[self.last_turn_of_stage[self.iStage]], from_checkpoint=True)
+        if outcomes is not None:
+            # the expected results over the draws of the random events. The simulation above is shared by all draws
+            return (*outcomes.evaluate(altPlayer), altPlayer)
+        # find the end of stage score
+        end_stage_score = altPlayer._score_table['score'][min(self.step_table['period_last'][self.last_step_of_stage[self.iStage]], len(altPlayer._score_table['score'])-1)]
+        return altPlayer.bankrupt, end_stage_score, altPlayer
+
+    def __build_ai_outcomes(self, player):
+        """Prepares the expectimax evaluation over the random event turns of the current stage that are not drawn yet for a player (usually the AI player). 
+        Returns None if there is no such turn. See backend/expectimax.py"""
+        from backend.expectimax import Expectimax
+
+        # the random event steps after the current step. Their events are drawn but not revealed, so the AI cannot see them
+        steps = [istp for istp in range(self.iStep+1, self.last_step_of_stage[self.iStage]+1) 
+                 if self.step_table['is_random_event_step'][istp] and self.step_table['event_name'][istp] == '']
+        if len(steps) == 0:
+            return None
+        # every step draws one of the stage's random events with the game's probabilities (see __draw_all_random_events)
+        crntStage = gamedef.pvStages[self.iStage]
+        branch_objs = [[self.__get_event_bkedobjs(player, crntEvtNm, iStep=istp) for crntEvtNm in crntStage.random_event] for istp in steps]
+        probabilities = [list(self.rnd_evt_prob[crntStage.name])] * len(steps)
+        return Expectimax(branch_objs, probabilities
+                          , period_start=int(self.step_table['period_first'][steps[0]])
+                          , period_score=int(self.step_table['period_last'][self.last_step_of_stage[self.iStage]]))
+
+    def __build_ai_search(self, aiPlayer, event_names):
+        """Prepares the branch-and-bound search over the options of the given events for a player (usually the AI player). See backend/optimizer.py"""
+        from backend.optimizer import BranchAndBound, contributions
+        from backend.simkernel import gather_period_arrays
+        from backend.design import NPeriodsPerMonth
+
+        # the AI simulates from the start of the stage to the end of the stage
+        period_start = gamedef.first_period_of_turn[self.first_turn_of_stage[self.iStage]]
+        period_end = gamedef.last_period_of_turn[self.last_turn_of_stage[self.iStage]]
+        # the period at which __evaluate_ai_choice reads the score of a surviving candidate
+        period_score = min(self.step_table['period_last'][self.last_step_of_stage[self.iStage]], max(len(aiPlayer._score_table)-1, period_end))
+        # values carried from the score table before the start of the stage
+        table = aiPlayer._score_table
+        if period_start > 0:
+            carried_wealth = table['wealth'][period_start-1] + table['debt'][period_start-1] - table['asset'][period_start-1]
+        else:
+            carried_wealth = aiPlayer.init_cash
+
+        # backend objects that do not depend on the options: the objects the AI already has plus the objects of the events in the turn without options
+        base_objs = aiPlayer.active_objects(period_start, period_end)
+        for istp in range(self.first_step_of_turn[self.iTurn], self.last_step_of_turn[self.iTurn]+1):
+            if self.step_table['event_name'][istp] not in event_names:
+                base_objs += self.__get_event_bkedobjs(aiPlayer, self.step_table['event_name'][istp])
+        base = contributions(gather_period_arrays(base_objs, period_start, period_end, init_adj_ratio=aiPlayer.score_adj_ratio)
+                             , prev_spd_on_hapns=table['spd_on_hapns'][max(0,period_start-NPeriodsPerMonth+1):period_start])
+        base = (base[0]+carried_wealth, base[1], base[2])
+
+        # contribution of each option of each event. The options of an event are independent of the options of the other events in the turn
+        # the contribution of an option only depends on its backend objects and the stage, so it is shared by all players and all games (see backend/effects.py)
+        option_effects = [[effects.option_contributions(self.__get_event_bkedobjs(aiPlayer, crntEvtNm, iOption), period_start, period_end) 
+                           for iOption in range(len(self.event_by_name[crntEvtNm].options))] 
+                          for crntEvtNm in event_names]
+
+        return BranchAndBound(base, option_effects, period_start, period_score
+                              , prev_happiness_sum=table['happiness_sum'][period_start-1] if period_start > 0 else 0)
 
-        # save the best results. 
-        # The structure of the variable: [[best surviving score, player obj with that score], [best bankrupt score, player obj with that score]]
-        bestResults = [[-99999,None],[-99999,None]]
-        # remove the current game reference so that the deep copy below does not make a whole new copy of the game instance and all its players
-        self.players[-1].crntGame = None
-        self.players[-1].choices.player = None
-        # enumerate all choice combinations. this is a brute force method
-        for crntChoice in product(*options):
-            altPlayer = copy.deepcopy(self.players[-1])
-            altPlayer.crntGame = self # set the current game instance back
-            altPlayer.choices.player = altPlayer
-            infeasible_choice = False
-            # add new possible choices, these are our candidate choice combination
-            for ievt in range(len(event_names)):
-                try:
-                    altPlayer.choices[event_names[ievt]] = crntChoice[ievt]
-                except ValueError: 
-                    # this error is raised if the current choice is not feasible for the player. 
-                    # some choices cannot be selected together (eg someone who's not in college cannot choose to live in a dorm)
-                    infeasible_choice = True
-            if infeasible_choice:
-                continue
-            self.___add_bkedobj_2_player(altPlayer, self.iTurn, self.iTurn)
-            # simulate / score based on the candidate choice combination all the way to the end of the stage
-            altPlayer.simulate(gamedef.first_period_of_turn[self.first_turn_of_stage[self.iStage]], gamedef.last_period_of_turn[self.last_turn_of_stage[self.iStage]])
-            # 1 if bankrupt, 0 otherwise
-            islot = int(altPlayer.bankrupt) 
-            # find the end of stage score
-            end_stage_score = altPlayer._score_table['score'][min(self.step_table['period_last'][self.last_step_of_stage[self.iStage]], len(altPlayer._score_table['score'])-1)]
-            # if the choice combo has better score than the previously known best score, update
-            if bestResults[islot][0] < end_stage_score:
-                bestResults[islot][0] = end_stage_score
-                bestResults[islot][1] = altPlayer
-
-        # find the best results
-        if bestResults[0][1] is not None:
-            # if there is a best score and the player is not in bankrupt, use that for AI
-            self.players[-1] = bestResults[0][1]
-        else: # if all choices lead to bankruptcy, pick the best results among them
-            self.players[-1] = bestResults[1][1]
-            
     def __draw_random_event(self):
-        """draws a random event for the current stage"""
+        """reveals the random event drawn for the current step by writing its name to the step table. The events are drawn when the game is created. See __draw_all_random_events"""
 
         if not self.is_random_event_step: return
 
-        # we use multinomial distribution to draw from a list of random events available to the current stage
-        # the list is saved in the stage definition's random_event field: self.crntStage.random_event
-        # the probability of each event that can take place is stored in self.crntStage.backend['rnd_evt_prob']
-        # the multinomial distribution is a distribution that describes the probability of one of a list of things happening once at a time at random
-        # for more details on multinomial distribution, please see https://en.wikipedia.org/wiki/Multinomial_distribution
-        # We use numpy's multinomial function to provide a random draw from the multinomial distribution. 
-        # for more details on numpy's implementation of the multinomial function, please refer to 
-        # https://numpy.org/doc/stable/reference/random/generated/numpy.random.multinomial.html
-
-        import numpy as np
-        from numpy.random import multinomial
-        # make one draw from the multinomial distribution. The probability of each random event is provided by self.crntStage.backend['rnd_evt_prob']
-        drawRstMN = multinomial(1, self.crntStage.backend['rnd_evt_prob'])
-        # find which event is actually drawn. the result is the index of the event
-        iRndEvt = np.where(drawRstMN==1)[0][0]
         # save the event definition's name in the step table
-        self.step_table['event_name'][self.iStep] = self.crntStage.random_event[iRndEvt]
+        self.step_table['event_name'][self.iStep] = self.__drawn_events[self.iStep]
 
-# this variable is shared among the Jupyter notebook, the backend modules, and GUI modules
-# it represents the current running game
-crntGame = None
+    def __draw_all_random_events(self):
+        """draws the random events of all random event steps of the game at once with the game's random number generator (self.rng).
+        Returns a list with one element per step. The element is the name of the drawn event for a random event step, or '' for any other step."""
+
+        import numpy as np
 
+        # we draw from a list of random events available to each stage. The list is saved in the stage definition's random_event field. 
+        # the probability of each event that can take place is stored in self.rnd_evt_prob by stage name.
+        # one uniform random number between 0 and 1 is drawn for every random event step, all in one call. 
+        # A uniform number is turned into an event by finding where it falls among the cumulative probabilities of the events (inverse transform sampling). 
+        # for more details on inverse transform sampling, please see https://en.wikipedia.org/wiki/Inverse_transform_sampling
+        rtn = [''] * len(self.step_table['stage'])
+        steps = np.flatnonzero(self.step_table['is_random_event_step'])
+        uniform = self.rng.random(len(steps))
+        stages = np.array(self.step_table['stage'])[steps]
+        for istg in np.unique(stages):
+            crntStage = gamedef.pvStages[istg]
+            isInStage = stages == istg
+            cumProb = np.cumsum(self.rnd_evt_prob[crntStage.name])
+            # side='right' makes sure an event with 0 probability is never drawn
+            iRndEvt = np.minimum(np.searchsorted(cumProb, uniform[isInStage]*cumProb[-1], side='right'), len(cumProb)-1)
+            for istp, crntIdx in zip(steps[isInStage], iRndEvt):
+                rtn[istp] = crntStage.random_event[crntIdx]
+        return rtn
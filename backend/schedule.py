@@ -0,0 +1,152 @@
+# Copyright (C) 2023, Bank of America.  The file below is licensed to LSC for use with HSoF.  All other rights are reserved.
+"""This file defines the closed-form schedule engine for backend objects.
+Each function here builds the whole schedule table of a backend object as numpy arrays at once.
+The period-by-period loops in the calculate_schedule methods of Loan, Salary, Asset and Expense are the reference implementation.
+Instead of filling every column one simulation period at a time, these functions work on the payment periods only
+and spread the results over all simulation periods with masks that mark the payment periods.
+Amounts that do not depend on rounding (salaries, interest-free loans and expenses, non-appreciating assets) use closed forms.
+Balances that the loops round to cents at every compounding step are path dependent. For those, the balance is carried
+over the payment periods only so that every value matches the loops to the cent.
+
+A backend object uses this engine when its calculate_schedule method is called with engine='numpy'.
+
+Learning tip:
+How does an amortization schedule work?
+See: https://en.wikipedia.org/wiki/Amortization_schedule
+"""
+
+import numpy as np
+
+# the supported schedule engines. 'python' is the period-by-period loop in the backend object classes
+ScheduleEngines = ['python', 'numpy']
+
+def payment_mask(n_periods, pay_freq_n_periods):
+    """returns a boolean array whose element i is True if simulation period i (0-based, relative to the object start) is a payment period"""
+    return (np.arange(1, n_periods+1) % pay_freq_n_periods) == 0
+
+def carry_forward(values, mask, init_value):
+    """returns an array that takes values[i] where mask[i] is True. Where mask[i] is False, the last value with a True mask is carried forward.
+    Elements before the first True mask take init_value."""
+    # index of the last True mask at or before each element. -1 if there is none
+    idx_last = np.maximum.accumulate(np.where(mask, np.arange(len(mask)), -1))
+    return np.where(idx_last >= 0, values[np.maximum(idx_last, 0)], init_value)
+
+def salary_schedule(obj):
+    """builds the schedule table of a Salary object (backend/income.py)"""
+    return {'pay': np.where(payment_mask(obj.n_periods, obj.pay_freq_n_periods), obj.pay_check, 0.0)}
+
+def loan_schedule(obj):
+    """builds the amortization table of a Loan object (backend/loan.py).
+    With interest, only the rounded balance and interest of each payment period are calculated one payment at a time. The other columns are array operations."""
+
+    mask = payment_mask(obj.n_periods, obj.pay_freq_n_periods)
+    rate, amt = obj.periodic_rate, obj.periodic_payment_amt
+    n_payments = int(mask.sum())
+    if rate == 0:
+        # without interest, the principal left after k payments is simply amount - k*payment
+        bal_init = np.maximum(obj.amount - np.arange(n_payments)*amt, 0)
+        payment = np.minimum(amt, bal_init)
+        bal_end = bal_init - payment
+        pay_int = np.zeros(n_payments)
+    else:
+        # the balance is rounded to cents at every payment, which makes each balance depend on the rounding of the previous one.
+        # to match the loop to the cent, the balance is carried over the payment periods only (not every simulation period).
+        # note the values are kept as Python floats here because Python's round function and numpy's rounding may differ in the last cent.
+        # only the two rounded values of each payment are calculated in the loop. Everything else is calculated from them with array operations
+        bal_init, pay_int = np.zeros(n_payments), np.zeros(n_payments)
+        crnt_bal, growth = obj.amount, 1+rate
+        crnt_bal_init, crnt_pay_int = [], []
+        while crnt_bal != 0 and len(crnt_bal_init) < n_payments: # once the loan is paid off, the remaining payments are zeros
+            crnt_pay_int.append(round(crnt_bal * rate, 2))
+            crnt_bal = round(crnt_bal * growth, 2)
+            crnt_bal_init.append(crnt_bal)
+            # the payment is the whole balance if the balance is not more than the payment amount
+            crnt_bal = crnt_bal - amt if crnt_bal > amt else 0.0
+        bal_init[:len(crnt_bal_init)], pay_int[:len(crnt_pay_int)] = crnt_bal_init, crnt_pay_int
+        payment = np.minimum(amt, bal_init)
+        bal_end = bal_init - payment
+
+    # spread the values of the payment periods over all simulation periods
+    paysch = dict()
+    paysch['bal_init'] = carry_forward(__scatter(bal_init, mask), mask, obj.amount)
+    paysch['bal_end'] = carry_forward(__scatter(bal_end, mask), mask, obj.amount)
+    paysch['payment'] = __scatter(payment, mask)
+    paysch['payment_interest'] = __scatter(pay_int, mask)
+    paysch['payment_principal'] = __scatter(payment - pay_int, mask)
+    paysch['interest'] = np.cumsum(paysch['payment_interest'])
+    paysch['pay'] = paysch['payment'].copy()
+    return paysch
+
+def expense_schedule(obj):
+    """builds the schedule table of an Expense object (backend/expense.py)"""
+
+    iPeriod = np.arange(obj.n_periods)
+    if obj.amt_annual_rate != 0:
+        # the expense amount increases at every period that is at least rate_freq_n_periods in and whose remainder is 1
+        is_increase = (iPeriod >= obj.rate_freq_n_periods) & (iPeriod % obj.rate_freq_n_periods == 1)
+        n_increases = np.cumsum(is_increase)
+        # the amount after each increase. the amount is rounded to cents after each increase, so it is compounded one increase at a time.
+        # there is only one increase per rate_freq_n_periods periods
+        levels = [obj.amount]
+        for i in range(int(n_increases[-1]) if len(n_increases) else 0):
+            levels.append(round((1+obj.periodic_amt__rate) * levels[-1], 2))
+        crnt_pay = np.array(levels)[n_increases]
+    else:
+        crnt_pay = np.full(obj.n_periods, obj.amount)
+    return {'pay': np.where(payment_mask(obj.n_periods, obj.pay_freq_n_periods), crnt_pay, 0.0)}
+
+def asset_schedule(obj):
+    """builds the schedule table of an Asset object (backend/income.py).
+    With appreciation, only the rounded value of each payment period is calculated one payment at a time. The other columns are array operations."""
+
+    n = obj.n_periods
+    iPeriod = np.arange(n)
+    mask = payment_mask(n, obj.pay_freq_n_periods)
+    # recurring investment periods
+    if obj.recurring_n_periods != 0:
+        is_deposit = (iPeriod != 0) & (iPeriod % obj.recurring_n_periods == 0) & (iPeriod+obj.start_period <= obj.recurring_end_period)
+    else:
+        is_deposit = np.zeros(n, dtype=bool)
+    # the value only changes at the payment periods. A deposit made in a period that is not a payment period is not kept (same as the loop).
+    deposit = np.where(is_deposit & mask, obj.amount, 0.0)[mask]
+    n_payments = len(deposit)
+
+    if obj.periodic_rate == 0 and obj.value_cap == 0:
+        # without appreciation, the value is the amount plus all deposits so far
+        value_after = obj.amount + np.cumsum(deposit)
+        appreciation = np.zeros(n_payments)
+    else:
+        # the value is rounded to cents at every payment period, which makes each value depend on the rounding of the previous one.
+        # to match the loop to the cent, the value is carried over the payment periods only.
+        # the values are kept as Python floats for the same reason as in loan_schedule
+        value_after = []
+        crnt_val, growth, cap = obj.amount, 1+obj.periodic_rate, obj.value_cap
+        for crnt_deposit in deposit.tolist():
+            crnt_val = round((crnt_val + crnt_deposit) * growth, 2)
+            if cap != 0 and crnt_val > cap:
+                crnt_val = cap
+            value_after.append(crnt_val)
+        value_after = np.array(value_after)
+        # the appreciation is the change of the value without the deposit. Both are in cents, so the difference is a whole number of cents
+        # up to a floating point error, and numpy rounds it to the same cent as Python's round function
+        value_before = np.concatenate(([obj.amount], value_after[:-1])) + deposit
+        appreciation = np.round(value_after - value_before, 2)
+
+    paysch = dict()
+    val_end = carry_forward(__scatter(value_after, mask), mask, obj.amount)
+    # value at the beginning of a period is the value at the end of the previous period plus the deposit of the period
+    paysch['value_init'] = np.concatenate(([obj.amount], val_end[:-1])) + np.where(is_deposit, obj.amount, 0.0)
+    paysch['value_end'] = val_end
+    paysch['appreciation'] = carry_forward(__scatter(appreciation, mask), mask, 0.0)
+    paysch['total_appreciation'] = np.cumsum(__scatter(appreciation, mask))
+    paysch['pay'] = np.zeros(n)
+    # for the last period, we liquidate the asset
+    paysch['pay'][-1] = paysch['value_end'][-1]
+    paysch['value_end'][-1] = 0
+    return paysch
+
+def __scatter(values, mask):
+    """places values at the positions where mask is True. Other positions are zeros."""
+    rtn = np.zeros(len(mask))
+    rtn[mask] = values
+    return rtn
@@ -0,0 +1,179 @@
+# Copyright (C) 2023, Bank of America.  The file below is licensed to LSC for use with HSoF.  All other rights are reserved.
+"""This file defines the ScoreTable class. ScoreTable is the raw structure behind a player's score table.
+Each column is a numpy array that is allocated once for all simulation periods of the game (backend.design.MaxPeriods).
+A length marker (n_periods) tells how many periods have been simulated, so adding a period never grows or copies the columns.
+
+A table can also be forked (see ScoreTable.fork). A forked table shares the periods before a given period with the table it is forked from,
+and only stores the periods from that period onwards. This is how the AI player evaluates a choice combination without copying its whole score table.
+
+Learning tip:
+Why is it faster to allocate an array once than to append to it one element at a time?
+See: https://numpy.org/doc/stable/user/basics.creation.html#numpy-array-creation-routines
+"""
+
+import numpy as np
+from backend.design import MaxPeriods
+
+class ScoreTable:
+    """Represents the raw score table of a player. Each row is a simulation period."""
+
+    # names of all columns in the table
+    Columns = ['income', 'spending', 'net_income', 'debt', 'asset', 'spd_on_hapns', 'mth_spd_hapns', 'wealth', 'happiness', 'score'
+               , 'debt_std', 'debt_mort', 'debt_car', 'debt_other', 'debt_ratio'
+               # running sum of happiness from period 0 to the current period. score = happiness_sum / (period + 1)
+               , 'happiness_sum']
+
+    def __init__(self, max_periods=MaxPeriods):
+        """Represents the raw score table of a player.
+
+        Input Argument
+        --------------
+        max_periods:    optional int that sets the number of rows to allocate. Defaults to the number of periods of the whole game.
+        """
+        self.max_periods = max_periods
+        # one preallocated array per column
+        self._data = {c: np.zeros(max_periods) for c in ScoreTable.Columns}
+        # the length marker: number of periods that have been simulated
+        self.n_periods = 0
+        # for a forked table: the table that holds the shared rows and the number of shared rows. 
+        # self._data then only holds rows from self._offset onwards
+        self._parent = None
+        self._offset = 0
+
+    def __len__(self):
+        return self.n_periods
+
+    # returns a column up to the last simulated period. The returned array is a view, so writing to it changes the table.
+    # for a forked table, the returned object is a ForkedColumn that reads the shared rows from the parent table.
+    def __getitem__(self, name):
+        if self._parent is None:
+            return self._data[name][:self.n_periods]
+        return ForkedColumn(self, name)
+
+    @property
+    def is_forked(self):
+        """gets a boolean value that indicates if the table shares rows with another table"""
+        return self._parent is not None
+
+    def fork(self, period_start=None):
+        """Returns a new table that shares the rows before period_start with this table. 
+        Rows from period_start onwards are copied into the new table only when they exist, and are only stored in the new table.
+        The rows before period_start in this table must not be changed while the new table is in use.
+
+        Input Argument
+        --------------
+        period_start:   optional int. The first row that the new table owns. Defaults to the number of rows in this table.
+        """
+        if period_start is None:
+            period_start = self.n_periods
+        if period_start < 0 or period_start > self.n_periods:
+            raise IndexError(f'A score table with {self.n_periods} periods cannot be forked at period {period_start}.')
+
+        rtn = ScoreTable.__new__(ScoreTable)
+        rtn.max_periods = self.max_periods
+        # share the parent's rows. If this table is forked too and period_start is in its own rows, this table becomes the parent.
+        # otherwise, skip to this table's parent so that reading a shared row goes through as few tables as possible
+        rtn._parent = self if self._parent is None or period_start > self._offset else self._parent
+        rtn._offset = period_start
+        rtn.n_periods = period_start
+        rtn._data = {c: np.zeros(0) for c in ScoreTable.Columns}
+        # copy the rows this table has past period_start. The AI overwrites them, but the values may still be read before that.
+        rtn.extend(self.n_periods)
+        for crntCol in ScoreTable.Columns:
+            rtn._data[crntCol][:] = self[crntCol][period_start:self.n_periods]
+        return rtn
+
+    def materialize(self):
+        """Copies the shared rows into this table so that it no longer depends on the table it was forked from."""
+        if self._parent is None:
+            return
+        full = {c: np.zeros(self.max_periods) for c in ScoreTable.Columns}
+        for crntCol in ScoreTable.Columns:
+            full[crntCol][:self.n_periods] = self[crntCol][:]
+        self._data, self._parent, self._offset = full, None, 0
+
+    def extend(self, n_periods):
+        """Makes sure the table has at least n_periods rows. New rows are zeros."""
+        # rows past the length marker are never written, so they still hold the zeros from the allocation. Moving the marker is enough.
+        if n_periods <= self.n_periods:
+            return
+        if n_periods > self.max_periods:
+            raise IndexError(f'The score table can hold at most {self.max_periods} periods. {n_periods} periods are requested.')
+        # a forked table only allocates the rows it owns
+        n_owned = n_periods - self._offset
+        if self._parent is not None and n_owned > len(self._data['score']):
+            # grow to at least double the size so that a table extended one row at a time is not copied every time
+            new_size = min(max(n_owned, 2*len(self._data['score'])), self.max_periods - self._offset)
+            for crntCol in ScoreTable.Columns:
+                new_col = np.zeros(new_size)
+                new_col[:len(self._data[crntCol])] = self._data[crntCol]
+                self._data[crntCol] = new_col
+        self.n_periods = n_periods
+
+    def write(self, period_start, cols, n_periods):
+        """Writes the first n_periods elements of each array in cols to the table starting at period_start. Rows that exist are overwritten.
+
+        Input Arguments
+        ---------------
+        period_start:   required int. The first row to write.
+        cols:           required dictionary of numpy arrays keyed by column name. Columns not in ScoreTable.Columns are ignored.
+        n_periods:      required int. Number of rows to write.
+        """
+        self.extend(period_start + n_periods)
+        if period_start < self._offset:
+            raise IndexError(f'Period {period_start} is shared with another table and cannot be written. The first period this table can write is {self._offset}.')
+        # position of period_start in self._data. It is period_start itself unless the table is forked
+        iStart = period_start - self._offset
+        for crntCol in ScoreTable.Columns:
+            if crntCol in cols:
+                self._data[crntCol][iStart:(iStart+n_periods)] = cols[crntCol][:n_periods]
+
+class ForkedColumn:
+    """Represents a column of a forked ScoreTable. It behaves like the numpy array that a ScoreTable returns for a column:
+    it supports len(), reading by index or slice, writing by index to the rows the table owns, and conversion with np.array()."""
+
+    def __init__(self, table, name):
+        self.table = table
+        self.name = name
+
+    def __len__(self):
+        return self.table.n_periods
+
+    def __array__(self, dtype=None, copy=None):
+        rtn = self[:]
+        return rtn if dtype is None else rtn.astype(dtype)
+
+    def __iter__(self):
+        return iter(self[:])
+
+    def __getitem__(self, key):
+        table, offset = self.table, self.table._offset
+        if isinstance(key, slice):
+            start, stop, step = key.indices(table.n_periods)
+            if step != 1:
+                return self[:][key]
+            stop = max(start, stop)
+            if start >= offset: # only rows this table owns
+                return table._data[self.name][(start-offset):(stop-offset)]
+            if stop <= offset: # only shared rows
+                return table._parent[self.name][start:stop]
+            return np.concatenate((table._parent[self.name][start:offset], table._data[self.name][:(stop-offset)]))
+        
+        if key < 0:
+            key += table.n_periods
+        if key < 0 or key >= table.n_periods:
+            raise IndexError(f'Period {key} is not in the score table.')
+        if key >= offset:
+            return table._data[self.name][key-offset]
+        return table._parent[self.name][key]
+
+    def __setitem__(self, key, value):
+        table = self.table
+        if key < 0:
+            key += table.n_periods
+        if key < table._offset or key >= table.n_periods:
+            raise IndexError(f'Period {key} cannot be written. This table can only write periods {table._offset} to {table.n_periods-1}.')
+        table._data[self.name][key-table._offset] = value
+
+    def sum(self):
+        return self[:].sum()
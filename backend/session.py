@@ -0,0 +1,108 @@
+# Copyright (C) 2023, Bank of America.  The file below is licensed to LSC for use with HSoF.  All other rights are reserved.
+"""This file defines the game sessions that one Python process (eg a Jupyter kernel) can host at the same time.
+A session is one running game (a Prosperville object) together with the graphic user interface built for it (see gui.app.build_gui).
+The SessionManager class owns the sessions and finds them by their session id, so one kernel can serve many groups of players.
+
+All sessions share the game definitions (stages, events, options and backend objects) that backend.gameitems loads once per process.
+Only the state that changes as a game is played (players, choices, score tables, drawn random events) is kept per session.
+
+A notebook starts a session and displays its interface like this:
+    from backend.session import sessions
+    from gui.app import build_gui
+    session = sessions.create(player_names=['Eric', 'Janet'], init_cash=0)
+    build_gui(session)
+
+Learning tip:
+What is a session?
+See: https://en.wikipedia.org/wiki/Session_(computer_science)
+"""
+
+class GameSession:
+    """Represents one game hosted by a SessionManager"""
+
+    def __init__(self, session_id, game):
+        """Represents one game hosted by a SessionManager
+
+        Input Arguments
+        ---------------
+        session_id: required str that identifies the session in its SessionManager
+        game:       required Prosperville object that is played in the session
+        """
+        self.session_id = session_id
+        self.game = game
+        # the GUI state of the session (gui._shared.SessionUI). It is None until the GUI of the session is built with gui.app.build_gui
+        self.gui = None
+
+    def __repr__(self):
+        return f'GameSession({self.session_id!r})'
+
+    def close(self):
+        """Stops the game of the session and releases its GUI"""
+        self.game.close()
+        if self.gui is not None:
+            self.game.remove_listener(self.gui.on_game_changed)
+        self.gui = None
+
+class SessionManager:
+    """Owns the game sessions of a process and finds them by their session id"""
+
+    def __init__(self):
+        # the sessions by session id
+        self.__sessions = dict()
+
+    def __len__(self):
+        return len(self.__sessions)
+
+    def __contains__(self, session_id):
+        return session_id in self.__sessions
+
+    def __getitem__(self, session_id):
+        return self.get(session_id)
+
+    @property
+    def session_ids(self):
+        """gets the list of the ids of all sessions, in the order they were created"""
+        return list(self.__sessions.keys())
+
+    def create(self, session_id=None, **game_args):
+        """Starts a new game and returns its GameSession.
+
+        Input Arguments
+        ---------------
+        session_id: optional str. A unique id is generated if it is not given.
+        game_args:  optional keyword arguments passed to Prosperville (eg player_names, init_cash, seed).
+        """
+        import uuid
+        from backend.prosperville import Prosperville
+
+        if session_id is None:
+            session_id = uuid.uuid4().hex
+        if session_id in self.__sessions:
+            raise ValueError(f'Session "{session_id}" already exists.')
+        self.__sessions[session_id] = GameSession(session_id, Prosperville(**game_args))
+        return self.__sessions[session_id]
+
+    def get(self, session_id):
+        """returns the GameSession of a session id"""
+        if session_id not in self.__sessions:
+            raise KeyError(f'Session "{session_id}" does not exist.')
+        return self.__sessions[session_id]
+
+    def close(self, session_id):
+        """Stops the game of a session and removes the session"""
+        self.get(session_id).close()
+        del self.__sessions[session_id]
+
+    def prewarm(self):
+        """Creates the backend objects of all events and options ahead of time, so that the first games of a server do not wait for them.
+        Otherwise, they are created when a game first reaches their event (see backend.gameitems.LazyBackendObjectMap)."""
+        import backend.gameitems as gamedef
+        gamedef.pvBkEndObj_by_name.prewarm()
+
+    def close_all(self):
+        """Stops and removes all sessions"""
+        for session_id in self.session_ids:
+            self.close(session_id)
+
+# the sessions hosted by the current process. The notebook and the GUI modules use this manager
+sessions = SessionManager()
@@ -0,0 +1,268 @@
+# Copyright (C) 2023, Bank of America.  The file below is licensed to LSC for use with HSoF.  All other rights are reserved.
+"""This file defines the vectorized simulation kernel of the game.
+The kernel is the NumPy counterpart of the period-by-period loop in Player.__update_score_table (backend/player.py).
+Instead of visiting every backend object once per simulation period, it turns the backend objects of a player into
+dense per-period arrays (one array per score table column), then computes wealth, monthly happiness spending,
+happiness, score and bankruptcy as whole-array operations.
+
+Learning tip:
+Why is a vectorized calculation faster than a Python loop?
+See: https://numpy.org/doc/stable/user/whatisnumpy.html#why-is-numpy-fast
+"""
+
+import numpy as np
+from backend.design import NPeriodsPerMonth # number of simulation periods in a month
+from backend.effects import object_effect
+
+# score table columns that are the direct sum of the backend object schedules
+SumColumns = ['income', 'spending', 'debt', 'asset', 'spd_on_hapns', 'debt_std', 'debt_mort', 'debt_car', 'debt_other']
+# score table columns that are derived from the summed columns and the values of the previous periods
+DerivedColumns = ['net_income', 'mth_spd_hapns', 'wealth', 'happiness', 'happiness_sum', 'score', 'debt_ratio']
+
+def gather_period_arrays(bked_objs, period_start, period_end, init_adj_ratio=1.0):
+    """Turns a list of backend objects into dense per-period arrays between two simulation periods.
+
+    Input Arguments
+    ---------------
+    bked_objs:          a list of backend objects (see backend/__init__.py)
+    period_start:       required int that indicates the first global simulation period of the arrays
+    period_end:         required int that indicates the last global simulation period of the arrays. This period is included.
+    init_adj_ratio:     the happiness adjustment ratio before any HappinessAdjustmentRatio object is applied
+
+    Output Argument
+    ---------------
+    a dictionary of numpy arrays. Each array has (period_end-period_start+1) elements and element i represents global period period_start+i.
+    The keys are the columns in SumColumns plus
+    'adj_ratio':        the happiness adjustment ratio of each period
+    'annual_salary':    the total annual salary of the salary objects that are active in each period. It is used by the bankruptcy rule.
+    """
+
+    n_periods = period_end - period_start + 1
+    cols = {c: np.zeros(n_periods) for c in SumColumns + ['annual_salary']}
+    cols['adj_ratio'] = np.full(n_periods, init_adj_ratio)
+
+    # the objects are added in the order of the list so that every element receives the same sequence of additions as the loop in Player.__update_score_table
+    for crntObj in bked_objs:
+        # the effect of the object in global periods. It is calculated once per object (see backend/effects.py)
+        crntEffect = object_effect(crntObj)
+        # find the global periods in which the object overlaps with the requested periods
+        first = max(period_start, crntEffect.first)
+        last = min(period_end, crntEffect.last)
+        if first > last: # the object has no effect on the requested periods
+            continue
+        # position of the overlapping periods in the output arrays (dst) and in the effect arrays (src)
+        dst = slice(first - period_start, last - period_start + 1)
+        src = slice(first - crntEffect.first, last - crntEffect.first + 1)
+
+        if crntEffect.adj_rate is not None:
+            # happiness adjustment ratio object has no schedule. It multiplies the happiness directly
+            cols['adj_ratio'][dst] *= crntEffect.adj_rate
+            continue
+        for crntCol, crntValues in crntEffect.cols.items():
+            cols[crntCol][dst] += crntValues[src]
+
+    return cols
+
+def gather_batch_arrays(bked_obj_lists, period_start, period_end, init_adj_ratio=1.0):
+    """Turns the lists of backend objects of many players into two-dimensional per-period arrays (players x periods) between two simulation periods.
+    Row j is what gather_period_arrays returns for bked_obj_lists[j]. 
+    The objects are visited by their position in the lists, and an object at the same position of many lists (eg the same option chosen by many players)
+    is added to all their rows at once. Every row still receives its objects in the order of its list.
+
+    Input Arguments
+    ---------------
+    bked_obj_lists:     a list of lists of backend objects (see backend/__init__.py). One list per row.
+    period_start:       required int that indicates the first global simulation period of the arrays
+    period_end:         required int that indicates the last global simulation period of the arrays. This period is included.
+    init_adj_ratio:     the happiness adjustment ratio before any HappinessAdjustmentRatio object is applied. A number or a list with one element per row.
+
+    Output Argument
+    ---------------
+    a dictionary of two-dimensional numpy arrays with the keys of the dictionary returned by gather_period_arrays
+    """
+    n_rows, n_periods = len(bked_obj_lists), period_end - period_start + 1
+    cols = {c: np.zeros((n_rows, n_periods)) for c in SumColumns + ['annual_salary']}
+    cols['adj_ratio'] = np.empty((n_rows, n_periods))
+    cols['adj_ratio'][:] = np.asarray(init_adj_ratio, dtype=float).reshape(-1, 1)
+
+    for k in range(max((len(c) for c in bked_obj_lists), default=0)):
+        # the rows of each object at position k of the lists
+        rows_by_obj = dict()
+        for j, crntObjs in enumerate(bked_obj_lists):
+            if k < len(crntObjs):
+                rows_by_obj.setdefault(id(crntObjs[k]), (crntObjs[k], []))[1].append(j)
+        for crntObj, rows in rows_by_obj.values():
+            crntEffect = object_effect(crntObj)
+            first = max(period_start, crntEffect.first)
+            last = min(period_end, crntEffect.last)
+            if first > last: # the object has no effect on the requested periods
+                continue
+            dst = slice(first - period_start, last - period_start + 1)
+            src = slice(first - crntEffect.first, last - crntEffect.first + 1)
+            # a single row is a view. Many rows are selected with an index array
+            rows = rows[0] if len(rows) == 1 else np.array(rows)
+
+            if crntEffect.adj_rate is not None:
+                cols['adj_ratio'][rows, dst] *= crntEffect.adj_rate
+                continue
+            for crntCol, crntValues in crntEffect.cols.items():
+                cols[crntCol][rows, dst] += crntValues[src]
+
+    return cols
+
+def calculate_happiness(wealth, mthly_spending, adj_ratio=1):
+    """Vectorized version of Player.__calculate_happiness. Accepts scalars or numpy arrays."""
+    with np.errstate(over='ignore'):
+        return (1/(1+np.exp(-wealth/167000+1))+np.tanh(mthly_spending / 2122))*adj_ratio/2
+
+def derive_score_arrays(cols, period_start, prev_wealth, prev_debt, prev_asset, prev_spd_on_hapns, prev_happiness_sum, init_cash=0.0):
+    """Computes the derived score table columns from the summed columns returned by gather_period_arrays.
+
+    Input Arguments
+    ---------------
+    cols:               dictionary returned by gather_period_arrays. The derived columns are added to it.
+    period_start:       the global simulation period of the first element in cols
+    prev_wealth:        wealth at period_start-1. Ignored if period_start is 0.
+    prev_debt:          debt at period_start-1. Ignored if period_start is 0.
+    prev_asset:         asset at period_start-1. Ignored if period_start is 0.
+    prev_spd_on_hapns:  a list of happiness spending of the (up to) NPeriodsPerMonth-1 periods right before period_start
+    prev_happiness_sum: sum of happiness from period 0 to period_start-1
+    init_cash:          the initial cash of the player. Only used if period_start is 0.
+
+    Output Argument
+    ---------------
+    the index of the first element at which the player becomes bankrupt. -1 if the player does not go bankrupt.
+    """
+
+    n_periods = len(cols['income'])
+    cols['net_income'] = cols['income'] - cols['spending']
+
+    # monthly happiness spending: happiness spending in the current period plus the NPeriodsPerMonth-1 periods before it.
+    # the window is padded with zeros at the beginning of the game so that every window has the same size
+    prev_spd_on_hapns = list(prev_spd_on_hapns)[-(NPeriodsPerMonth-1):] if NPeriodsPerMonth > 1 else []
+    padded = np.concatenate(([0.0]*(NPeriodsPerMonth-1-len(prev_spd_on_hapns)), prev_spd_on_hapns, cols['spd_on_hapns']))
+    cols['mth_spd_hapns'] = np.lib.stride_tricks.sliding_window_view(padded, NPeriodsPerMonth).sum(axis=1)
+
+    # wealth is the previous wealth + net income - debt change + asset change.
+    # to keep the exact same sequence of floating point operations as the period-by-period loop,
+    # the three terms of every period are interleaved and summed with a single cumulative sum.
+    chg_debt = np.diff(cols['debt'], prepend=prev_debt)
+    chg_asset = np.diff(cols['asset'], prepend=prev_asset)
+    steps = np.column_stack((cols['net_income'], -chg_debt, chg_asset)).ravel()
+    if period_start == 0:
+        # the first period of the game starts from the initial cash instead of the previous wealth
+        first_wealth = cols['net_income'][0]-cols['debt'][0]+cols['asset'][0]+init_cash
+        cols['wealth'] = np.cumsum(np.concatenate(([first_wealth], steps[3:])))[::3]
+    else:
+        cols['wealth'] = np.cumsum(np.concatenate(([prev_wealth], steps)))[3::3]
+
+    # debt ratio excludes student debt
+    debt_no_std = cols['debt'] - cols['debt_std']
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cols['debt_ratio'] = np.where(cols['wealth'] == 0, np.where(debt_no_std > 0, 999, 0), debt_no_std / cols['wealth'])
+
+    cols['happiness'] = calculate_happiness(cols['wealth'], cols['mth_spd_hapns'], adj_ratio=cols['adj_ratio'])
+    # score: the average happiness value up to a simulation period
+    cols['happiness_sum'] = np.cumsum(np.concatenate(([prev_happiness_sum], cols['happiness'])))[1:]
+    cols['score'] = cols['happiness_sum'] / np.arange(period_start+1, period_start+n_periods+1)
+
+    # bankrupt condition: wealth excluding student debt is less than -2 times annual income
+    is_bankrupt = cols['wealth'] + cols['debt_std'] < -2*cols['annual_salary']
+    if not is_bankrupt.any():
+        return -1
+    return int(np.argmax(is_bankrupt))
+
+def derive_score_matrix(cols, period_start, prev_wealth, prev_debt, prev_asset, prev_spd_on_hapns, prev_happiness_sum, init_cash=0.0):
+    """Computes the derived score table columns of many rows at once. A row is eg one player, or one branch of a player's future.
+    This is derive_score_arrays for two-dimensional arrays. Each row gets exactly the same values as derive_score_arrays would give it on its own.
+
+    Input Arguments
+    ---------------
+    cols:               dictionary of two-dimensional numpy arrays with the keys of the dictionary returned by gather_period_arrays. 
+                        Row j is row j of the batch and column i is global period period_start+i. The derived columns are added to it.
+    period_start:       the global simulation period of the first column of the arrays. The same for all rows.
+    prev_wealth:        wealth at period_start-1. A number shared by all rows or a numpy array with one element per row. Ignored if period_start is 0.
+    prev_debt:          debt at period_start-1. A number or a numpy array with one element per row. Ignored if period_start is 0.
+    prev_asset:         asset at period_start-1. A number or a numpy array with one element per row. Ignored if period_start is 0.
+    prev_spd_on_hapns:  happiness spending of the (up to) NPeriodsPerMonth-1 periods right before period_start. 
+                        A list shared by all rows or a list with one such list per row.
+    prev_happiness_sum: sum of happiness from period 0 to period_start-1. A number or a numpy array with one element per row.
+    init_cash:          the initial cash. A number or a numpy array with one element per row. Only used if period_start is 0.
+
+    Output Argument
+    ---------------
+    a numpy array with one element per row: the index of the first column at which the row becomes bankrupt. -1 if the row does not go bankrupt.
+    """
+    n_rows, n_periods = cols['income'].shape
+    # a number shared by all rows becomes a column of the batch
+    as_column = lambda v: np.broadcast_to(np.asarray(v, dtype=float).reshape(-1, 1), (n_rows, 1))
+    cols['net_income'] = cols['income'] - cols['spending']
+
+    # monthly happiness spending, the same as in derive_score_arrays but for every row
+    if len(prev_spd_on_hapns) == 0 or np.ndim(prev_spd_on_hapns[0]) == 0:
+        prev_spd_on_hapns = [prev_spd_on_hapns] * n_rows
+    prev_window = np.zeros((n_rows, NPeriodsPerMonth-1))
+    for j, crntPrev in enumerate(prev_spd_on_hapns):
+        crntPrev = list(crntPrev)[-(NPeriodsPerMonth-1):] if NPeriodsPerMonth > 1 else []
+        if len(crntPrev) > 0:
+            prev_window[j, -len(crntPrev):] = crntPrev
+    padded = np.concatenate((prev_window, cols['spd_on_hapns']), axis=1)
+    cols['mth_spd_hapns'] = np.lib.stride_tricks.sliding_window_view(padded, NPeriodsPerMonth, axis=1).sum(axis=2)
+
+    # wealth with the interleaved cumulative sum of derive_score_arrays, one row at a time along axis 1
+    chg_debt = np.diff(cols['debt'], axis=1, prepend=as_column(prev_debt))
+    chg_asset = np.diff(cols['asset'], axis=1, prepend=as_column(prev_asset))
+    steps = np.stack((cols['net_income'], -chg_debt, chg_asset), axis=2).reshape(n_rows, -1)
+    if period_start == 0:
+        # the first period of the game starts from the initial cash instead of the previous wealth
+        first_wealth = cols['net_income'][:, :1]-cols['debt'][:, :1]+cols['asset'][:, :1]+as_column(init_cash)
+        cols['wealth'] = np.cumsum(np.concatenate((first_wealth, steps[:, 3:]), axis=1), axis=1)[:, ::3]
+    else:
+        cols['wealth'] = np.cumsum(np.concatenate((as_column(prev_wealth), steps), axis=1), axis=1)[:, 3::3]
+
+    # debt ratio excludes student debt
+    debt_no_std = cols['debt'] - cols['debt_std']
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cols['debt_ratio'] = np.where(cols['wealth'] == 0, np.where(debt_no_std > 0, 999, 0), debt_no_std / cols['wealth'])
+
+    cols['happiness'] = calculate_happiness(cols['wealth'], cols['mth_spd_hapns'], adj_ratio=cols['adj_ratio'])
+    cols['happiness_sum'] = np.cumsum(np.concatenate((as_column(prev_happiness_sum), cols['happiness']), axis=1), axis=1)[:, 1:]
+    cols['score'] = cols['happiness_sum'] / np.arange(period_start+1, period_start+n_periods+1)
+
+    # bankrupt condition: wealth excluding student debt is less than -2 times annual income
+    is_bankrupt = cols['wealth'] + cols['debt_std'] < -2*cols['annual_salary']
+    return np.where(is_bankrupt.any(axis=1), np.argmax(is_bankrupt, axis=1), -1)
+
+def derive_branch_scores(cols, period_start, period_score, prev_wealth, prev_debt, prev_asset, prev_spd_on_hapns, prev_happiness_sum):
+    """Computes the score of many branches of a player's future at once. A branch is one set of summed columns, eg the columns with one draw of the random events.
+    This is derive_score_matrix reduced to what the AI compares: the bankruptcy and the score of each branch.
+
+    Input Arguments
+    ---------------
+    cols:               dictionary of two-dimensional numpy arrays with the keys of the dictionary returned by gather_period_arrays. 
+                        Row j is branch j and column i is global period period_start+i.
+    period_start:       the global simulation period of the first column of the arrays. Must be after period 0.
+    period_score:       the global simulation period at which the score of a branch that does not go bankrupt is read. Must be covered by the arrays.
+    prev_wealth:        wealth at period_start-1. The branches all start from the same state.
+    prev_debt:          debt at period_start-1
+    prev_asset:         asset at period_start-1
+    prev_spd_on_hapns:  a list of happiness spending of the (up to) NPeriodsPerMonth-1 periods right before period_start
+    prev_happiness_sum: sum of happiness from period 0 to period_start-1
+
+    Output Argument
+    ---------------
+    a tuple of two numpy arrays with one element per branch: 
+    whether the branch goes bankrupt by period_score, and its score (at the bankruptcy period if it goes bankrupt, otherwise at period_score)
+    """
+    if period_start < 1:
+        raise ValueError('The branches must start after period 0.')
+
+    n_periods = period_score - period_start + 1
+    # the columns up to the scoring period
+    cols = {k: v[:, :n_periods] for k, v in cols.items()}
+    ibankrupt = derive_score_matrix(cols, period_start, prev_wealth, prev_debt, prev_asset, list(prev_spd_on_hapns), prev_happiness_sum)
+
+    # a branch stops at its first bankrupt period, and keeps the score of that period
+    bankrupt = ibankrupt != -1
+    iScore = np.where(bankrupt, ibankrupt, n_periods-1)
+    return bankrupt, cols['score'][np.arange(len(iScore)), iScore]
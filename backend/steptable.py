@@ -0,0 +1,80 @@
+# Copyright (C) 2023, Bank of America.  The file below is licensed to LSC for use with HSoF.  All other rights are reserved.
+"""This file defines the StepTable class. StepTable is the step table of one game.
+The step table built by backend.gameitems maps every step of the game to its stage, turn, event and simulation periods.
+It is shared by all games of a process and never changes: each column is a read-only numpy array.
+The only cells a game changes are the names of the random events it draws (column event_name).
+A StepTable keeps the cells its game writes in a small dictionary (the overlay) and reads every other cell from the shared table.
+Creating a game therefore does not copy the step table.
+
+Learning tip:
+What is copy-on-write?
+See: https://en.wikipedia.org/wiki/Copy-on-write
+"""
+
+class StepTable:
+    """Represents the step table of a game: the shared step table plus the cells the game has written"""
+
+    # names of the columns a game can write to
+    OverlayColumns = ['event_name']
+
+    def __init__(self, base):
+        """Represents the step table of a game.
+
+        Input Argument
+        --------------
+        base:   required dictionary of read-only numpy arrays keyed by column name (backend.gameitems.step_table). It is shared, not copied.
+        """
+        self._base = base
+        # the overlay: the cells the game has written, as dictionaries of values by step index, keyed by column name
+        self.overlay = {c: dict() for c in StepTable.OverlayColumns}
+
+    @property
+    def base(self):
+        """the shared step table (backend.gameitems.step_table), without the cells the game has written. Read-only"""
+        return self._base
+
+    def __len__(self):
+        return len(self._base['stage'])
+
+    def __contains__(self, name):
+        return name in self._base
+
+    def keys(self):
+        """returns the column names"""
+        return self._base.keys()
+
+    # returns a column. A column that the game cannot write is the shared read-only array itself.
+    # a column that the game can write is returned as an OverlayColumn, which reads the written cells from the overlay
+    def __getitem__(self, name):
+        if name in self.overlay:
+            return OverlayColumn(self, name)
+        return self._base[name]
+
+class OverlayColumn:
+    """Represents a column of a StepTable that the game can write to.
+    It behaves like a list: it supports len(), reading by index or slice, writing by index and iterating."""
+
+    def __init__(self, table, name):
+        self.table = table
+        self.name = name
+
+    def __len__(self):
+        return len(self.table)
+
+    def __iter__(self):
+        return iter(self[:])
+
+    def __getitem__(self, key):
+        base, overlay = self.table.base[self.name], self.table.overlay[self.name]
+        if isinstance(key, slice):
+            return [overlay.get(i, base[i]) for i in range(*key.indices(len(base)))]
+        if key < 0:
+            key += len(base)
+        return overlay.get(key, base[key])
+
+    def __setitem__(self, key, value):
+        if key < 0:
+            key += len(self.table)
+        if key < 0 or key >= len(self.table):
+            raise IndexError(f'Step {key} is not in the step table.')
+        self.table.overlay[self.name][key] = value
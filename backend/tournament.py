@@ -0,0 +1,241 @@
+# Copyright (C) 2023, Bank of America.  The file below is licensed to LSC for use with HSoF.  All other rights are reserved.
+"""This file defines a batch runner that plays many complete games without the graphic user interface (a Monte Carlo tournament).
+Each player in the tournament follows a strategy that makes its choices:
+    fixed:      always picks the same option for an event. The options can be given by event name; otherwise the first available option is picked.
+    random:     picks one of the available options at random.
+    ai:         picks the options the AI would pick for the player (see Prosperville.suggest_choices).
+The games run in parallel in worker processes, and a summary of each game is returned as soon as it is available, in the order of the games.
+
+The runner can be used from Python:
+    from backend.tournament import run_tournament
+    for summary in run_tournament(1000, ['random', 'ai'], n_workers=4):
+        print(summary['players'][0]['score'])
+or from a terminal, which writes one JSON summary per line:
+    python -m backend.tournament --games 1000 --strategy random --strategy ai --workers 4 --out results.jsonl
+
+Learning tip:
+What is a Monte Carlo simulation?
+See: https://en.wikipedia.org/wiki/Monte_Carlo_method
+"""
+
+from abc import ABC, abstractmethod
+
+class Strategy(ABC):
+    """Base class of the tournament strategies. A strategy picks an option for the current event of a game.
+    A subclass must define choose. Otherwise, creating the strategy raises TypeError."""
+
+    # name of the strategy
+    name = ''
+
+    def start_game(self, seed):
+        """called before a new game starts. seed is an int that the strategy may use for its random numbers."""
+        pass
+
+    @abstractmethod
+    def choose(self, game, player):
+        """returns the index of the option that the player picks for game.crntEvent"""
+
+    @staticmethod
+    def first_available(game):
+        """returns the index of the first option of the current event that is available to the current player"""
+        return game.crntOptionAvailability.index(True)
+
+class FixedStrategy(Strategy):
+    """Always picks the same option for an event"""
+
+    name = 'fixed'
+
+    def __init__(self, path=None):
+        """Always picks the same option for an event
+
+        Input Argument
+        --------------
+        path:   optional dictionary of option indices or option names by event name.
+                For an event that is not in the dictionary, or whose option is not available, the first available option is picked.
+        """
+        self.path = dict() if path is None else path
+
+    def choose(self, game, player):
+        crntEvent = game.crntEvent
+        if crntEvent.name in self.path:
+            iOption = self.path[crntEvent.name]
+            if isinstance(iOption, str): # option name
+                iOption = [c.name for c in crntEvent.options].index(iOption)
+            if game.crntOptionAvailability[iOption]:
+                return iOption
+        return Strategy.first_available(game)
+
+class RandomStrategy(Strategy):
+    """Picks one of the available options at random"""
+
+    name = 'random'
+
+    def start_game(self, seed):
+        import numpy as np
+        self.rng = np.random.default_rng(seed)
+
+    def choose(self, game, player):
+        available = [i for i, c in enumerate(game.crntOptionAvailability) if c]
+        return available[self.rng.integers(len(available))]
+
+class AIStrategy(Strategy):
+    """Picks the options the AI would pick for the player"""
+
+    name = 'ai'
+
+    def start_game(self, seed):
+        # the suggestion of the current turn. It is made once per turn at the first step of the turn
+        self.turn, self.suggestion = -1, dict()
+
+    def choose(self, game, player):
+        if self.turn != game.iTurn:
+            self.turn, self.suggestion = game.iTurn, game.suggest_choices(player)
+        if game.crntEvent.name in self.suggestion:
+            return self.suggestion[game.crntEvent.name]
+        return Strategy.first_available(game)
+
+def make_strategy(spec):
+    """Creates a strategy from its description.
+
+    Input Argument
+    --------------
+    spec:   a Strategy object, which is returned as is, or a str: 'fixed', 'random', 'ai',
+            or 'fixed:<path to a JSON file>' where the JSON file has the option indices or option names by event name.
+    """
+    if isinstance(spec, Strategy):
+        return spec
+    if spec == 'random':
+        return RandomStrategy()
+    if spec == 'ai':
+        return AIStrategy()
+    if spec == 'fixed':
+        return FixedStrategy()
+    if isinstance(spec, str) and spec.startswith('fixed:'):
+        import json
+        with open(spec[len('fixed:'):]) as f:
+            return FixedStrategy(json.load(f))
+    raise ValueError(f'Unrecognized strategy "{spec}". Use fixed, fixed:<json file>, random or ai.')
+
+def play_game(strategies, seed=0, game_index=0, **game_args):
+    """Plays a complete game without the graphic user interface and returns its summary.
+
+    Input Arguments
+    ---------------
+    strategies:     required list of strategies (see make_strategy). One for each human player.
+    seed:           optional int. The seed of the game.
+    game_index:     optional int. Saved in the summary to identify the game.
+    game_args:      optional keyword arguments passed to Prosperville (eg init_cash, rand_event_weight).
+
+    Output Argument
+    ---------------
+    a dictionary with
+        game:           game_index
+        seed:           seed
+        random_events:  list of the names of the random events drawn, in the order of the game
+        players:        list of dictionaries, one for each human player then the AI player, with
+                        name, strategy, score, bankrupt, bankrupt_period and choices (option names by event name)
+    """
+    from backend.prosperville import Prosperville
+
+    strategies = [make_strategy(c) for c in strategies]
+    for iPlayer, crntStrategy in enumerate(strategies):
+        crntStrategy.start_game([seed, iPlayer])
+
+    game = Prosperville(player_names=[f'player {i+1}' for i in range(len(strategies))], seed=seed, **game_args)
+    while not game.is_end:
+        # a human player picks an option for the current event based on its strategy
+        if game.crntEvent is not None and game.crntEvent.options and not game.crntPlayer.is_system:
+            game.crntPlayer.choices[game.crntEvent.name] = strategies[game.iPlayer].choose(game, game.crntPlayer)
+        game.next()
+    game.close()
+
+    rtn = {'game': game_index, 'seed': seed
+           , 'random_events': [game.step_table['event_name'][i] for i in range(game.n_steps) if game.step_table['is_random_event_step'][i] and game.step_table['event_name'][i] != '']
+           , 'players': []}
+    for iPlayer, crntPlayer in enumerate(game.players):
+        rtn['players'].append({
+            'name': crntPlayer.name
+            , 'strategy': strategies[iPlayer].name if iPlayer < len(strategies) else 'ai'
+            , 'score': float(crntPlayer.score)
+            , 'bankrupt': bool(crntPlayer.bankrupt)
+            , 'bankrupt_period': int(crntPlayer.bankrupt_period)
+            , 'choices': {k: game.event_by_name[k].options[v].name for k, v in crntPlayer.choices._data.items()}
+        })
+    return rtn
+
+def run_tournament(n_games, strategies, n_workers=1, seed=0, **game_args):
+    """Plays many games and yields the summary of each game (see play_game) in the order of the games.
+
+    Input Arguments
+    ---------------
+    n_games:        required int. Number of games to play.
+    strategies:     required list of strategies (see make_strategy). One for each human player.
+    n_workers:      optional int. Number of worker processes that play the games. 1 plays the games in this process.
+    seed:           optional int. Game i is played with seed+i, so the same seed gives the same tournament.
+    game_args:      optional keyword arguments passed to Prosperville (eg init_cash, rand_event_weight).
+    """
+    if n_workers <= 1:
+        for iGame in range(n_games):
+            yield play_game(strategies, seed=seed+iGame, game_index=iGame, **game_args)
+        return
+
+    from collections import deque
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(max_workers=n_workers) as executor:
+        # keep a limited number of games in the queue so that a long tournament does not hold all its games in memory
+        pending = deque()
+        iGame = 0
+        while iGame < n_games or len(pending) > 0:
+            while iGame < n_games and len(pending) < 4*n_workers:
+                pending.append(executor.submit(play_game, strategies, seed=seed+iGame, game_index=iGame, **game_args))
+                iGame += 1
+            yield pending.popleft().result()
+
+def summarize(summaries):
+    """Returns the mean score, the bankruptcy rate and the number of games of each player from a list of game summaries"""
+    from collections import defaultdict
+
+    scores, n_bankrupt = defaultdict(list), defaultdict(int)
+    for crntSummary in summaries:
+        for crntPlayer in crntSummary['players']:
+            key = (crntPlayer['name'], crntPlayer['strategy'])
+            scores[key].append(crntPlayer['score'])
+            n_bankrupt[key] += crntPlayer['bankrupt']
+    return {key: {'mean_score': sum(v)/len(v), 'bankrupt_rate': n_bankrupt[key]/len(v), 'n_games': len(v)} for key, v in scores.items()}
+
+def main(args=None):
+    """the command line entry point. Run "python -m backend.tournament --help" for the arguments."""
+    import sys, json, argparse
+
+    parser = argparse.ArgumentParser(prog='python -m backend.tournament', description='Plays many Prosperville games without the graphic user interface.')
+    parser.add_argument('--games', type=int, default=100, help='number of games to play')
+    parser.add_argument('--strategy', action='append', help='strategy of a human player: fixed, fixed:<json file>, random or ai. Repeat for each player.')
+    parser.add_argument('--workers', type=int, default=1, help='number of worker processes')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the first game')
+    parser.add_argument('--init-cash', type=float, default=0.0, help='initial cash of all players')
+    parser.add_argument('--event-weights', default=None, help='JSON file with random event weights by stage name')
+    parser.add_argument('--out', default=None, help='file to write one JSON game summary per line. Defaults to the standard output.')
+    args = parser.parse_args(args)
+
+    game_args = {'init_cash': args.init_cash}
+    if args.event_weights is not None:
+        with open(args.event_weights) as f:
+            game_args['rand_event_weight'] = json.load(f)
+
+    out = sys.stdout if args.out is None else open(args.out, 'w')
+    summaries = []
+    try:
+        for crntSummary in run_tournament(args.games, args.strategy or ['random'], n_workers=args.workers, seed=args.seed, **game_args):
+            out.write(json.dumps(crntSummary) + '\n')
+            out.flush()
+            summaries.append({'players': [{k: c[k] for k in ['name', 'strategy', 'score', 'bankrupt']} for c in crntSummary['players']]})
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    # print the aggregated results
+    for key, v in summarize(summaries).items():
+        print(f'{key[0]} ({key[1]}): mean score {v["mean_score"]:.2f}, bankrupt rate {v["bankrupt_rate"]:.1%}, {v["n_games"]} games', file=sys.stderr)
+
+if __name__ == '__main__':
+    main()
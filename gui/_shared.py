@@ -5,35 +5,80 @@ HeightFooter='32px' # height of the footer
 HeightHeader='32px' # height of the header
 HeightPlayground='540px' # height of the playground
 
-# a dictionary that stores the event UI objects (uiLifeEvent.py). The key is the name of the event in the event definition (backend/design/eventdef.py)
-# the content of this dictionary is created upon the first loading of lifestage.py
-event_by_name = dict()
-
-# points to the current event UI object that is being displayed.
-crntEventUI = None
-
-# an integer to indicate which display area should be rendered in the current game. 
-# The values are
-# 0: game play
-# 1: knowldge tip
-# 2: dash board
-# 3: message box
-# these values correspond to the index in tblMainArea.children defined in gui/playground.py.
-DisplayMode = 0
+class SessionUI:
+    """Holds the GUI elements and the GUI state of one game session (backend.session.GameSession).
+    Every session gets its own SessionUI when its GUI is built (see gui/app.py), so several games can be displayed by the same process.
+    The widgets created by the build functions of the gui modules are saved as attributes of this object."""
+
+    def __init__(self, session):
+        # the session and its game (backend.prosperville.Prosperville object)
+        self.session = session
+        self.game = session.game
+
+        # a dictionary that stores the event UI objects (uiLifeEvent.py). The key is the name of the event in the event definition (backend/design/eventdef.py)
+        # the content of this dictionary is created by build_lifestage in lifestage.py
+        self.event_by_name = dict()
+
+        # points to the current event UI object that is being displayed.
+        self.crntEventUI = None
+
+        # an integer to indicate which display area should be rendered in the current game. 
+        # The values are
+        # 0: game play
+        # 1: knowldge tip
+        # 2: dash board
+        # 3: message box
+        # these values correspond to the index in tblMainArea.children defined in gui/playground.py.
+        self.DisplayMode = 0
+
+        # the page of the score table that is displayed in the dashboard. The first page is 0 (see gui/dashboard.py)
+        self.ScorePage = 0
+
+        # the display mode the playground was last rendered in (see refresh_playground in gui/playground.py). None before the first rendering
+        self.RenderedMode = None
+        # the changes of the game (see backend.prosperville.GameChanges) that are not rendered yet. 
+        # the game adds to it through on_game_changed, and refresh_gui (gui/footer.py) renders only the GUI areas that display them
+        self.PendingChanges = set()
+
+    def on_game_changed(self, changes):
+        """the listener of the game (see backend.prosperville.Prosperville.add_listener). It only collects the changes, they are rendered by refresh_gui"""
+        self.PendingChanges |= changes
+
+    def take_changes(self):
+        """returns the changes that are not rendered yet, and clears them"""
+        rtn, self.PendingChanges = self.PendingChanges, set()
+        return rtn
 
 # a color wheel that is used to cycle through players to set their representative color
 player_colorwheel = ['#A5DA46','#8EDFFB','#E38EFB','#FB8EA4', '#FBC88E','#F2FB8E','#8FFF99','#8EA9FB', '#B98FFF','#FD5151','#E0A76C', '#E4F251']
 
-def dataframe2html(df, style=''):
-    """Converts a pandas dataframe to HTML table."""
-    ncols = df.shape[1]
-    
-    
+# the number of rows of one page of a table in the dashboard (see dataframe2html). With 2 periods per month, 120 rows of the score table are 5 years
+TablePageSize = 120
+
+def page_count(n_rows, page_size=TablePageSize):
+    """returns the number of pages of a table with n_rows rows. A table without rows has one (empty) page."""
+    return max(1, -(-n_rows // page_size))
+
+def dataframe2html(df, style='', page=None, page_size=TablePageSize):
+    """Converts a pandas dataframe to HTML table.
+    The cells are converted one column at a time, and only the rows of the requested page are converted.
+
+    Input Arguments
+    ---------------
+    df:         required pandas dataframe
+    style:      optional str. The style of the table and its cells.
+    page:       optional int. Converts only the rows of this page (the first page is 0). None converts all rows.
+    page_size:  optional int. The number of rows of a page.
+    """
     if style != '':
         style_bits = f' style="{style}"'
     else:
         style_bits = ''
 
+    # keep only the rows of the page
+    if page is not None:
+        df = df.iloc[page*page_size:(page+1)*page_size]
+
     rtn = f'<table{style_bits}>'
 
     # add header row
@@ -42,13 +87,13 @@ def dataframe2html(df, style=''):
         crnt_row += "\n\t\t<th{1}>{0}</th>".format(crntCol, style_bits)
     rtn += crnt_row + "\n\t</tr>"
 
-    # add value rows
-    for iRow, crntRow in df.iterrows():
-        crnt_row = "\n\t<tr>"
-        for iCol in range(ncols):
-            crnt_row += "\n\t\t<td{1}>{0}</td>".format(crntRow.values[iCol], style_bits)
-        # crnt_row += "\n</tr>"
-        rtn += crnt_row + "\n\t</tr>"
+    # add value rows. 
+    # each column is converted to a list of cells first. The values of a row are the values of the dataframe as one array (df.values), 
+    # so a column is converted the same way as the cells of a row would be
+    values = df.values
+    cell_start = f"\n\t\t<td{style_bits}>"
+    cols = [[cell_start + c + '</td>' for c in values[:, iCol].astype(str)] for iCol in range(df.shape[1])]
+    # then the cells of each row are joined
+    rtn += ''.join(["\n\t<tr>" + ''.join(crntCells) + "\n\t</tr>" for crntCells in zip(*cols)])
 
     return rtn + '</table>'
-
@@ -0,0 +1,57 @@
+# Copyright (C) 2023, Bank of America.  The file below is licensed to LSC for use with HSoF.  All other rights are reserved.
+
+"""This file puts the GUI areas of a game session together into the main game interface.
+Each call of build_gui creates a new set of widgets for the given session (backend.session.GameSession), 
+so the same process can display as many games as it hosts.
+"""
+
+from ipywidgets import GridBox, Layout
+from gui._shared import SessionUI
+from gui.header import build_header
+from gui.sidebar import build_sidebar
+from gui.playground import build_playground
+from gui.footer import build_footer
+
+def build_gui(session):
+    """Builds the main game interface of a game session and returns it. The GUI state is saved in session.gui.
+    
+    Input Argument
+    --------------
+    session:    required backend.session.GameSession object
+    """
+    # a GUI built before for the session stops listening to the game
+    if session.gui is not None:
+        session.game.remove_listener(session.gui.on_game_changed)
+    session.gui = SessionUI(session)
+    # collect the changes of the game state, so refresh_gui (gui/footer.py) renders only the areas that changed
+    session.game.add_listener(session.gui.on_game_changed)
+
+    # load GUI elements
+    tblHeaderArea = build_header(session)
+    tblSideBarArea = build_sidebar(session)
+    tblMainArea = build_playground(session)
+    tblFooterArea = build_footer(session)
+
+    # build the main GUI
+    MainWidget = GridBox( # set up an HTML table as the main game interface
+                        children=[tblHeaderArea, tblMainArea, tblSideBarArea, tblFooterArea]
+                        , layout=Layout(
+                            width='100%' # 100% of the notebook width
+                            , border = 'solid 1px'
+                            # define 3 rows respectively for header, middle and footer areas
+                            , grid_template_rows='32px auto 34px'
+                            # definte 2 colums respectively for the main play area and the side bar
+                            , grid_template_columns='75% 25%'
+                            # place elements into the grid.
+                            # The header takes the entire first row; same does the footer for the last row.
+                            , grid_template_areas='''
+                            "tblHeaderArea tblHeaderArea "
+                            "tblMainArea tblSideBarArea "
+                            "tblFooterArea tblFooterArea"
+                            '''
+                            ,background_color='green'
+                        )
+                    )
+    MainWidget.add_class('title_bg')
+    session.gui.MainWidget = MainWidget
+    return MainWidget
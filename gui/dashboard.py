@@ -1,69 +1,124 @@
 # Copyright (C) 2023, Bank of America.  The file below is licensed to LSC for use with HSoF.  All other rights are reserved.
 """This file defines GUI elements that render the dashboard display area"""
 
-from ipywidgets import Dropdown, Tab, Layout, HTML, VBox
-from gui._shared import dataframe2html, HeightPlayground
-from backend.prosperville import crntGame # loads the backend.Prosperville object that represents the current running game
+from ipywidgets import Dropdown, Tab, Layout, HTML, VBox, HBox, Button, Label
+from gui._shared import dataframe2html, page_count, HeightPlayground
 
-# this function is called whenever the player dropdown box on either tab changes its selected value
-def dropdown_on_change(chg):
-    refresh_dashboard()
+# read the player basic info html, use it as a template to instruct how to display the play basic info on the score tab
+with open('gui/html/player_att.html','r') as f:
+    htmlPlayerAttTemplate = f.read()
+
+# the changes of the game (see backend.prosperville.GameChanges) that the dashboard displays: the drawn random events and choices up to the current step, and the scores.
+# refresh_playground (gui/playground.py) renders the dashboard only when it is displayed and one of them happened, or when it is displayed again
+RefreshOn = {'step', 'scores'}
+
+# these functions are called when the player dropdown box on the choice tab or the score tab changes its selected value. 
+# only the tab of the dropdown box is rendered again
+def dpdPlayerChoice_on_change(session, chg):
+    refresh_choice_table(session)
+
+def dpdPlayerScore_on_change(session, chg):
+    refresh_score_tab(session)
+
+# this function is called when one of the page buttons of the score tab is clicked. step is -1 for the previous page and 1 for the next page
+def btnScorePage_on_click(session, step):
+    session.gui.ScorePage += step
+    # only the score table changes, so the rest of the dashboard is not rendered again
+    refresh_score_table(session)
+
+def refresh_score_table(session):
+    """Renders the displayed page of the score table of a game session, and the page navigation of the score tab"""
+    crntGame, crntUI = session.game, session.gui # the game of the session and its GUI state
 
-def refresh_dashboard():
-    """Renders the dashboard display area"""
-    
-    # update the player choice table to reflect the currently selected player in the choice dropdown box
-    htmlChoiceTable.value = dataframe2html(crntGame.players[dpdPlayerChoice.value].choice_table[['Stage','Turn','Random','Event','Choice']], style='border: 1px solid black; border-collapse: collapse; padding:0px 2px 0px 2px; text-align:center;')
     # find the Player object according to the selected player in the score dropdown box
-    crntPlayer4Score = crntGame.players[dpdPlayerScore.value]
+    score_table = crntGame.players[crntUI.dpdPlayerScore.value].score_table
+    # keep the displayed page within the pages of the table. The table of another player or of an earlier turn may have fewer pages
+    n_pages = page_count(score_table.shape[0])
+    crntUI.ScorePage = min(max(crntUI.ScorePage, 0), n_pages-1)
+    crntUI.btnScorePrev.disabled = crntUI.ScorePage == 0
+    crntUI.btnScoreNext.disabled = crntUI.ScorePage == n_pages-1
+    crntUI.lblScorePage.value = f'Page {crntUI.ScorePage+1} of {n_pages}'
+
     # display the scores for the current player
-    if crntPlayer4Score.score_table.shape[0] == 0: # if the player is not scored yet (eg first turn of the game)
-        htmlScoreTable.value = '<p>Player is not scored yet.</p>'
+    if score_table.shape[0] == 0: # if the player is not scored yet (eg first turn of the game)
+        crntUI.htmlScoreTable.value = '<p>Player is not scored yet.</p>'
     else: # if the current player is scored
-        # display the player's score table
-        htmlScoreTable.value = dataframe2html(crntPlayer4Score.score_table, style='border: 1px solid black; border-collapse: collapse; padding:0px 4px 0px 4px; text-align:center;')
-    # display other player basic information on the score tab
-    htmlPlayerAtt.value = htmlPlayerAttTemplate.format(name=crntPlayer4Score.name, bankrupt='Yes' if crntPlayer4Score.bankrupt else 'No', score=crntPlayer4Score.score)
+        # display the displayed page of the player's score table. Only the rows of the page are converted to HTML
+        crntUI.htmlScoreTable.value = dataframe2html(score_table, style='border: 1px solid black; border-collapse: collapse; padding:0px 4px 0px 4px; text-align:center;', page=crntUI.ScorePage)
 
-# read the player basic info html, use it as a template to instruct how to display the play basic info on the score tab
-with open('gui/html/player_att.html','r') as f:
-    htmlPlayerAttTemplate = f.read()
+def refresh_choice_table(session):
+    """Renders the choice tab of the dashboard of a game session"""
+    crntGame, crntUI = session.game, session.gui # the game of the session and its GUI state
+
+    # update the player choice table to reflect the currently selected player in the choice dropdown box
+    crntUI.htmlChoiceTable.value = dataframe2html(crntGame.players[crntUI.dpdPlayerChoice.value].choice_table[['Stage','Turn','Random','Event','Choice']], style='border: 1px solid black; border-collapse: collapse; padding:0px 2px 0px 2px; text-align:center;')
 
-# create HTML widgets for the choice and score display
-htmlChoiceTable, htmlScoreTable = HTML(), HTML() 
-# make a dropdown box for the choice tab to display and make choice of which player is to display
-dpdPlayerChoice = Dropdown(options=[(crntGame.players[i].name, i) for i in range(len(crntGame.players))]
-                           , value=0
-                           , description='Player: '
-                          )
-# add change logic
-dpdPlayerChoice.observe(dropdown_on_change)
-# place the dropdown box and the display html widget in a vertical box
-vbxChoices = VBox(children=[dpdPlayerChoice, htmlChoiceTable])
+def refresh_score_tab(session):
+    """Renders the score tab of the dashboard of a game session"""
+    crntGame, crntUI = session.game, session.gui # the game of the session and its GUI state
 
+    # find the Player object according to the selected player in the score dropdown box
+    crntPlayer4Score = crntGame.players[crntUI.dpdPlayerScore.value]
+    # display the page of the scores for the current player
+    refresh_score_table(session)
+    # display other player basic information on the score tab
+    crntUI.htmlPlayerAtt.value = htmlPlayerAttTemplate.format(name=crntPlayer4Score.name, bankrupt='Yes' if crntPlayer4Score.bankrupt else 'No', score=crntPlayer4Score.score)
+
+def refresh_dashboard(session):
+    """Renders the dashboard display area of a game session"""
+    refresh_choice_table(session)
+    refresh_score_tab(session)
+
+def build_dashboard(session):
+    """Creates the dashboard display area of a game session, renders it and returns it.
+    
+    Input Argument
+    --------------
+    session:    required backend.session.GameSession object whose GUI state (session.gui) receives the widgets
+    """
+    crntGame, crntUI = session.game, session.gui # the game of the session and its GUI state
 
-# make a dropdown box for the score tab to display and make choice of which player is to display
-dpdPlayerScore = Dropdown(options=[(crntGame.players[i].name, i) for i in range(len(crntGame.players))]
-                           , value=0
-                           , description='Player: '
-                          )
-# add change logic
-dpdPlayerScore.observe(dropdown_on_change)
+    # create HTML widgets for the choice and score display
+    crntUI.htmlChoiceTable, crntUI.htmlScoreTable = HTML(), HTML() 
+    # make a dropdown box for the choice tab to display and make choice of which player is to display
+    crntUI.dpdPlayerChoice = Dropdown(options=[(crntGame.players[i].name, i) for i in range(len(crntGame.players))]
+                               , value=0
+                               , description='Player: '
+                              )
+    # add change logic
+    crntUI.dpdPlayerChoice.observe(lambda chg: dpdPlayerChoice_on_change(session, chg), names='value')
+    # place the dropdown box and the display html widget in a vertical box
+    vbxChoices = VBox(children=[crntUI.dpdPlayerChoice, crntUI.htmlChoiceTable])
 
-htmlPlayerAtt = HTML()
 
-# place the dropdown box and the display html widget in a vertical box
-vbxScore = VBox(children=[dpdPlayerScore, htmlPlayerAtt, htmlScoreTable])
+    # make a dropdown box for the score tab to display and make choice of which player is to display
+    crntUI.dpdPlayerScore = Dropdown(options=[(crntGame.players[i].name, i) for i in range(len(crntGame.players))]
+                               , value=0
+                               , description='Player: '
+                              )
+    # add change logic
+    crntUI.dpdPlayerScore.observe(lambda chg: dpdPlayerScore_on_change(session, chg), names='value')
 
-# defines the dashboard display area. 
-# This is the widget that gets to be displayed in the playground (playground.py).
-tabDashBoard = Tab(children=[vbxScore, vbxChoices]
-                   , titles=['Score','Player Choices']
-                   , layout=Layout(grid_area='tabDashBoard', height=HeightPlayground)
-                  )
+    crntUI.htmlPlayerAtt = HTML()
 
-# refresh all GUI elements in the dashboard display area upon the first loading of this file
-refresh_dashboard()
+    # the score table is displayed one page at a time. make the buttons that move to the previous and next page, and a label that shows the page
+    crntUI.btnScorePrev = Button(description='< Previous', layout=Layout(width='auto', margin='0px 8px 0px 0px'))
+    crntUI.btnScorePrev.on_click(lambda b: btnScorePage_on_click(session, -1))
+    crntUI.btnScoreNext = Button(description='Next >', layout=Layout(width='auto', margin='0px 8px 0px 0px'))
+    crntUI.btnScoreNext.on_click(lambda b: btnScorePage_on_click(session, 1))
+    crntUI.lblScorePage = Label()
+    hbxScorePage = HBox(children=[crntUI.btnScorePrev, crntUI.btnScoreNext, crntUI.lblScorePage])
 
+    # place the dropdown box, the page navigation and the display html widget in a vertical box
+    vbxScore = VBox(children=[crntUI.dpdPlayerScore, crntUI.htmlPlayerAtt, hbxScorePage, crntUI.htmlScoreTable])
 
+    # defines the dashboard display area. 
+    # This is the widget that gets to be displayed in the playground (playground.py).
+    crntUI.tabDashBoard = Tab(children=[vbxScore, vbxChoices]
+                       , titles=['Score','Player Choices']
+                       , layout=Layout(grid_area='tabDashBoard', height=HeightPlayground)
+                      )
 
+    # refresh all GUI elements in the dashboard display area upon creation
+    refresh_dashboard(session)
+    return crntUI.tabDashBoard
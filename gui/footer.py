@@ -4,92 +4,111 @@
 """
 
 from ipywidgets import GridBox, Layout, Button, ButtonStyle, HBox
-from backend.prosperville import crntGame # loads the backend.Prosperville object that represents the current running game
 import gui._shared as ui # shared items across front end
 
 # the following 4 methods are called when one of the following buttons is called: back button, next button, learning tip button, dashboard button.
-def btnBack_on_click(b):
-    crntGame.back() # instruct the game backend to step backward once
-    refresh_gui()
-
-def btnNext_on_click(b):
-    crntGame.next() # instruct the game backend to step forward once
-    refresh_gui()
-
-def btnlearningtip_on_click(b):
-    if ui.DisplayMode != 1: # if we are currently not displaying knowledge page
-        ui.DisplayMode = 1 # set the display mode indicator to show the knowledge page
+def btnBack_on_click(session, b):
+    session.game.back() # instruct the game backend to step backward once
+    refresh_gui(session)
+
+def btnNext_on_click(session, b):
+    session.game.next() # instruct the game backend to step forward once
+    refresh_gui(session)
+
+def btnlearningtip_on_click(session, b):
+    crntUI = session.gui # the GUI state of the session
+    if crntUI.DisplayMode != 1: # if we are currently not displaying knowledge page
+        crntUI.DisplayMode = 1 # set the display mode indicator to show the knowledge page
     else: # if we are currently displaying the knowledge page
-        ui.DisplayMode = 0 # set the display mode indicator to show life stage area
+        crntUI.DisplayMode = 0 # set the display mode indicator to show life stage area
     # render all gui pages / areas according to the display mode indicator
-    refresh_gui()
+    refresh_gui(session)
 
-def btnDashboard_on_click(b):
-    if ui.DisplayMode != 2: # if we are currently not displaying dashboard page
-        ui.DisplayMode = 2 # set the display mode indicator to show the dashboard page
+def btnDashboard_on_click(session, b):
+    crntUI = session.gui # the GUI state of the session
+    if crntUI.DisplayMode != 2: # if we are currently not displaying dashboard page
+        crntUI.DisplayMode = 2 # set the display mode indicator to show the dashboard page
     else: # if we are currently displaying the dashboard page
-        ui.DisplayMode = 0 # set the display mode indicator to show life stage area
+        crntUI.DisplayMode = 0 # set the display mode indicator to show life stage area
     # render all gui pages / areas according to the display mode indicator
-    refresh_gui()
-
-# define the back button
-btnBack = Button(description='<< Back', disabled=True
-                 , layout=Layout(width='auto', grid_area='btnBack', margin='0px 8px 0px 0px')
-                 , style=ButtonStyle(button_color='olive'))
-btnBack.on_click(btnBack_on_click)
-
-# define the next button
-btnNext = Button(description='Next >>'
-                 , layout=Layout(width='auto', grid_area='btnNext', margin='0px 20px 0px 0px')
-                 , style=ButtonStyle(button_color='green'))
-btnNext.on_click(btnNext_on_click)
-
-# define the learning tip button
-btnLearningTip = Button(description='Learning Tips'
-                 , layout=Layout(width='auto', grid_area='btnLearningTip', margin='0px 20px 0px 0px')
-                 , style=ButtonStyle(button_color='green'))
-btnLearningTip.on_click(btnlearningtip_on_click)
-
-# define the dashboard button
-btnDashboard = Button(description='Dashboard'
-                 , layout=Layout(width='auto', grid_area='btnDashboard', margin='0px 0px 0px 0px')
-                 , style=ButtonStyle(button_color='olive'))
-btnDashboard.on_click(btnDashboard_on_click)
-
-# define a horizontal box that holds all the buttons, lines them up next to each other
-hbxFooter = HBox([btnBack, btnNext,btnLearningTip,btnDashboard]
-                 , layout=Layout(grid_area='hbxFooter')
-            )
-
-# defines the footer area. it contains the horizontal box that has all the buttons.
-tblFooterArea = GridBox(children=[hbxFooter]
-                      , layout=Layout(
-                            grid_area='tblFooterArea' #name the current object so the parent grid can recognize it in layout.grid_template_areas
-                            , grid_template_rows="auto" # 1 row, 100% allotted space given by the parent object
-                            , grid_template_columns="auto" # 1 column, 100% allotted space given by the parent object
-                            , grid_template_areas=f"""{hbxFooter.layout.grid_area}""" # place the child widgets
-                            , height=ui.HeightFooter
-                            , justify_content = 'flex-start' # horizontal alignment
-                            , align_content = 'center' # vertical alignment
-                            , border_top = 'solid 1px'
-                            , padding='0px 4px 0px 4px'
-                        )
-             )
-
-# these two lists help us display UI elements properly. see details in refresh_gui function.
-button_group = [[btnBack,btnNext], [btnLearningTip],[btnDashboard]]
+    refresh_gui(session)
+
+def build_footer(session):
+    """Creates the footer area of a game session and returns it.
+    
+    Input Argument
+    --------------
+    session:    required backend.session.GameSession object whose GUI state (session.gui) receives the widgets
+    """
+    crntUI = session.gui # the GUI state of the session
+
+    # define the back button
+    crntUI.btnBack = Button(description='<< Back', disabled=True
+                     , layout=Layout(width='auto', grid_area='btnBack', margin='0px 8px 0px 0px')
+                     , style=ButtonStyle(button_color='olive'))
+    crntUI.btnBack.on_click(lambda b: btnBack_on_click(session, b))
+
+    # define the next button
+    crntUI.btnNext = Button(description='Next >>'
+                     , layout=Layout(width='auto', grid_area='btnNext', margin='0px 20px 0px 0px')
+                     , style=ButtonStyle(button_color='green'))
+    crntUI.btnNext.on_click(lambda b: btnNext_on_click(session, b))
+
+    # define the learning tip button
+    crntUI.btnLearningTip = Button(description='Learning Tips'
+                     , layout=Layout(width='auto', grid_area='btnLearningTip', margin='0px 20px 0px 0px')
+                     , style=ButtonStyle(button_color='green'))
+    crntUI.btnLearningTip.on_click(lambda b: btnlearningtip_on_click(session, b))
+
+    # define the dashboard button
+    crntUI.btnDashboard = Button(description='Dashboard'
+                     , layout=Layout(width='auto', grid_area='btnDashboard', margin='0px 0px 0px 0px')
+                     , style=ButtonStyle(button_color='olive'))
+    crntUI.btnDashboard.on_click(lambda b: btnDashboard_on_click(session, b))
+
+    # define a horizontal box that holds all the buttons, lines them up next to each other
+    hbxFooter = HBox([crntUI.btnBack, crntUI.btnNext, crntUI.btnLearningTip, crntUI.btnDashboard]
+                     , layout=Layout(grid_area='hbxFooter')
+                )
+
+    # defines the footer area. it contains the horizontal box that has all the buttons.
+    crntUI.tblFooterArea = GridBox(children=[hbxFooter]
+                          , layout=Layout(
+                                grid_area='tblFooterArea' #name the current object so the parent grid can recognize it in layout.grid_template_areas
+                                , grid_template_rows="auto" # 1 row, 100% allotted space given by the parent object
+                                , grid_template_columns="auto" # 1 column, 100% allotted space given by the parent object
+                                , grid_template_areas=f"""{hbxFooter.layout.grid_area}""" # place the child widgets
+                                , height=ui.HeightFooter
+                                , justify_content = 'flex-start' # horizontal alignment
+                                , align_content = 'center' # vertical alignment
+                                , border_top = 'solid 1px'
+                                , padding='0px 4px 0px 4px'
+                            )
+                 )
+
+    # this list helps us display UI elements properly. see details in refresh_gui function.
+    crntUI.button_group = [[crntUI.btnBack, crntUI.btnNext], [crntUI.btnLearningTip], [crntUI.btnDashboard]]
+    return crntUI.tblFooterArea
+
+# this list helps us display UI elements properly. see details in refresh_gui function.
 visibility_values = ['hidden', 'visible']
 
-def refresh_gui():
-    """Renders the entire GUI"""
+def refresh_gui(session):
+    """Renders the GUI of a game session. 
+    Only the GUI areas that display a change of the game since the last rendering are rendered again (see RefreshOn of the gui modules), 
+    so the widgets of the other areas are not updated and nothing is sent to the browser for them."""
 
-    from gui.header import refresh_header # load header refresh function
+    import gui.header as header # load header module
+    import gui.sidebar as sidebar # load sidebar module
     from gui.playground import refresh_playground  # load playground refresh function
-    from gui.sidebar import refresh_sidebar  # load sidebar refresh function
+
+    crntGame, crntUI = session.game, session.gui # the game of the session and its GUI state
+    # the changes the game notified since the last rendering (see SessionUI.on_game_changed in gui/_shared.py)
+    changes = crntUI.take_changes()
 
     # change button enability based on game progression
-    btnBack.disabled = not crntGame.can_step_back
-    btnNext.disabled = crntGame.is_end
+    crntUI.btnBack.disabled = not crntGame.can_step_back
+    crntUI.btnNext.disabled = crntGame.is_end
     
     # if the game reached the end
     if crntGame.is_end: 
@@ -97,7 +116,7 @@ def refresh_gui():
         
         # determines what message to display based on how the player ranks.
         if crntGame.n_players_survived ==0:
-            show_message('Game Ended', 'All players went bankrupt:( \n\nPlease click "OK" to see score.', next_mode=2)
+            show_message(session, 'Game Ended', 'All players went bankrupt:( \n\nPlease click "OK" to see score.', next_mode=2)
         else:
             # find highest ranked non-bankrupt player
             for i in crntGame.ranked_players:
@@ -105,32 +124,35 @@ def refresh_gui():
                     break
             if crntGame.n_players == 1:
                 if crntGame.players[0].score > crntGame.players[-1].score:
-                    show_message('{0} is the winner!'.format(crntGame.players[i].name), 'Congratulations! \n\nYou beat AI! \n\nPlease click "OK" to see score.', next_mode=2)
+                    show_message(session, '{0} is the winner!'.format(crntGame.players[i].name), 'Congratulations! \n\nYou beat AI! \n\nPlease click "OK" to see score.', next_mode=2)
                 else:
-                    show_message('Game Ended'.format(crntGame.players[i].name), 'Congratulations! \n\nYou built wealth and did not go bankrupt! \n\nPlease click "OK" to see score details.', next_mode=2)
+                    show_message(session, 'Game Ended'.format(crntGame.players[i].name), 'Congratulations! \n\nYou built wealth and did not go bankrupt! \n\nPlease click "OK" to see score details.', next_mode=2)
             else:
-                show_message('{0} is the winner!'.format(crntGame.players[i].name), 'Congratulations! \n\nPlease click "OK" to see scores and compare to AI.', next_mode=2)
-
-    # refreshes the GUI areas
-    refresh_header()
-    refresh_playground()
-    refresh_sidebar()
+                show_message(session, '{0} is the winner!'.format(crntGame.players[i].name), 'Congratulations! \n\nPlease click "OK" to see scores and compare to AI.', next_mode=2)
+
+    # refreshes the GUI areas that display one of the changes. The playground also follows the display mode
+    if len(changes & header.RefreshOn) > 0:
+        header.refresh_header(session)
+    refresh_playground(session, changes)
+    if len(changes & sidebar.RefreshOn) > 0:
+        sidebar.refresh_sidebar(session)
     
     # change button face based on display mode
-    if ui.DisplayMode == 1: # currently displaying knowledge tips
-        btnLearningTip.description = 'Return'
+    if crntUI.DisplayMode == 1: # currently displaying knowledge tips
+        crntUI.btnLearningTip.description = 'Return'
     else:
-        btnLearningTip.description = 'Learning Tips'
+        crntUI.btnLearningTip.description = 'Learning Tips'
         
-    if ui.DisplayMode == 2: # currently displaying dash board
-        btnDashboard.description = 'Return'
+    if crntUI.DisplayMode == 2: # currently displaying dash board
+        crntUI.btnDashboard.description = 'Return'
     else:
-        btnDashboard.description = 'Dashboard'
+        crntUI.btnDashboard.description = 'Dashboard'
 
     # change button visibility based on the display mode
-    if ui.DisplayMode != 0: # if currently not displaying game play area, only show the button tied to the display area
+    button_group = crntUI.button_group
+    if crntUI.DisplayMode != 0: # if currently not displaying game play area, only show the button tied to the display area
         for ibtn_group in range(len(button_group)):
-            visibility_value = visibility_values[int(ibtn_group == ui.DisplayMode)]           
+            visibility_value = visibility_values[int(ibtn_group == crntUI.DisplayMode)]           
             for crntBtn in button_group[ibtn_group]:
                     crntBtn.layout.visibility = visibility_value
     else: # if currently not displaying game play area, show all buttons
@@ -139,7 +161,6 @@ def refresh_gui():
                 crntBtn.layout.visibility = 'visible'
 
     if crntGame.is_end: 
-        btnDashboard.layout.visibility = 'hidden'
+        crntUI.btnDashboard.layout.visibility = 'hidden'
         
     
-
@@ -3,35 +3,43 @@
 """This file displays the message area of the game."""
 
 from ipywidgets import Button, ButtonStyle, Layout, Label, VBox, HTML
-import gui._shared as ui
 
-def btnMsgOK_on_click(b):
+def btnMsgOK_on_click(session, b):
     from gui.playground import refresh_playground
-    ui.DisplayMode = b.next_mode
-    refresh_playground()
+    session.gui.DisplayMode = b.next_mode
+    refresh_playground(session)
     
-
-# define message title display
-lblMsgTitle = Label(value='msgbox_lblMsgTitle', style={'font_size':'16px'}, layout=Layout(grid_area='msgbox_lblMsgTitle'))
-# define message description display
-htmlMsgDesc = HTML(value='<p style="word-wrap: break-word; line-height: 12px; font-size: 12px; margin: 0px"></p>', layout=Layout(grid_area='msgbox_htmlMsgDesc'))
-# define the OK button
-btnMsgOK = Button(description='OK', layout=Layout(width='64px', grid_area='msgbox_btnMsgOK', margin='32px 0px 0px 0px')
-                  , style=ButtonStyle(button_color='#BCBCBE')
-                 )
-btnMsgOK.on_click(btnMsgOK_on_click)
-
-# put all the 3 widgets into a vertical box. This is the widget that gets to be displayed in the playground (playground.py).
-vbxMsg = VBox([lblMsgTitle, htmlMsgDesc, btnMsgOK], layout=Layout(grid_area='msgbox_vbxMsg'))
-
-def show_message(title, mes, next_mode=0):
-    """Displays a message in the playground area and pauses the game."""
-    lblMsgTitle.value = title
-    htmlMsgDesc.value = '<p style="word-wrap: break-word">{0}</p>'.format(mes.replace('\n','<br/>'))
-    btnMsgOK.next_mode = next_mode
+def build_msgbox(session):
+    """Creates the message area of a game session and returns it.
+    
+    Input Argument
+    --------------
+    session:    required backend.session.GameSession object whose GUI state (session.gui) receives the widgets
+    """
+    crntUI = session.gui # the GUI state of the session
+
+    # define message title display
+    crntUI.lblMsgTitle = Label(value='msgbox_lblMsgTitle', style={'font_size':'16px'}, layout=Layout(grid_area='msgbox_lblMsgTitle'))
+    # define message description display
+    crntUI.htmlMsgDesc = HTML(value='<p style="word-wrap: break-word; line-height: 12px; font-size: 12px; margin: 0px"></p>', layout=Layout(grid_area='msgbox_htmlMsgDesc'))
+    # define the OK button
+    crntUI.btnMsgOK = Button(description='OK', layout=Layout(width='64px', grid_area='msgbox_btnMsgOK', margin='32px 0px 0px 0px')
+                      , style=ButtonStyle(button_color='#BCBCBE')
+                     )
+    crntUI.btnMsgOK.on_click(lambda b: btnMsgOK_on_click(session, b))
+
+    # put all the 3 widgets into a vertical box. This is the widget that gets to be displayed in the playground (playground.py).
+    crntUI.vbxMsg = VBox([crntUI.lblMsgTitle, crntUI.htmlMsgDesc, crntUI.btnMsgOK], layout=Layout(grid_area='msgbox_vbxMsg'))
+    return crntUI.vbxMsg
+
+def show_message(session, title, mes, next_mode=0):
+    """Displays a message in the playground area of a game session and pauses the game."""
+    crntUI = session.gui # the GUI state of the session
+    crntUI.lblMsgTitle.value = title
+    crntUI.htmlMsgDesc.value = '<p style="word-wrap: break-word">{0}</p>'.format(mes.replace('\n','<br/>'))
+    crntUI.btnMsgOK.next_mode = next_mode
 
     from gui.playground import refresh_playground
-    ui.DisplayMode = 3
-    refresh_playground()
+    crntUI.DisplayMode = 3
+    refresh_playground(session)
     
-
@@ -3,47 +3,76 @@
 """This file defines GUI elements in the main game area that we may also refer to as the playground
 """
 from ipywidgets import GridBox, Layout
-from gui.lifestage import tblLifeStagePage # main playing area
-from gui.knowledge import tabKnowlege # display area of learning tips
-from gui.dashboard import tabDashBoard # display area of the dashboard
-from gui.msgbox import vbxMsg # display area of message box
-import gui._shared as ui # shared items across front end
-
-# use a table widget to render the playground. The playground has 4 "pages" as children. 
-# At any given time, only one of them is displayed / visible.
-tblMainArea = GridBox(children=[tblLifeStagePage,tabKnowlege,tabDashBoard, vbxMsg]
-                      , layout=Layout(
-                            grid_area='tblMainArea' #name the current object so the parent grid can recognize it in layout.grid_template_areas
-                            , grid_template_rows="auto" # 1 row, 100% allotted space given by the parent object
-                            , grid_template_columns="auto" # 1 column, 100% allotted space given by the parent object
-                            # we are placing two areas within the same cell. however, only one will be visible at any time.
-                            , grid_template_areas=f"""{tblLifeStagePage.layout.grid_area} {tabKnowlege.layout.grid_area} {tabDashBoard.layout.grid_area} {vbxMsg.layout.grid_area}""" 
-                            , justify_content='flex-start' # horizontal alignment
-                            , align_content='flex-start' # vertical alignment
-                            , align_items='flex-start'
-                            , padding = '10px'
-                        )
-             )
-
-def refresh_playground():
-    """Renders the playground based on all game attributes."""
+from gui.lifestage import build_lifestage # main playing area
+from gui.knowledge import build_knowledge # display area of learning tips
+from gui.dashboard import build_dashboard # display area of the dashboard
+from gui.msgbox import build_msgbox # display area of message box
+
+def build_playground(session):
+    """Creates the playground of a game session, renders it and returns it.
+    
+    Input Argument
+    --------------
+    session:    required backend.session.GameSession object whose GUI state (session.gui) receives the widgets
+    """
+    crntUI = session.gui # the GUI state of the session
+
+    # create the 4 "pages" of the playground
+    tblLifeStagePage = build_lifestage(session)
+    tabKnowlege = build_knowledge(session)
+    tabDashBoard = build_dashboard(session)
+    vbxMsg = build_msgbox(session)
+
+    # use a table widget to render the playground. The playground has 4 "pages" as children. 
+    # At any given time, only one of them is displayed / visible.
+    crntUI.tblMainArea = GridBox(children=[tblLifeStagePage,tabKnowlege,tabDashBoard, vbxMsg]
+                          , layout=Layout(
+                                grid_area='tblMainArea' #name the current object so the parent grid can recognize it in layout.grid_template_areas
+                                , grid_template_rows="auto" # 1 row, 100% allotted space given by the parent object
+                                , grid_template_columns="auto" # 1 column, 100% allotted space given by the parent object
+                                # we are placing two areas within the same cell. however, only one will be visible at any time.
+                                , grid_template_areas=f"""{tblLifeStagePage.layout.grid_area} {tabKnowlege.layout.grid_area} {tabDashBoard.layout.grid_area} {vbxMsg.layout.grid_area}""" 
+                                , justify_content='flex-start' # horizontal alignment
+                                , align_content='flex-start' # vertical alignment
+                                , align_items='flex-start'
+                                , padding = '10px'
+                            )
+                 )
+
+    # render the playground upon creation
+    refresh_playground(session)
+    return crntUI.tblMainArea
+
+def refresh_playground(session, changes=None):
+    """Renders the playground of a game session based on all game attributes.
+    
+    Input Arguments
+    ---------------
+    session:    required backend.session.GameSession object
+    changes:    optional set of the changes of the game since the last rendering (see backend.prosperville.GameChanges). 
+                The life stage page and the dashboard are rendered only if the display mode changed or they display one of the changes. 
+                None renders everything.
+    """
 
     # loads the refresh functions for life stage and dashboard areas
-    from gui.lifestage import refresh_lifestage
-    from gui.dashboard import refresh_dashboard
+    import gui.lifestage as lifestage
+    import gui.dashboard as dashboard
+
+    crntUI = session.gui # the GUI state of the session
+    mode_changed = changes is None or crntUI.DisplayMode != crntUI.RenderedMode
 
     # based on display mode, make visible only one area
-    for iPage in range(len(tblMainArea.children)):
-        if iPage == ui.DisplayMode:
-            tblMainArea.children[iPage].layout.visibility = 'visible'
-        else:
-            tblMainArea.children[iPage].layout.visibility = 'hidden'
+    if mode_changed:
+        for iPage in range(len(crntUI.tblMainArea.children)):
+            if iPage == crntUI.DisplayMode:
+                crntUI.tblMainArea.children[iPage].layout.visibility = 'visible'
+            else:
+                crntUI.tblMainArea.children[iPage].layout.visibility = 'hidden'
+        crntUI.RenderedMode = crntUI.DisplayMode
     
     # this needs to be called to hide the event ui if the parent is hidden
-    refresh_lifestage()
+    if mode_changed or len(changes & lifestage.RefreshOn) > 0:
+        lifestage.refresh_lifestage(session)
     
-    if ui.DisplayMode == 2:
-        refresh_dashboard()
-
-refresh_playground()
-
+    if crntUI.DisplayMode == 2 and (mode_changed or len(changes & dashboard.RefreshOn) > 0):
+        dashboard.refresh_dashboard(session)
@@ -0,0 +1,126 @@
+# Copyright (C) 2023, Bank of America.  The file below is licensed to LSC for use with HSoF.  All other rights are reserved.
+"""This file checks that the faster code paths of the simulation give exactly the same games as the reference ones.
+Each test plays the same seeded games with two settings of Prosperville and compares the score tables and the choice tables of all players cell by cell:
+    sim_engine:         'python' (the period-by-period loop) and 'numpy' (backend/simkernel.py)
+    schedule_engine:    'python' (the calculate_schedule loops) and 'numpy' (backend/schedule.py)
+    ai_search:          'brute_force' and 'branch_and_bound' (backend/optimizer.py)
+    ai_workers:         0 (the AI searches in the game's process) and 2 (backend/aipool.py). The metrics records of the turns are compared too
+The games are also played while reading the score and choice tables at every step, so that the cached tables are extended turn by turn.
+A game only recalculates the schedules of the backend objects whose amount it changes, so the schedule engines are also compared
+on every backend object of the game definitions.
+
+Run it from this folder with
+    python -m pytest test_simulation.py
+or
+    python -m unittest test_simulation
+
+Learning tip:
+What is a regression test?
+See: https://en.wikipedia.org/wiki/Regression_testing
+"""
+
+import unittest
+
+# the seeds of the games that are played with every setting
+Seeds = [1, 2]
+
+def play(seed, read_tables=False, **game_args):
+    """Plays a seeded game with one human player that picks its options at random and returns the game.
+
+    Input Arguments
+    ---------------
+    seed:           required int. The seed of the game and of the player's strategy.
+    read_tables:    optional bool. True reads the score and choice tables of all players at every step.
+    game_args:      optional keyword arguments passed to Prosperville (eg sim_engine, ai_search).
+    """
+    from backend.prosperville import Prosperville
+    from backend.tournament import make_strategy
+
+    strategy = make_strategy('random')
+    strategy.start_game([seed, 0])
+    game = Prosperville(player_names=['player 1'], seed=seed, **game_args)
+    while not game.is_end:
+        if game.crntEvent is not None and game.crntEvent.options and not game.crntPlayer.is_system:
+            game.crntPlayer.choices[game.crntEvent.name] = strategy.choose(game, game.crntPlayer)
+        game.next()
+        if read_tables:
+            for crntPlayer in game.players:
+                crntPlayer.score_table, crntPlayer.choice_table
+    game.close()
+    return game
+
+class SameGameTest(unittest.TestCase):
+    """Compares the games played with two settings"""
+
+    def assertSameGames(self, args1, args2):
+        """plays the games of Seeds with both settings and checks that the score and choice tables of every player are equal,
+        and the metrics records too if both games record them"""
+        import pandas as pd
+
+        for crntSeed in Seeds:
+            game1, game2 = play(crntSeed, **args1), play(crntSeed, **args2)
+            self.assertEqual([c.name for c in game1.players], [c.name for c in game2.players])
+            for player1, player2 in zip(game1.players, game2.players):
+                with self.subTest(seed=crntSeed, player=player1.name):
+                    pd.testing.assert_frame_equal(player1.score_table, player2.score_table, check_exact=True)
+                    pd.testing.assert_frame_equal(player1.choice_table, player2.choice_table, check_exact=True)
+            if game1.metrics is not None and game2.metrics is not None:
+                with self.subTest(seed=crntSeed, metrics=True):
+                    self.assertSameMetrics(game1, game2)
+
+    def test_sim_engine(self):
+        self.assertSameGames({'sim_engine': 'python'}, {'sim_engine': 'numpy'})
+
+    def test_schedule_engine(self):
+        self.assertSameGames({'schedule_engine': 'python'}, {'schedule_engine': 'numpy'})
+
+    def test_branch_and_bound(self):
+        self.assertSameGames({'ai_search': 'brute_force'}, {'ai_search': 'branch_and_bound'})
+
+    def test_cached_tables(self):
+        self.assertSameGames({'read_tables': True}, {'read_tables': False})
+
+    def test_ai_workers(self):
+        from unittest import mock
+        from backend.aipool import AIPool
+
+        # the turns of the game definitions have too few combinations for the workers. Send every turn to them
+        with mock.patch.object(AIPool, 'MinCombinations', 0):
+            for crntSearch in ['brute_force', 'expectimax']:
+                self.assertSameGames({'ai_search': crntSearch, 'ai_workers': 0, 'metrics': True}, {'ai_search': crntSearch, 'ai_workers': 2, 'metrics': True})
+            # branch and bound evaluates the combinations in rounds in the workers, so it may evaluate other combinations. Only the games are compared
+            self.assertSameGames({'ai_search': 'branch_and_bound', 'ai_workers': 0}, {'ai_search': 'branch_and_bound', 'ai_workers': 2})
+
+    def assertSameMetrics(self, game1, game2):
+        """checks that the metrics records of two games are equal, except for the times.
+        The periods the AI simulates are not compared either: the worker processes do not count them in the game's process"""
+        def counts(crntRecord):
+            return {'turn': crntRecord['turn'], 'stage': crntRecord['stage'], 'step': crntRecord['step']
+                    , 'simulate_batch': None if crntRecord['simulate_batch'] is None else {k: v for k, v in crntRecord['simulate_batch'].items() if k != 'seconds'}
+                    , 'players': crntRecord['players'], 'ai_search': crntRecord['ai_search']}
+
+        self.assertEqual([counts(c) for c in game1.metrics.records], [counts(c) for c in game2.metrics.records])
+
+class ScheduleEngineTest(unittest.TestCase):
+    """Compares the schedules that the two schedule engines calculate for the backend objects of the game definitions"""
+
+    def test_game_definitions(self):
+        import copy
+        import numpy as np
+        import backend.gameitems as gamedef
+
+        for crntName in gamedef.pvBkEndObj_by_name:
+            for iObj, crntObj in enumerate(gamedef.pvBkEndObj_by_name[crntName]):
+                if not hasattr(crntObj, 'calculate_schedule'): # eg HappinessAdjustmentRatio has no schedule
+                    continue
+                # the objects are shared by all games, so copies are recalculated
+                obj1, obj2 = copy.deepcopy(crntObj), copy.deepcopy(crntObj)
+                obj1.calculate_schedule(engine='python')
+                obj2.calculate_schedule(engine='numpy')
+                with self.subTest(name=crntName, index=iObj):
+                    self.assertEqual(set(obj1.schedule), set(obj2.schedule))
+                    for crntCol in obj1.schedule:
+                        np.testing.assert_array_equal(np.asarray(obj1.schedule[crntCol], dtype=float), np.asarray(obj2.schedule[crntCol], dtype=float), err_msg=crntCol)
+
+if __name__ == '__main__':
+    unittest.main()